@@ -0,0 +1,346 @@
+"""
+Shared AST Representations for the Expression Chapters
+
+Chapters 4-7 each define their own BinOp / Number / Identifier classes so
+that every example stays readable on its own.  Those classes carry a
+per-instance __dict__, which dominates memory once a tree has millions of
+nodes.  This module offers two compact alternatives that the parser and
+the later passes all understand:
+
+- __slots__ node classes with the same names and fields, so the
+  name-based visitors of chapters 5 and 6 accept them unchanged.  They are
+  immutable, which lets HashConsFactory share one node between every
+  occurrence of the same subexpression (the tree becomes a DAG)
+- ASTArena: every node is a row in parallel typed arrays
+  (kind, op, left, right, literal) and is referred to by its row index
+
+Both are built through the node factory protocol used by the chapter 4
+parsers: an object with binop(left, op, right), number(value) and
+identifier(name) methods that return whatever represents a node.
+
+Features:
+- Slotted, immutable BinOp / Number / Identifier classes
+- Hash-consing factory: one canonical node per distinct subtree
+- Array-backed arena with interned literals
+- Iterative post-order traversal of arena subtrees
+- Memory-per-node measurement for all three representations
+"""
+
+from array import array
+
+
+# AST Node classes with __slots__
+class Node:
+    """Base class of the slotted nodes: fields are set once, in __init__"""
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} nodes are immutable")
+
+    __delattr__ = __setattr__
+
+
+_set_field = object.__setattr__
+
+
+class BinOp(Node):
+    """Binary operation node"""
+
+    __slots__ = ('left', 'op', 'right')
+
+    def __init__(self, left, op, right):
+        _set_field(self, 'left', left)
+        _set_field(self, 'op', op)
+        _set_field(self, 'right', right)
+
+    def __repr__(self):
+        return f"BinOp({self.left}, '{self.op}', {self.right})"
+
+
+class Number(Node):
+    """Number literal node"""
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        _set_field(self, 'value', value)
+
+    def __repr__(self):
+        return f"Number({self.value})"
+
+
+class Identifier(Node):
+    """Identifier node"""
+
+    __slots__ = ('name',)
+
+    def __init__(self, name):
+        _set_field(self, 'name', name)
+
+    def __repr__(self):
+        return f"Identifier('{self.name}')"
+
+
+class SlotsFactory:
+    """Node factory that builds the slotted classes above"""
+
+    binop = BinOp
+    number = Number
+    identifier = Identifier
+
+
+class HashConsFactory:
+    """
+    Node factory that returns one shared node per distinct subtree.
+
+    Children passed to binop() are themselves canonical, so two BinOps are
+    structurally equal exactly when their operator and child identities
+    match; the lookup key never has to walk the subtree.  Numbers are keyed
+    by (type, value) so that 1, 1.0 and True stay distinct.
+
+    Use one factory for a whole program to share subexpressions across
+    statements.  Passes can then memoize per node identity.
+    """
+
+    def __init__(self):
+        self.binops = {}
+        self.numbers = {}
+        self.identifiers = {}
+        self.requested = 0  # nodes asked for, shared or not
+
+    def __len__(self):
+        """Number of distinct nodes created"""
+        return len(self.binops) + len(self.numbers) + len(self.identifiers)
+
+    def binop(self, left, op, right):
+        self.requested += 1
+        key = (op, left, right)  # 子节点已是规范节点，按身份比较即可
+        node = self.binops.get(key)
+        if node is None:
+            node = self.binops[key] = BinOp(left, op, right)
+        return node
+
+    def number(self, value):
+        self.requested += 1
+        key = (type(value), value)
+        node = self.numbers.get(key)
+        if node is None:
+            node = self.numbers[key] = Number(value)
+        return node
+
+    def identifier(self, name):
+        self.requested += 1
+        node = self.identifiers.get(name)
+        if node is None:
+            node = self.identifiers[name] = Identifier(name)
+        return node
+
+
+# Arena row kinds
+KIND_NUMBER, KIND_IDENTIFIER, KIND_BINOP = range(3)
+
+# Operator codes stored in the arena's op column
+OPERATORS = ('+', '-', '*', '/', '<', '>', '==', '!=', '<=', '>=')
+OPERATOR_CODES = {op: code for code, op in enumerate(OPERATORS)}
+
+
+class ASTArena:
+    """
+    Expression nodes stored as rows of parallel typed arrays.
+
+    Row i describes one node:
+    - kind[i]:    KIND_NUMBER, KIND_IDENTIFIER or KIND_BINOP
+    - op[i]:      operator code (BinOp rows), -1 otherwise
+    - left[i]:    row index of the left operand (BinOp rows), -1 otherwise
+    - right[i]:   row index of the right operand (BinOp rows), -1 otherwise
+    - literal[i]: index into `literals` (Number and Identifier rows)
+
+    Numbers and names are interned, so repeated literals share one entry.
+    The arena implements the node factory protocol, so a parser can build
+    into it directly; nodes are then plain integers.
+    """
+
+    def __init__(self):
+        self.kind = array('b')
+        self.op = array('b')
+        self.left = array('i')
+        self.right = array('i')
+        self.literal = array('i')
+        self.literals = []
+        self.literal_ids = {}
+
+    def __len__(self):
+        return len(self.kind)
+
+    def _add(self, kind, op, left, right, literal):
+        self.kind.append(kind)
+        self.op.append(op)
+        self.left.append(left)
+        self.right.append(right)
+        self.literal.append(literal)
+        return len(self.kind) - 1
+
+    def _intern(self, value):
+        # 类型也作为键的一部分，避免 1、1.0 和 True 被合并
+        key = (type(value), value)
+        index = self.literal_ids.get(key)
+        if index is None:
+            index = len(self.literals)
+            self.literal_ids[key] = index
+            self.literals.append(value)
+        return index
+
+    def binop(self, left, op, right):
+        """Append a BinOp row and return its index"""
+        return self._add(KIND_BINOP, OPERATOR_CODES[op], left, right, -1)
+
+    def number(self, value):
+        """Append a Number row and return its index"""
+        return self._add(KIND_NUMBER, -1, -1, -1, self._intern(value))
+
+    def identifier(self, name):
+        """Append an Identifier row and return its index"""
+        return self._add(KIND_IDENTIFIER, -1, -1, -1, self._intern(name))
+
+    def operator(self, index):
+        """Operator text of BinOp row `index`"""
+        return OPERATORS[self.op[index]]
+
+    def value(self, index):
+        """Literal value (number or name) of row `index`"""
+        return self.literals[self.literal[index]]
+
+    def postorder(self, root):
+        """
+        Yield the rows of the subtree at `root` in post-order.
+
+        Children come before their parent and left before right, the order
+        in which a recursive visitor finishes nodes.  Uses an explicit
+        stack, so deep trees are fine.
+        """
+        kind = self.kind
+        left = self.left
+        right = self.right
+        stack = [root]
+        flags = [False]  # 与 stack 平行：该行的子节点是否已经压栈
+        while stack:
+            index = stack[-1]
+            if kind[index] != KIND_BINOP or flags[-1]:
+                stack.pop()
+                flags.pop()
+                yield index
+            else:
+                flags[-1] = True
+                stack.append(right[index])
+                flags.append(False)
+                stack.append(left[index])
+                flags.append(False)
+
+    def to_tree(self, root, factory=SlotsFactory):
+        """Convert the subtree at `root` into node objects built by `factory`"""
+        built = {}
+        for index in self.postorder(root):
+            kind = self.kind[index]
+            if kind == KIND_BINOP:
+                built[index] = factory.binop(built.pop(self.left[index]),
+                                             self.operator(index),
+                                             built.pop(self.right[index]))
+            elif kind == KIND_NUMBER:
+                built[index] = factory.number(self.value(index))
+            else:
+                built[index] = factory.identifier(self.value(index))
+        return built[root]
+
+    def format(self, root):
+        """Same text as repr() of the equivalent node tree"""
+        return repr(self.to_tree(root))
+
+
+def measure_memory(num_nodes=10**6):
+    """
+    Measure bytes per node for plain classes, slotted classes and the arena.
+
+    Each representation builds a left-leaning chain
+    x + 0 + 1 + 2 + ... with about `num_nodes` nodes.
+
+    Args:
+        num_nodes: Approximate number of nodes to build
+    """
+    import tracemalloc
+
+    class PlainBinOp:
+        def __init__(self, left, op, right):
+            self.left = left
+            self.op = op
+            self.right = right
+
+    class PlainNumber:
+        def __init__(self, value):
+            self.value = value
+
+    class PlainIdentifier:
+        def __init__(self, name):
+            self.name = name
+
+    class PlainFactory:
+        binop = PlainBinOp
+        number = PlainNumber
+        identifier = PlainIdentifier
+
+    def build(factory):
+        tree = factory.identifier('x')
+        for i in range(num_nodes // 2):
+            # 取模避免为每个节点单独创建一个大整数对象
+            tree = factory.binop(tree, '+', factory.number(i % 256))
+        return tree
+
+    print(f"{'representation':<22}{'nodes':>10}{'bytes/node':>12}")
+    for name, make_factory in [("plain classes", PlainFactory),
+                               ("__slots__ classes", SlotsFactory),
+                               ("ASTArena", ASTArena)]:
+        tracemalloc.start()
+        factory = make_factory() if make_factory is ASTArena else make_factory
+        tree = build(factory)
+        used, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        nodes = num_nodes // 2 * 2 + 1
+        print(f"{name:<22}{nodes:>10}{used / nodes:>12.1f}")
+        del tree, factory
+
+
+# Example usage
+if __name__ == "__main__":
+    # Test case 1: Same expression in both compact forms
+    tree = BinOp(Identifier('x'), '+', BinOp(Number(3), '*', Number(4)))
+    print("Slotted tree:", tree)
+
+    arena = ASTArena()
+    root = arena.binop(arena.identifier('x'), '+',
+                       arena.binop(arena.number(3), '*', arena.number(4)))
+    print("Arena rows:")
+    for i in range(len(arena)):
+        print(f"  {i}: kind={arena.kind[i]} op={arena.op[i]:>2} "
+              f"left={arena.left[i]:>2} right={arena.right[i]:>2} "
+              f"literal={arena.literal[i]:>2}")
+    print("Arena tree:", arena.format(root))
+    print("Post-order:", list(arena.postorder(root)))
+    print()
+
+    # Test case 2: Shared subexpressions
+    factory = HashConsFactory()
+    a = factory.binop(factory.identifier('var0'), '*', factory.identifier('var1'))
+    b = factory.binop(factory.identifier('var0'), '*', factory.identifier('var1'))
+    dag = factory.binop(a, '+', b)
+    print("Hash-consed tree:", dag)
+    print("Both operands are one node:", dag.left is dag.right)
+    print(f"Nodes requested: {factory.requested}, created: {len(factory)}")
+    try:
+        a.op = '-'
+    except AttributeError as e:
+        print("Mutation rejected:", e)
+    print()
+
+    # Test case 3: Memory per node
+    print("=== Memory per node ===")
+    measure_memory()
@@ -0,0 +1,326 @@
+"""
+Chapter 3: Lexical Analysis - Incremental Re-Lexing
+
+An editor changes a few characters at a time, but re-running
+RegexLexer.tokenize over the whole buffer after every keystroke costs time
+proportional to the file size.  An incremental lexer only re-lexes the
+region around the edit:
+
+1. Re-lex the last token that begins before the edit, resuming the scan
+   right where the original pass continued after the token before it;
+   everything earlier is unaffected because lexing is left-to-right and
+   token matches never look behind.
+2. Lex forward through the edited text.
+3. Stop as soon as a new token starts exactly where an old token (that
+   lies after the edit) started: from there on the text is identical, so
+   the old tokens are still valid.
+
+Tokens are kept in a gap buffer.  Tokens before the gap store absolute
+offsets; tokens after the gap are stored in reverse order with offsets
+measured from the end of the text.  An edit only changes text in front of
+the tail tokens, so their end-relative offsets stay correct without being
+touched.
+
+The text is kept in a gap buffer too: the characters before the gap in
+order, the characters after it in reverse, so inserting and deleting at
+the gap are appends and pops.  Re-lexing joins only a window of text
+starting where the scan resumes, and the window grows (doubling) only
+while the new tokens have not re-synchronized.  No step touches the
+whole buffer, so the cost of an edit is proportional to the size of the
+edit, the damaged tokens and the distance the gaps move, not to the size
+of the file.  The whole text is only assembled when `text` is read.
+
+Features:
+- edit(offset, deleted, inserted) returns the changed token range
+- Gap buffer of array('i') columns, no per-edit shifting of offsets
+- Text in a character gap buffer; edits never rebuild the whole string
+- Same token stream as re-running RegexLexer.tokenize_compact()
+"""
+
+from array import array
+
+from chapter3_lexer_regex import RegexLexer
+from chapter3_token_array import TokenArray
+
+
+class IncrementalLexer:
+    """Token stream for an editable buffer, updated incrementally"""
+
+    # 重新词法分析时首次从文本间隙之后取的字符数，不够时加倍
+    WINDOW = 64
+
+    def __init__(self, text, lexer=None):
+        """
+        Lex the initial buffer.
+
+        Args:
+            text: Initial buffer contents
+            lexer: RegexLexer to use (a new one by default)
+        """
+        self.lexer = lexer or RegexLexer()
+        # 文本间隙缓冲：间隙之前的字符顺序存放，之后的字符逆序存放
+        self.head_text = list(text)
+        self.tail_text = []
+        self.length = len(text)
+        tokens = self.lexer.tokenize_compact(text)
+        self.kind_names = tokens.kind_names
+        self.kind_ids = tokens.kind_ids
+
+        # 间隙之前的 token：绝对偏移
+        self.head_kinds = tokens.kinds
+        self.head_starts = tokens.starts
+        self.head_ends = tokens.ends
+        # 间隙之后的 token：逆序存放，偏移量从文本末尾开始计算
+        self.tail_kinds = array('i')
+        self.tail_starts = array('i')
+        self.tail_ends = array('i')
+
+    def __len__(self):
+        return len(self.head_kinds) + len(self.tail_kinds)
+
+    @property
+    def text(self):
+        """The whole buffer as a string, assembled on demand (O(length))"""
+        return ''.join(self.head_text) + ''.join(reversed(self.tail_text))
+
+    def slice(self, start, end):
+        """Text between offsets start and end, read from the gap buffer"""
+        head, tail = self.head_text, self.tail_text
+        gap = len(head)
+        if end <= gap:
+            return ''.join(head[start:end])
+        # 位置 p >= gap 的字符是 tail[len(tail) - 1 - (p - gap)]
+        after = tail[len(tail) - (end - gap):len(tail) - max(start - gap, 0)]
+        after.reverse()
+        if start >= gap:
+            return ''.join(after)
+        return ''.join(head[start:]) + ''.join(after)
+
+    def start(self, index):
+        """Start offset of token `index`"""
+        head = len(self.head_starts)
+        if index < head:
+            return self.head_starts[index]
+        return self.length - self.tail_starts[len(self.tail_starts) - 1 - (index - head)]
+
+    def end(self, index):
+        """End offset of token `index`"""
+        head = len(self.head_ends)
+        if index < head:
+            return self.head_ends[index]
+        return self.length - self.tail_ends[len(self.tail_ends) - 1 - (index - head)]
+
+    def __getitem__(self, index):
+        """Token `index` as a (token_type, token_value) tuple"""
+        head = len(self.head_kinds)
+        if index < head:
+            kind = self.head_kinds[index]
+        else:
+            kind = self.tail_kinds[len(self.tail_kinds) - 1 - (index - head)]
+        return (self.kind_names[kind], self.slice(self.start(index), self.end(index)))
+
+    def tokens(self):
+        """Materialize the current token stream as a TokenArray"""
+        result = TokenArray(self.text, self.kind_names)
+        n = self.length
+        result.kinds = self.head_kinds + self.tail_kinds[::-1]
+        result.starts = self.head_starts + array('i', [n - d for d in reversed(self.tail_starts)])
+        result.ends = self.head_ends + array('i', [n - d for d in reversed(self.tail_ends)])
+        return result
+
+    def _count_before(self, offset):
+        """Number of tokens whose start offset is < offset (binary search)"""
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.start(mid) < offset:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo
+
+    def _move_gap(self, index):
+        """Move the gap so that exactly `index` tokens are before it"""
+        n = self.length
+        while len(self.head_kinds) > index:
+            self.tail_kinds.append(self.head_kinds.pop())
+            self.tail_starts.append(n - self.head_starts.pop())
+            self.tail_ends.append(n - self.head_ends.pop())
+        while len(self.head_kinds) < index:
+            self.head_kinds.append(self.tail_kinds.pop())
+            self.head_starts.append(n - self.tail_starts.pop())
+            self.head_ends.append(n - self.tail_ends.pop())
+
+    def _move_text_gap(self, offset):
+        """Move the text gap so that exactly `offset` characters are before it"""
+        head, tail = self.head_text, self.tail_text
+        gap = len(head)
+        if offset < gap:
+            moved = head[offset:]
+            moved.reverse()
+            tail += moved
+            del head[offset:]
+        elif offset > gap:
+            split = len(tail) - (offset - gap)
+            moved = tail[split:]
+            moved.reverse()
+            head += moved
+            del tail[split:]
+
+    def edit(self, offset, deleted, inserted):
+        """
+        Apply an edit to the buffer and update the tokens.
+
+        Args:
+            offset: Offset of the edit in the current text
+            deleted: Number of characters removed at offset
+            inserted: Text inserted at offset
+
+        Returns:
+            Tuple (first, old_stop, new_stop): old tokens [first, old_stop)
+            were replaced by new tokens [first, new_stop)
+        """
+        old_length = self.length
+        if not 0 <= offset <= offset + deleted <= old_length:
+            raise ValueError(f"Edit ({offset}, {deleted}) outside text of length {old_length}")
+
+        # 1. Re-lex from the last token that starts before the edit
+        first = max(self._count_before(offset) - 1, 0)
+        self._move_gap(first)
+        restart = self.head_ends[-1] if self.head_ends else 0
+
+        # Apply the edit at the text gap
+        self._move_text_gap(offset)
+        head_text, tail_text = self.head_text, self.tail_text
+        if deleted:
+            del tail_text[len(tail_text) - deleted:]
+        head_text += inserted
+        new_length = self.length = old_length - deleted + len(inserted)
+        edit_end = offset + deleted  # in old coordinates
+
+        kind_ids = self.kind_ids
+        tail_kinds, tail_starts, tail_ends = self.tail_kinds, self.tail_starts, self.tail_ends
+        finditer = self.lexer.pattern.finditer
+        removed = added = 0
+
+        # 2. Lex forward through a window of text until the new stream
+        #    re-synchronizes with the old one
+        window = ''.join(head_text[restart:])
+        base = restart          # offset of window[0] in the new text
+        taken = 0               # characters after the text gap already in the window
+        size = self.WINDOW
+        while True:
+            more = min(size, len(tail_text) - taken)
+            if more:
+                piece = tail_text[len(tail_text) - taken - more:len(tail_text) - taken]
+                piece.reverse()
+                window += ''.join(piece)
+                taken += more
+                size *= 2
+            at_end = taken == len(tail_text)
+
+            pos = 0
+            synced = False
+            for match in finditer(window):
+                if match.end() == len(window) and not at_end:
+                    # 可能被窗口边界截断，扩大窗口后重新匹配
+                    break
+                pos = match.end()
+                kind = kind_ids.get(match.lastgroup)
+                if kind is None:
+                    continue
+                start = base + match.start()
+
+                # Old tokens that overlap the edit or were skipped over are gone
+                while tail_starts and (old_length - tail_starts[-1] < edit_end
+                                       or new_length - tail_starts[-1] < start):
+                    tail_kinds.pop()
+                    tail_starts.pop()
+                    tail_ends.pop()
+                    removed += 1
+
+                # 3. Same start after the edit: the rest of the stream is unchanged
+                if tail_starts and new_length - tail_starts[-1] == start:
+                    synced = True
+                    break
+
+                self.head_kinds.append(kind)
+                self.head_starts.append(start)
+                self.head_ends.append(base + pos)
+                added += 1
+
+            if synced:
+                break
+            if at_end:
+                removed += len(tail_kinds)
+                del tail_kinds[:], tail_starts[:], tail_ends[:]
+                break
+            # 已处理的部分不再需要
+            window = window[pos:]
+            base += pos
+
+        return first, first + removed, first + added
+
+
+def benchmark(sizes=(10**4, 10**5, 10**6), edits=200, seed=0):
+    """
+    Compare per-edit latency against full re-lexing for growing files.
+
+    Args:
+        sizes: Approximate token counts of the generated buffers
+        edits: Number of random single-character edits per size
+        seed: Random seed
+    """
+    import random
+    import time
+
+    rng = random.Random(seed)
+    lexer = RegexLexer()
+    unit = "alpha + 123 * (beta_2 - 45) / gamma "
+    print(f"{'tokens':>10}{'incremental (us/edit)':>24}{'full re-lex (ms)':>20}")
+    for size in sizes:
+        text = unit * (size // 11)
+        incremental = IncrementalLexer(text, lexer)
+
+        # 第一次编辑把间隙移动到光标处，不计入计时
+        position = len(text) // 2
+        incremental.edit(position, 0, '')
+        start = time.perf_counter()
+        for _ in range(edits):
+            # 模拟打字：在光标附近插入或删除字符
+            position = min(max(position + rng.randint(-3, 3), 0), incremental.length - 1)
+            if rng.random() < 0.5:
+                incremental.edit(position, 0, rng.choice('a1 +('))
+            else:
+                incremental.edit(position, 1, '')
+        per_edit = (time.perf_counter() - start) / edits
+
+        start = time.perf_counter()
+        lexer.tokenize_compact(incremental.text)
+        full = time.perf_counter() - start
+        print(f"{len(incremental):>10}{per_edit * 1e6:>24.1f}{full * 1e3:>20.1f}")
+
+
+# Example usage
+if __name__ == "__main__":
+    lexer = RegexLexer()
+
+    # Test case 1: Extend an identifier and split a number
+    text = "count + 12 * (rate - 7)"
+    incremental = IncrementalLexer(text, lexer)
+    print("Text:  ", incremental.text)
+    print("Tokens:", incremental.tokens().to_list())
+
+    for offset, deleted, inserted in [(5, 0, "_total"), (14, 0, " "),
+                                      (0, 14, "("), (3, 0, "3.")]:
+        changed = incremental.edit(offset, deleted, inserted)
+        print(f"\nEdit: offset={offset}, deleted={deleted}, inserted={inserted!r}")
+        print("Text:   ", incremental.text)
+        print("Changed:", changed)
+        print("Tokens: ", incremental.tokens().to_list())
+        print("Same as full re-lex:",
+              incremental.tokens().to_list() == lexer.tokenize(incremental.text))
+    print()
+
+    print("=== Benchmark: latency per edit ===")
+    benchmark()
@@ -0,0 +1,690 @@
+"""
+Chapter 3: Lexical Analysis - Table-Driven DFA Lexer Generator
+
+RegexLexer joins its token patterns into one alternation and lets Python's
+re module try them with backtracking.  A lexer generator (like lex/flex)
+instead compiles the whole token specification into one deterministic
+finite automaton ahead of time:
+
+    regex  --Thompson-->  NFA  --subset construction-->  DFA
+           --Hopcroft minimization-->  minimal DFA  -->  flat table
+
+The driver then reads every character exactly once per attempted token and
+applies the longest-match (maximal munch) rule; when two patterns match
+the same longest lexeme, the one listed first wins.
+
+In CPython this buys no speed.  The alternation in RegexLexer barely
+backtracks on these patterns, and re runs its matcher in C, while the DFA
+driver spends one interpreted loop iteration per character.  On the
+module's benchmark DFALexer.tokenize and tokenize_compact run at about the
+same speed as RegexLexer.tokenize (0.85-1.15x between runs), and the
+hand-written lexer_fast is faster than both.  What the generator provides
+is the construction itself, and a table that a compiled driver could use.
+
+Features:
+- Regex parser for the subset used by RegexLexer.token_patterns
+  (alternation, grouping, * + ?, character classes, \\d \\s \\w escapes, .)
+- Thompson NFA, subset construction and Hopcroft minimization
+- Character class compression: characters that no pattern can tell apart
+  share one column of the transition table
+- Transition table stored in a flat array('i')
+- Benchmark against RegexLexer and the manual lexer
+"""
+
+import re
+from array import array
+
+from chapter3_token_array import TokenArray
+
+
+# ---------------------------------------------------------------------------
+# Character sets
+#
+# A character set is a pair (ascii_mask, unicode_mask):
+# - bit c of ascii_mask is set if chr(c) (c < 128) belongs to the set
+# - non-ASCII characters are only distinguished by the Unicode predicates
+#   \d, \s and \w use, so they fall into 8 "profiles" (one bit each for
+#   isdecimal, isspace, isalnum-or-underscore); bit p of unicode_mask is
+#   set if non-ASCII characters with profile p belong to the set
+# ---------------------------------------------------------------------------
+
+ASCII_FULL = (1 << 128) - 1
+UNICODE_FULL = (1 << 8) - 1
+
+
+def _ascii_mask(predicate):
+    mask = 0
+    for code in range(128):
+        if predicate(chr(code)):
+            mask |= 1 << code
+    return mask
+
+
+def _unicode_mask(predicate):
+    """Profiles p = decimal | space << 1 | word << 2 that satisfy predicate"""
+    mask = 0
+    for profile in range(8):
+        if predicate(bool(profile & 1), bool(profile & 2), bool(profile & 4)):
+            mask |= 1 << profile
+    return mask
+
+
+# Profiles that actual characters can have: decimal digits are always
+# alphanumeric, and whitespace is never alphanumeric
+UNICODE_PROFILES = (0, 2, 4, 5)
+
+
+def unicode_profile(ch):
+    """Profile number of a non-ASCII character"""
+    return (ch.isdecimal()
+            | ch.isspace() << 1
+            | (ch.isalnum() or ch == '_') << 2)
+
+
+CHARSET_DIGIT = (_ascii_mask(str.isdecimal), _unicode_mask(lambda d, s, w: d))
+CHARSET_SPACE = (_ascii_mask(str.isspace), _unicode_mask(lambda d, s, w: s))
+CHARSET_WORD = (_ascii_mask(lambda c: c.isalnum() or c == '_'),
+                _unicode_mask(lambda d, s, w: w))
+CHARSET_DOT = (ASCII_FULL & ~(1 << ord('\n')), UNICODE_FULL)
+
+_NON_ASCII = re.compile(r'[^\x00-\x7f]')
+
+_ESCAPE_CLASSES = {'d': CHARSET_DIGIT, 's': CHARSET_SPACE, 'w': CHARSET_WORD}
+_ESCAPE_CHARS = {'n': '\n', 't': '\t', 'r': '\r', 'f': '\f', 'v': '\v'}
+
+
+def _negate(charset):
+    return (ASCII_FULL & ~charset[0], UNICODE_FULL & ~charset[1])
+
+
+def _single(ch):
+    if ord(ch) >= 128:
+        raise ValueError(f"Non-ASCII literal {ch!r} is not supported")
+    return (1 << ord(ch), 0)
+
+
+def _range(lo, hi):
+    if ord(hi) >= 128:
+        raise ValueError(f"Non-ASCII range {lo!r}-{hi!r} is not supported")
+    mask = 0
+    for code in range(ord(lo), ord(hi) + 1):
+        mask |= 1 << code
+    return (mask, 0)
+
+
+# ---------------------------------------------------------------------------
+# Regex parser
+#
+# Produces a small AST of tuples:
+#   ('set', charset) | ('cat', [...]) | ('alt', [...])
+#   ('star', node) | ('plus', node) | ('opt', node) | ('empty',)
+# ---------------------------------------------------------------------------
+
+class RegexParser:
+    """Recursive descent parser for the regex subset used by token patterns"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.pos = 0
+
+    def parse(self):
+        node = self.parse_alternation()
+        if self.pos != len(self.pattern):
+            raise ValueError(
+                f"Unexpected {self.pattern[self.pos]!r} at {self.pos} "
+                f"in {self.pattern!r}")
+        return node
+
+    def peek(self):
+        if self.pos < len(self.pattern):
+            return self.pattern[self.pos]
+        return None
+
+    def next(self):
+        ch = self.peek()
+        if ch is None:
+            raise ValueError(f"Unexpected end of pattern {self.pattern!r}")
+        self.pos += 1
+        return ch
+
+    def parse_alternation(self):
+        """alt → cat ('|' cat)*"""
+        branches = [self.parse_concatenation()]
+        while self.peek() == '|':
+            self.pos += 1
+            branches.append(self.parse_concatenation())
+        return branches[0] if len(branches) == 1 else ('alt', branches)
+
+    def parse_concatenation(self):
+        """cat → repeat*"""
+        items = []
+        while self.peek() not in (None, '|', ')'):
+            items.append(self.parse_repeat())
+        if not items:
+            return ('empty',)
+        return items[0] if len(items) == 1 else ('cat', items)
+
+    def parse_repeat(self):
+        """repeat → atom ('*' | '+' | '?')*"""
+        node = self.parse_atom()
+        while self.peek() in ('*', '+', '?'):
+            op = self.next()
+            node = ({'*': 'star', '+': 'plus', '?': 'opt'}[op], node)
+        return node
+
+    def parse_atom(self):
+        """atom → '(' alt ')' | '[' class ']' | escape | '.' | literal"""
+        ch = self.next()
+        if ch == '(':
+            if self.pattern.startswith('?:', self.pos):
+                self.pos += 2
+            elif self.pattern.startswith('?P<', self.pos):
+                self.pos = self.pattern.index('>', self.pos) + 1
+            node = self.parse_alternation()
+            if self.next() != ')':
+                raise ValueError(f"Missing ')' in {self.pattern!r}")
+            return node
+        if ch == '[':
+            return ('set', self.parse_class())
+        if ch == '\\':
+            return ('set', self.parse_escape())
+        if ch == '.':
+            return ('set', CHARSET_DOT)
+        if ch in '*+?':
+            raise ValueError(f"Nothing to repeat at {self.pos - 1} in {self.pattern!r}")
+        return ('set', _single(ch))
+
+    def parse_escape(self):
+        ch = self.next()
+        if ch.lower() in _ESCAPE_CLASSES:
+            charset = _ESCAPE_CLASSES[ch.lower()]
+            return _negate(charset) if ch.isupper() else charset
+        return _single(_ESCAPE_CHARS.get(ch, ch))
+
+    def parse_class(self):
+        negated = self.peek() == '^'
+        if negated:
+            self.pos += 1
+        ascii_mask, unicode_mask = 0, 0
+        first = True
+        while first or self.peek() != ']':
+            first = False
+            ch = self.next()
+            if ch == '\\':
+                item = self.parse_escape()
+            elif (self.peek() == '-' and self.pos + 1 < len(self.pattern)
+                  and self.pattern[self.pos + 1] != ']'):
+                self.pos += 1
+                item = _range(ch, self.next())
+            else:
+                item = _single(ch)
+            ascii_mask |= item[0]
+            unicode_mask |= item[1]
+        self.pos += 1  # ']'
+        charset = (ascii_mask, unicode_mask)
+        return _negate(charset) if negated else charset
+
+
+# ---------------------------------------------------------------------------
+# Thompson construction
+# ---------------------------------------------------------------------------
+
+class NFA:
+    """
+    Thompson NFA.
+
+    Every state has a list of epsilon successors and at most one labelled
+    edge (charset id, target).  accept[s] is the token index accepted in
+    state s, or -1.
+    """
+
+    def __init__(self):
+        self.epsilon = []
+        self.edge = []
+        self.accept = []
+        self.charsets = []
+        self.charset_ids = {}
+        self.start = self.new_state()
+
+    def new_state(self):
+        self.epsilon.append([])
+        self.edge.append(None)
+        self.accept.append(-1)
+        return len(self.edge) - 1
+
+    def charset_id(self, charset):
+        cid = self.charset_ids.get(charset)
+        if cid is None:
+            cid = len(self.charsets)
+            self.charset_ids[charset] = cid
+            self.charsets.append(charset)
+        return cid
+
+    def add_pattern(self, node, token_index):
+        """Add one token pattern as a new alternative of the start state"""
+        start, end = self.build(node)
+        self.epsilon[self.start].append(start)
+        self.accept[end] = token_index
+
+    def build(self, node):
+        """Return (start, end) states of the fragment for `node`"""
+        kind = node[0]
+        if kind == 'set':
+            start, end = self.new_state(), self.new_state()
+            self.edge[start] = (self.charset_id(node[1]), end)
+            return start, end
+        if kind == 'empty':
+            state = self.new_state()
+            return state, state
+        if kind == 'cat':
+            start, end = self.build(node[1][0])
+            for item in node[1][1:]:
+                item_start, item_end = self.build(item)
+                self.epsilon[end].append(item_start)
+                end = item_end
+            return start, end
+        if kind == 'alt':
+            start, end = self.new_state(), self.new_state()
+            for branch in node[1]:
+                branch_start, branch_end = self.build(branch)
+                self.epsilon[start].append(branch_start)
+                self.epsilon[branch_end].append(end)
+            return start, end
+
+        # star / plus / opt
+        inner_start, inner_end = self.build(node[1])
+        start, end = self.new_state(), self.new_state()
+        self.epsilon[start].append(inner_start)
+        self.epsilon[inner_end].append(end)
+        if kind in ('star', 'opt'):
+            self.epsilon[start].append(end)
+        if kind in ('star', 'plus'):
+            self.epsilon[inner_end].append(inner_start)
+        return start, end
+
+    def closure(self, states):
+        """Epsilon closure of a collection of states"""
+        result = set(states)
+        stack = list(states)
+        epsilon = self.epsilon
+        while stack:
+            for target in epsilon[stack.pop()]:
+                if target not in result:
+                    result.add(target)
+                    stack.append(target)
+        return frozenset(result)
+
+
+# ---------------------------------------------------------------------------
+# Alphabet compression
+# ---------------------------------------------------------------------------
+
+def compress_alphabet(charsets):
+    """
+    Group input symbols that belong to exactly the same charsets.
+
+    The alphabet is the 128 ASCII characters plus the non-ASCII profiles in
+    UNICODE_PROFILES; impossible profiles share the class of profile 0.
+
+    Returns:
+        (ascii_class, unicode_class, members) where ascii_class[c] and
+        unicode_class[p] are class ids and members[cid] is the set of class
+        ids contained in charset cid
+    """
+    signatures = {}
+    ascii_class = array('B')
+    unicode_class = array('B')
+    for code in range(128):
+        signature = tuple((cs[0] >> code) & 1 for cs in charsets)
+        ascii_class.append(signatures.setdefault(signature, len(signatures)))
+    for profile in range(8):
+        if profile not in UNICODE_PROFILES:
+            profile = 0
+        signature = tuple((cs[1] >> profile) & 1 for cs in charsets)
+        unicode_class.append(signatures.setdefault(signature, len(signatures)))
+
+    members = [set() for _ in charsets]
+    for signature, cls in signatures.items():
+        for cid, bit in enumerate(signature):
+            if bit:
+                members[cid].add(cls)
+    return ascii_class, unicode_class, members
+
+
+# ---------------------------------------------------------------------------
+# Subset construction and Hopcroft minimization
+# ---------------------------------------------------------------------------
+
+def subset_construction(nfa, num_classes, members):
+    """
+    Convert the NFA into a complete DFA over the compressed alphabet.
+
+    State 0 is the start state and state 1 is the dead state.
+
+    Returns:
+        (transitions, accept) where transitions[s][c] is the target of state
+        s on class c and accept[s] is the token index accepted by s, or -1
+    """
+    dead = frozenset()
+    start = nfa.closure([nfa.start])
+    state_ids = {start: 0, dead: 1}
+    subsets = [start, dead]
+    transitions = []
+    accept = []
+
+    index = 0
+    while index < len(subsets):
+        subset = subsets[index]
+        index += 1
+
+        moves = [set() for _ in range(num_classes)]
+        for state in subset:
+            edge = nfa.edge[state]
+            if edge is not None:
+                cid, target = edge
+                for cls in members[cid]:
+                    moves[cls].add(target)
+
+        row = []
+        for cls in range(num_classes):
+            target = nfa.closure(moves[cls]) if moves[cls] else dead
+            target_id = state_ids.get(target)
+            if target_id is None:
+                target_id = len(subsets)
+                state_ids[target] = target_id
+                subsets.append(target)
+            row.append(target_id)
+        transitions.append(row)
+
+        tokens = [nfa.accept[s] for s in subset if nfa.accept[s] >= 0]
+        accept.append(min(tokens) if tokens else -1)
+
+    return transitions, accept
+
+
+def hopcroft_minimize(transitions, accept, num_classes):
+    """
+    Merge indistinguishable DFA states (Hopcroft's partition refinement).
+
+    States start out grouped by the token they accept; a block is split
+    whenever some class leads part of it into a splitter block and the rest
+    elsewhere.  Each time a block is split, only the smaller half needs to
+    be used as a future splitter, which gives O(n k log n) time.
+
+    Returns:
+        block_of: list mapping each DFA state to its block number
+    """
+    num_states = len(transitions)
+    inverse = [[[] for _ in range(num_states)] for _ in range(num_classes)]
+    for source, row in enumerate(transitions):
+        for cls, target in enumerate(row):
+            inverse[cls][target].append(source)
+
+    groups = {}
+    for state, token in enumerate(accept):
+        groups.setdefault(token, set()).add(state)
+    blocks = list(groups.values())
+    block_of = [0] * num_states
+    for b, block in enumerate(blocks):
+        for state in block:
+            block_of[state] = b
+
+    work = set(range(len(blocks)))
+    while work:
+        splitter = list(blocks[work.pop()])
+        for cls in range(num_classes):
+            inverse_cls = inverse[cls]
+            touched = {}
+            for target in splitter:
+                for source in inverse_cls[target]:
+                    touched.setdefault(block_of[source], set()).add(source)
+
+            for b, inside in touched.items():
+                block = blocks[b]
+                if len(inside) == len(block):
+                    continue
+                outside = block - inside
+                blocks[b] = inside
+                new = len(blocks)
+                blocks.append(outside)
+                for state in outside:
+                    block_of[state] = new
+                if b in work:
+                    work.add(new)
+                else:
+                    work.add(b if len(inside) <= len(outside) else new)
+
+    return block_of
+
+
+# ---------------------------------------------------------------------------
+# Lexer
+# ---------------------------------------------------------------------------
+
+class DFALexer:
+    """
+    Lexer driven by a minimized DFA generated from RegexLexer-style patterns.
+
+    The transition table is a flat array('i') with one row of num_classes
+    entries per state.  States are identified by their row offset
+    (state number * num_classes), so the successor of state s on character
+    class c is table[s + c], and -1 means "no transition".  accept[s] is the
+    index of the token accepted in state s, or -1.
+    """
+
+    def __init__(self, token_patterns=None, skip=('WHITESPACE',)):
+        """
+        Generate the lexer.
+
+        Args:
+            token_patterns: List of (token_type, regex) pairs; earlier entries
+                win ties.  Defaults to RegexLexer's patterns.
+            skip: Token types that are recognized but not emitted
+        """
+        if token_patterns is None:
+            from chapter3_lexer_regex import RegexLexer
+            token_patterns = RegexLexer().token_patterns
+        self.token_patterns = list(token_patterns)
+        self.token_names = [name for name, _ in self.token_patterns]
+        self.skip = [name in skip for name in self.token_names]
+
+        # 1. Thompson NFA for the whole specification
+        nfa = NFA()
+        for index, (_, pattern) in enumerate(self.token_patterns):
+            nfa.add_pattern(RegexParser(pattern).parse(), index)
+
+        # 2. Character class compression
+        self.ascii_class, self.unicode_class, members = compress_alphabet(nfa.charsets)
+        self.num_classes = max(max(self.ascii_class), max(self.unicode_class)) + 1
+
+        # 3. Subset construction
+        transitions, accept = subset_construction(nfa, self.num_classes, members)
+
+        # 4. Hopcroft minimization
+        block_of = hopcroft_minimize(transitions, accept, self.num_classes)
+
+        # 5. Flat table: start block first, dead block dropped.  Entries are
+        #    premultiplied row offsets (state * num_classes), so the driver
+        #    steps with table[state + cls] without a multiplication.
+        dead_block = block_of[1]
+        order = {block_of[0]: 0}
+        for block in block_of:
+            if block != dead_block and block not in order:
+                order[block] = len(order)
+        representative = {}
+        for state, block in enumerate(block_of):
+            representative.setdefault(block, state)
+
+        width = self.num_classes
+        self.num_states = len(order)
+        self.table = array('i', [-1]) * (self.num_states * width)
+        self.accept = array('i', [-1]) * (self.num_states * width)
+        for block, new_state in order.items():
+            row = transitions[representative[block]]
+            base = new_state * width
+            for cls, target in enumerate(row):
+                if block_of[target] != dead_block:
+                    self.table[base + cls] = order[block_of[target]] * width
+            self.accept[base] = accept[representative[block]]
+
+        # str.translate() table: character (or non-ASCII profile placeholder)
+        # to class id, so a whole input is classified in one C-level pass
+        self._translation = {code: self.ascii_class[code] for code in range(128)}
+        for profile in range(8):
+            self._translation[0x80 + profile] = self.unicode_class[profile]
+
+        self.stats = {
+            'nfa_states': len(nfa.edge),
+            'dfa_states': len(transitions),
+            'min_dfa_states': self.num_states,
+            'char_classes': self.num_classes,
+        }
+
+    def _class_codes(self, code):
+        """Map every character of `code` to its class id, as bytes"""
+        if not code.isascii():
+            code = _NON_ASCII.sub(
+                lambda m: chr(0x80 + unicode_profile(m.group())), code)
+        return code.translate(self._translation).encode('latin-1')
+
+    def scan(self, code):
+        """
+        Yield (token_index, start, end) using maximal munch.
+
+        Characters that cannot start any token are skipped, like the gaps
+        re.finditer() leaves between matches.
+        """
+        classes = self._class_codes(code)
+        table = self.table
+        accept = self.accept
+        n = len(code)
+        pos = 0
+
+        while pos < n:
+            state = 0
+            i = pos
+            last_token = -1
+            last_end = pos
+            while i < n:
+                state = table[state + classes[i]]
+                if state < 0:
+                    break
+                i += 1
+                token = accept[state]
+                if token >= 0:
+                    last_token = token
+                    last_end = i
+
+            if last_token < 0:
+                pos += 1
+            else:
+                yield last_token, pos, last_end
+                pos = last_end
+
+    def tokenize(self, code):
+        """
+        Tokenize input code.
+
+        Args:
+            code: Source code string to tokenize
+
+        Returns:
+            List of tuples (token_type, token_value)
+        """
+        names = self.token_names
+        skip = self.skip
+        return [(names[token], code[start:end])
+                for token, start, end in self.scan(code) if not skip[token]]
+
+    def tokenize_compact(self, code):
+        """
+        Tokenize input code into a TokenArray.
+
+        Kind ids are the indices into token_names.
+
+        Args:
+            code: Source code string to tokenize
+
+        Returns:
+            TokenArray whose source is code
+        """
+        tokens = TokenArray(code, self.token_names)
+        append = tokens.append
+        skip = self.skip
+        for token, start, end in self.scan(code):
+            if not skip[token]:
+                append(token, start, end)
+        return tokens
+
+    def print_table(self):
+        """Print the minimized transition table"""
+        print(f"{'state':>5} {'accept':<12}" +
+              ''.join(f"{c:>4}" for c in range(self.num_classes)))
+        width = self.num_classes
+        for state in range(self.num_states):
+            base = state * width
+            token = self.accept[base]
+            name = self.token_names[token] if token >= 0 else '-'
+            row = [t // width if t >= 0 else -1 for t in self.table[base:base + width]]
+            print(f"{state:>5} {name:<12}" + ''.join(f"{t:>4}" for t in row))
+
+
+def benchmark(repeat=50000):
+    """
+    Compare DFALexer with RegexLexer and the manual lexers on a large input.
+
+    Expect DFALexer to be on par with RegexLexer, not faster: the table
+    walk is interpreted per character (see the module docstring).
+
+    Args:
+        repeat: Number of copies of the sample line in the input
+    """
+    import time
+
+    from chapter3_lexer_manual import lexer, lexer_fast
+    from chapter3_lexer_regex import RegexLexer
+
+    # Only characters all lexers understand, so every lexer does real work
+    source = "alpha + 123 * (beta_2 - 45) / gamma " * repeat
+    regex_lexer = RegexLexer()
+    dfa_lexer = DFALexer()
+
+    cases = [
+        ("RegexLexer.tokenize", regex_lexer.tokenize),
+        ("DFALexer.tokenize", dfa_lexer.tokenize),
+        ("DFALexer.tokenize_compact", dfa_lexer.tokenize_compact),
+        ("lexer", lexer),
+        ("lexer_fast", lexer_fast),
+    ]
+    print(f"Input: {len(source)} characters")
+    for name, run in cases:
+        start = time.perf_counter()
+        count = len(run(source))
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<28}{count:>9} tokens{elapsed:>9.3f}s"
+              f"{len(source) / elapsed / 1e6:>8.2f} MB/s")
+
+
+# Example usage
+if __name__ == "__main__":
+    from chapter3_lexer_regex import RegexLexer
+
+    lexer = DFALexer()
+    print("=== Generated DFA ===")
+    for key, value in lexer.stats.items():
+        print(f"  {key}: {value}")
+    lexer.print_table()
+    print()
+
+    # Same token stream as RegexLexer
+    regex_lexer = RegexLexer()
+    for code in ["3 + 4 * 5", "(10 + 20) * 3", "3.14 + 2.71", "x + y_value",
+                 "12. * count_2/(7-x)"]:
+        tokens = lexer.tokenize(code)
+        print("Input:", code)
+        print("Tokens:", tokens)
+        print("Same as RegexLexer:", tokens == regex_lexer.tokenize(code))
+        print()
+
+    print("=== Benchmark ===")
+    benchmark()
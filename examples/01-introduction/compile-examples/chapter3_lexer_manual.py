@@ -8,8 +8,56 @@ Features:
 - Recognizes numbers, identifiers, keywords, and operators
 - Skips whitespace
 - Handles basic error reporting for unknown characters
+- Compact variant that records token offsets into a TokenArray
+- Fast path driven by frozen tables and a first-character dispatch table,
+  checked against lexer() by a differential fuzz test
 """
 
+import re
+
+from chapter3_token_array import TokenArray
+
+
+# Token tables shared by the fast paths (built once at import time)
+KEYWORDS = frozenset({'if', 'while', 'return', 'int', 'void'})
+TWO_CHAR_OPS = frozenset({'==', '!=', '<=', '>=', '&&', '||', '++', '--'})
+SINGLE_CHAR_OPS = frozenset('+-*/=(){}[];,.<>!&|')
+
+# Token kind ids, in the order used for TokenArray.kind_names
+KIND_NAMES = ('NUMBER', 'IDENTIFIER', 'KEYWORD', 'OPERATOR')
+NUMBER, IDENTIFIER, KEYWORD, OPERATOR = range(len(KIND_NAMES))
+
+# Character classes used by the first-character dispatch table
+SPACE, DIGIT, ALPHA, OPER = range(4)
+
+
+def _classify(c):
+    """Character class of `c`, with the same priority as lexer()"""
+    if c.isspace():
+        return SPACE
+    if c.isdigit():
+        return DIGIT
+    if c.isalpha() or c == '_':
+        return ALPHA
+    if c in SINGLE_CHAR_OPS:
+        return OPER
+    return None
+
+
+# 首字符分派表：ASCII 字符直接查表，其余字符回退到 _classify()
+FIRST_CHAR_CLASS = {chr(code): _classify(chr(code)) for code in range(128)}
+
+# Run scanners.  \s and \w match exactly str.isspace() and
+# str.isalnum() or '_'; \d only covers decimal digits, so digit runs fall
+# back to str.isdigit() for characters such as superscripts.
+_SPACE_RUN = re.compile(r'\s+').match
+_WORD_RUN = re.compile(r'\w+').match
+_DIGIT_RUN = re.compile(r'\d+').match
+_COMMON_SPACE = frozenset(' \t\r\n')
+
+# Prebuilt operator tokens, keyed by operator text
+_OPERATOR_TOKENS = {op: ('OPERATOR', op) for op in SINGLE_CHAR_OPS | TWO_CHAR_OPS}
+
 
 def lexer(input_string):
     """
@@ -76,6 +124,179 @@ def lexer(input_string):
     return tokens
 
 
+def lexer_compact(input_string):
+    """
+    Tokenize input string into a TokenArray instead of a list of tuples.
+
+    Recognizes exactly the same tokens as lexer(), but records each token
+    as (kind id, start offset, end offset) and never copies token text.
+    Uses the same table-driven scanning as lexer_fast().
+
+    Args:
+        input_string: Source code string to tokenize
+
+    Returns:
+        TokenArray whose source is input_string
+    """
+    tokens = TokenArray(input_string, KIND_NAMES)
+    append = tokens.append
+    classes = FIRST_CHAR_CLASS
+    n = len(input_string)
+    i = 0
+
+    while i < n:
+        c = input_string[i]
+        cls = classes.get(c)
+        if cls is None and c not in classes:
+            cls = _classify(c)
+
+        if cls == SPACE:
+            i += 1
+            if i < n and input_string[i] in _COMMON_SPACE:
+                i = _SPACE_RUN(input_string, i).end()
+
+        elif cls == OPER:
+            if input_string[i:i+2] in TWO_CHAR_OPS:
+                append(OPERATOR, i, i + 2)
+                i += 2
+            else:
+                append(OPERATOR, i, i + 1)
+                i += 1
+
+        elif cls == ALPHA:
+            j = _WORD_RUN(input_string, i).end()
+            append(KEYWORD if input_string[i:j] in KEYWORDS else IDENTIFIER, i, j)
+            i = j
+
+        elif cls == DIGIT:
+            j = _digit_run_end(input_string, i, n)
+            append(NUMBER, i, j)
+            i = j
+
+        else:
+            raise Exception(f"Unknown character: {c}")
+
+    return tokens
+
+
+def lexer_fast(input_string):
+    """
+    Fast path of lexer() with identical output.
+
+    Each run of digits, identifier characters or whitespace is located by
+    index and sliced once, the token tables are module-level constants, and
+    the first character of each token selects the branch via a table lookup.
+    Operator tokens are prebuilt tuples, so they cost a single dict lookup.
+
+    Args:
+        input_string: Source code string to tokenize
+
+    Returns:
+        List of tuples (token_type, token_value)
+    """
+    tokens = []
+    append = tokens.append
+    classes = FIRST_CHAR_CLASS
+    operator_tokens = _OPERATOR_TOKENS
+    word_run = _WORD_RUN
+    n = len(input_string)
+    i = 0
+
+    while i < n:
+        c = input_string[i]
+        cls = classes.get(c)
+        if cls is None and c not in classes:
+            cls = _classify(c)
+
+        # 空白：单个空白直接跳过，连续空白一次性跳过
+        if cls == SPACE:
+            i += 1
+            if i < n and input_string[i] in _COMMON_SPACE:
+                i = _SPACE_RUN(input_string, i).end()
+
+        # 运算符：先查 2 字符运算符，再用预先构造好的单字符 token
+        elif cls == OPER:
+            token = operator_tokens.get(input_string[i:i+2])
+            if token is None:
+                append(operator_tokens[c])
+                i += 1
+            else:
+                append(token)
+                i += 2
+
+        # 标识符和关键字：整段扫描后只切片一次
+        elif cls == ALPHA:
+            j = word_run(input_string, i).end()
+            word = input_string[i:j]
+            append(('KEYWORD' if word in KEYWORDS else 'IDENTIFIER', word))
+            i = j
+
+        # 数字
+        elif cls == DIGIT:
+            j = _digit_run_end(input_string, i, n)
+            append(('NUMBER', input_string[i:j]))
+            i = j
+
+        else:
+            raise Exception(f"Unknown character: {c}")
+
+    return tokens
+
+
+def _digit_run_end(input_string, i, n):
+    """End of the str.isdigit() run starting at index i"""
+    run = _DIGIT_RUN(input_string, i)
+    j = run.end() if run is not None else i + 1
+    while j < n and input_string[j].isdigit():
+        run = _DIGIT_RUN(input_string, j)
+        j = run.end() if run is not None else j + 1
+    return j
+
+
+def differential_test(iterations=2000, max_length=40, seed=0):
+    """
+    Check that lexer_fast() and lexer_compact() agree with lexer().
+
+    Random inputs mix the valid alphabet with Unicode letters, digits and
+    spaces and with characters lexer() rejects; for rejected inputs the
+    error messages must match as well.
+
+    Args:
+        iterations: Number of random inputs to try
+        max_length: Maximum length of each input
+        seed: Random seed, so failures are reproducible
+
+    Returns:
+        Number of inputs checked
+    """
+    import random
+
+    rng = random.Random(seed)
+    alphabet = ('0123456789' 'abcxyz_XYZ' 'ifwhilereturnintvoid'
+                '+-*/=(){}[];,.<>!&|' ' \t\n'
+                '\u00e9\u00df\u00b2\u0663\u3000@#$')
+
+    def run(lex, source):
+        try:
+            return lex(source)
+        except Exception as e:
+            return f"error: {e}"
+
+    for _ in range(iterations):
+        length = rng.randint(0, max_length)
+        source = ''.join(rng.choice(alphabet) for _ in range(length))
+        expected = run(lexer, source)
+        fast = run(lexer_fast, source)
+        compact = run(lambda s: lexer_compact(s).to_list(), source)
+        if fast != expected or compact != expected:
+            raise AssertionError(
+                f"Lexers disagree on {source!r}:\n"
+                f"  lexer():         {expected}\n"
+                f"  lexer_fast():    {fast}\n"
+                f"  lexer_compact(): {compact}")
+    return iterations
+
+
 # Example usage
 if __name__ == "__main__":
     # Test case 1: Simple expression
@@ -94,3 +315,16 @@ if __name__ == "__main__":
     code3 = "while (x > 0) { x = x - 1; }"
     print("Input:", code3)
     print("Tokens:", lexer(code3))
+    print()
+
+    # Test case 4: Fast path agrees with the reference implementation
+    checked = differential_test()
+    print(f"Differential test: lexer_fast() matches lexer() on {checked} fuzzed inputs")
+
+    import time
+    source = "int total = count_1 + 42 * (value - 7); " * 50000
+    for lex in (lexer, lexer_fast):
+        start = time.perf_counter()
+        lex(source)
+        print(f"{lex.__name__:<12}{time.perf_counter() - start:.3f}s "
+              f"for {len(source)} characters")
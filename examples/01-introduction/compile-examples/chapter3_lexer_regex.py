@@ -9,10 +9,23 @@ Features:
 - Uses Python's re module for pattern matching
 - Supports numbers, identifiers, operators, and whitespace
 - Automatically filters out whitespace tokens
+- Streaming mode that lexes a file object or chunk iterable in constant memory
+- Compact mode that records token offsets into a TokenArray
+- Bytes-level pattern for lexing straight from an mmap of the source file
 """
 
+import mmap
 import re
 
+from chapter3_token_array import BytesTokenArray, TokenArray
+
+# Any byte outside ASCII
+_NON_ASCII = re.compile(rb'[\x80-\xff]')
+
+# An ASCII byte that no token can continue through (not a digit, letter,
+# '_', '.', or whitespace); every match ends before it or starts at it
+_BOUNDARY = re.compile(rb'[^0-9A-Za-z_.\s\x1c-\x1f\x80-\xff]')
+
 
 class RegexLexer:
     def __init__(self):
@@ -34,6 +47,11 @@ class RegexLexer:
             f'(?P<{name}>{pattern})' for name, pattern in self.token_patterns)
         self.pattern = re.compile(self.regex)
 
+        # 字节版本的模式，用于纯 ASCII 的 mmap / bytes 输入。
+        # str 模式的 \s 还匹配 \x1c-\x1f，这里补上，使两者在 ASCII 上一致
+        self.bytes_pattern = re.compile(
+            self.regex.replace(r'\s', r'[\s\x1c-\x1f]').encode('ascii'))
+
     def tokenize(self, code):
         """
         Tokenize input code using regex patterns.
@@ -57,6 +75,171 @@ class RegexLexer:
 
         return tokens
 
+    def tokenize_compact(self, code):
+        """
+        Tokenize input code into a TokenArray.
+
+        Produces the same tokens as tokenize(), stored as kind ids and
+        source offsets; token text is sliced from `code` only on demand.
+
+        Args:
+            code: Source code string to tokenize
+
+        Returns:
+            TokenArray whose source is code
+        """
+        tokens = TokenArray(
+            code, [name for name, _ in self.token_patterns
+                   if name != 'WHITESPACE'])
+        kind_ids = tokens.kind_ids
+        append = tokens.append
+        for match in self.pattern.finditer(code):
+            kind = kind_ids.get(match.lastgroup)
+            if kind is not None:
+                append(kind, match.start(), match.end())
+        return tokens
+
+    def tokenize_buffer(self, buffer, encoding='utf-8'):
+        """
+        Tokenize a bytes-like object (bytes, bytearray, mmap) in place.
+
+        Gives the same tokens as tokenize() on the decoded text.  ASCII
+        stretches are scanned in place with the bytes variant of the
+        pattern.  The str pattern classifies non-ASCII characters (\\d
+        matches Unicode digits, \\s Unicode spaces) in ways a bytes pattern
+        cannot, so around each run of non-ASCII bytes a small window is
+        decoded and matched with the str pattern instead, and its character
+        offsets are converted to byte offsets.  The window starts at the
+        last token boundary before the run and ends at the next ASCII byte
+        that cannot continue a token (an operator, ';', ...), so only the
+        windows are ever decoded, never the whole buffer.  The encoding
+        must be ASCII-compatible (such as UTF-8).
+
+        Args:
+            buffer: Bytes-like source
+            encoding: Encoding used when token values are decoded
+
+        Returns:
+            BytesTokenArray whose offsets are byte offsets into buffer
+        """
+        tokens = BytesTokenArray(
+            buffer, [name for name, _ in self.token_patterns
+                     if name != 'WHITESPACE'], encoding)
+        kind_ids = tokens.kind_ids
+        append = tokens.append
+        pos, size = 0, len(buffer)
+        while pos < size:
+            # ASCII 段直接在缓冲区上匹配
+            non_ascii = _NON_ASCII.search(buffer, pos)
+            stop = size if non_ascii is None else non_ascii.start()
+            resume = stop
+            for match in self.bytes_pattern.finditer(buffer, pos, stop):
+                if match.end() == stop < size:
+                    # 可能延续到后面的非 ASCII 字符（Unicode 数字、空白），交给解码窗口
+                    resume = match.start()
+                    break
+                kind = kind_ids.get(match.lastgroup)
+                if kind is not None:
+                    append(kind, match.start(), match.end())
+            if stop == size:
+                break
+
+            # 只解码非 ASCII 字符附近的窗口
+            boundary = _BOUNDARY.search(buffer, stop)
+            pos = size if boundary is None else boundary.start()
+            text = str(buffer[resume:pos], encoding)
+            position, offset = 0, resume   # 已换算的字符位置及其字节偏移
+            for match in self.pattern.finditer(text):
+                kind = kind_ids.get(match.lastgroup)
+                if kind is not None:
+                    start, end = match.span()
+                    offset += len(text[position:start].encode(encoding))
+                    token_end = offset + len(text[start:end].encode(encoding))
+                    append(kind, offset, token_end)
+                    position, offset = end, token_end
+        return tokens
+
+    def tokenize_mapped(self, path, encoding='utf-8'):
+        """
+        Tokenize a file through a read-only memory mapping.
+
+        The file is never read into a Python string: the regex scans the
+        mapped pages directly and tokens keep offsets into the mapping.
+        The mapping stays open until the tokens are closed, with close()
+        or by using them as a context manager:
+
+            with lexer.tokenize_mapped(path) as tokens:
+                ...
+
+        Args:
+            path: Path of the source file
+            encoding: Encoding used when token values are decoded
+
+        Returns:
+            BytesTokenArray backed by the mmap
+        """
+        with open(path, 'rb') as f:
+            if f.seek(0, 2) == 0:
+                # mmap 不能映射空文件
+                return self.tokenize_buffer(b'', encoding)
+            mapping = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            return self.tokenize_buffer(mapping, encoding)
+        except Exception:
+            # 出错时没有 token 对象持有映射，这里负责关闭
+            mapping.close()
+            raise
+
+    def iter_tokens(self, source, chunk_size=65536):
+        """
+        Lazily tokenize a file object or an iterable of string chunks.
+
+        Only the unfinished tail of the current chunk is kept between reads,
+        so memory stays bounded by chunk_size plus the longest token no
+        matter how large the input is.  A match that touches the end of the
+        buffer may still grow (``12`` followed by ``34.5``, ``var`` followed
+        by ``_name``), so it is held back until more input arrives or the
+        input ends.  The resulting stream is identical to tokenize().
+
+        Args:
+            source: Object with a read(size) method, or an iterable of strings
+            chunk_size: Number of characters requested per read()
+
+        Yields:
+            Tuples (token_type, token_value)
+        """
+        if hasattr(source, 'read'):
+            chunks = iter(lambda: source.read(chunk_size), '')
+        else:
+            chunks = source
+
+        search = self.pattern.search
+        buffer = ''
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer += chunk
+            pos = 0
+            while True:
+                match = search(buffer, pos)
+                if match is None:
+                    # 剩余字符无法开始任何 token，直接丢弃（与 finditer 一致）
+                    pos = len(buffer)
+                    break
+                if match.end() == len(buffer):
+                    # 可能被 chunk 边界截断，留到下一轮继续匹配
+                    pos = match.start()
+                    break
+                pos = match.end()
+                if match.lastgroup != 'WHITESPACE':
+                    yield (match.lastgroup, match.group())
+            buffer = buffer[pos:]
+
+        # 输入结束：剩余部分不会再增长
+        for match in self.pattern.finditer(buffer):
+            if match.lastgroup != 'WHITESPACE':
+                yield (match.lastgroup, match.group())
+
 
 # Example usage
 if __name__ == "__main__":
@@ -84,3 +267,36 @@ if __name__ == "__main__":
     code4 = "x + y_value"
     print("Input:", code4)
     print("Tokens:", lexer.tokenize(code4))
+    print()
+
+    # Test case 5: Streaming from small chunks gives the same token stream
+    import io
+    code5 = "price_total = 1234.5678 * (quantity + 42) - discount_rate " * 3
+    streamed = list(lexer.iter_tokens(io.StringIO(code5), chunk_size=7))
+    print("Input:", code5)
+    print("Streamed tokens match tokenize():", streamed == lexer.tokenize(code5))
+    print()
+
+    # Test case 6: Lexing a memory-mapped file
+    import os
+    import tempfile
+    with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+        f.write(code2)
+    with lexer.tokenize_mapped(f.name) as mapped:
+        print("Mapped file:", code2)
+        print("Byte spans:", [mapped.span(i) for i in range(len(mapped))])
+        print("Decoded tokens match tokenize():", mapped.to_list() == lexer.tokenize(code2))
+    print("Mapping closed:", mapped.source.closed)
+    os.unlink(f.name)
+    print()
+
+    # Test case 7: Bytes and str paths agree on non-ASCII input
+    code7 = "caf\u00e9 = x\u0663 + \u0663\u0664\u3000y\x1cz \u00e9t\u00e9_1"
+    buffer7 = code7.encode('utf-8')
+    tokens7 = lexer.tokenize_buffer(buffer7)
+    print("Input:", ascii(code7))
+    print("Tokens:", tokens7.to_list())
+    print("Same as tokenize():", tokens7.to_list() == lexer.tokenize(code7))
+    print("Byte spans slice the tokens:",
+          all(buffer7[start:end].decode('utf-8') == value
+              for (_, value), start, end in zip(tokens7, tokens7.starts, tokens7.ends)))
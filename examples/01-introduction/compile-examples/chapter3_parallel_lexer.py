@@ -0,0 +1,163 @@
+"""
+Chapter 3: Lexical Analysis - Parallel Multi-File Lexing
+
+A build tokenizes thousands of translation units, and every file can be
+lexed independently of the others.  This module shards a list of paths
+across a process pool and returns one TokenArray per path, in input order.
+
+Passing Python token lists between processes would spend most of the time
+pickling tuples, so workers send back the compact serialized form of a
+TokenArray (three raw integer columns) together with the decoded source
+text it was lexed from.  Each file is read once, by the worker, so the
+offsets always refer to exactly the text that was lexed.
+
+Features:
+- lex_files() entry point with configurable worker count and chunk size
+- Results in the same order as the input paths
+- Falls back to in-process lexing for small batches, where starting the
+  pool would cost more than it saves
+- Works with the manual, regex and DFA lexers
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from chapter3_token_array import TokenArray
+
+
+# Lexer instances are created lazily, once per process
+_LEXERS = {}
+
+
+def _get_lexer(name):
+    """Return a function source -> TokenArray for the named lexer"""
+    lex = _LEXERS.get(name)
+    if lex is None:
+        if name == 'manual':
+            from chapter3_lexer_manual import lexer_compact
+            lex = lexer_compact
+        elif name == 'regex':
+            from chapter3_lexer_regex import RegexLexer
+            lex = RegexLexer().tokenize_compact
+        elif name == 'dfa':
+            from chapter3_lexer_dfa import DFALexer
+            lex = DFALexer().tokenize_compact
+        else:
+            raise ValueError(f"Unknown lexer: {name}")
+        _LEXERS[name] = lex
+    return lex
+
+
+def _read(path, encoding):
+    with open(path, encoding=encoding) as f:
+        return f.read()
+
+
+def _lex_file(path, lexer, encoding):
+    """Lex one file in-process and return its TokenArray"""
+    source = _read(path, encoding)
+    try:
+        return _get_lexer(lexer)(source)
+    except Exception as e:
+        raise Exception(f"{path}: {e}") from e
+
+
+def _lex_file_serialized(task):
+    """Worker entry point: lex one file; returns (source, kind names, columns)"""
+    path, lexer, encoding = task
+    tokens = _lex_file(path, lexer, encoding)
+    return (tokens.source,) + tuple(tokens.serialize())
+
+
+def lex_files(paths, lexer='manual', workers=None, chunk_size=8,
+              min_parallel=16, encoding='utf-8'):
+    """
+    Tokenize many files, in parallel when the batch is large enough.
+
+    Args:
+        paths: List of source file paths
+        lexer: 'manual', 'regex' or 'dfa'
+        workers: Number of worker processes (default: os.cpu_count())
+        chunk_size: Number of files handed to a worker at a time
+        min_parallel: Batches with fewer files are lexed in-process
+        encoding: Encoding of the source files
+
+    Returns:
+        List of TokenArray, one per path, in the order of `paths`
+    """
+    paths = list(paths)
+    _get_lexer(lexer)  # 尽早报告未知的 lexer 名称
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(paths) < min_parallel:
+        return [_lex_file(path, lexer, encoding) for path in paths]
+
+    tasks = [(path, lexer, encoding) for path in paths]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = executor.map(_lex_file_serialized, tasks, chunksize=chunk_size)
+        return [TokenArray.deserialize(source, kind_names, data)
+                for source, kind_names, data in results]
+
+
+def benchmark(num_files=100, lines_per_file=1000, worker_counts=(1, 2, 4)):
+    """
+    Lex a generated batch of files with different worker counts.
+
+    Args:
+        num_files: Number of files in the batch
+        lines_per_file: Source lines per file
+        worker_counts: Worker counts to compare
+    """
+    import tempfile
+    import time
+
+    line = "int total = count_1 + 42 * (value - 7);\n"
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i in range(num_files):
+            path = os.path.join(directory, f"unit{i}.c")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(line * lines_per_file)
+            paths.append(path)
+
+        print(f"{num_files} files x {lines_per_file} lines")
+        baseline = None
+        for workers in worker_counts:
+            start = time.perf_counter()
+            results = lex_files(paths, workers=workers)
+            elapsed = time.perf_counter() - start
+            baseline = baseline or elapsed
+            tokens = sum(len(r) for r in results)
+            print(f"  workers={workers:<3}{tokens:>10} tokens{elapsed:>9.3f}s"
+                  f"  speedup {baseline / elapsed:.2f}x")
+
+
+# Example usage
+if __name__ == "__main__":
+    import tempfile
+
+    from chapter3_lexer_manual import lexer
+
+    # Test case 1: Results come back in input order and match lexer()
+    sources = [f"int x{i} = {i} + y;" for i in range(40)]
+    with tempfile.TemporaryDirectory() as directory:
+        paths = []
+        for i, source in enumerate(sources):
+            path = os.path.join(directory, f"file{i}.c")
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(source)
+            paths.append(path)
+
+        results = lex_files(paths, workers=2, chunk_size=4, min_parallel=1)
+        print("First file:", results[0].to_list())
+        print("All files match lexer():",
+              all(r.to_list() == lexer(s) for r, s in zip(results, sources)))
+
+        # Test case 2: Small batch falls back to in-process lexing
+        results = lex_files(paths[:3], workers=4)
+        print("Small batch:", [len(r) for r in results], "tokens")
+    print()
+
+    print("=== Benchmark ===")
+    benchmark()
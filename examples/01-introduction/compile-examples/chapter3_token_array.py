@@ -0,0 +1,266 @@
+"""
+Chapter 3: Lexical Analysis - Compact Token Storage
+
+Both lexers in this chapter return a list of (token_type, token_value)
+tuples.  That is easy to read, but every token costs a tuple plus a string
+object, and the position of the token in the source is lost.
+
+This module stores tokens column-wise instead:
+
+- kinds:  array('i') of small integer kind ids (interned token type names)
+- starts: array of start offsets into the source
+- ends:   array of end offsets into the source
+
+Offsets of a str source are 32-bit ('i'); sources of 2**31 characters or
+more are rejected.  BytesTokenArray, used for memory-mapped files, which
+can be larger, stores 64-bit offsets ('q').
+
+Token values are never copied; they are sliced from the source only when
+someone asks for them.  A parser can still index the store like a list of
+tuples, and later stages get exact source offsets for error reporting.
+
+Features:
+- Three machine-integer columns instead of one Python object per token
+- Lazy value slicing from the original source
+- Tuple-compatible indexing so existing parsers keep working
+- Compact serialized form (raw column bytes) for passing tokens between
+  processes
+- BytesTokenArray for byte sources such as an mmap of the source file,
+  with values decoded only on demand
+- Benchmark against the tuple list on 10^6-token inputs
+"""
+
+from array import array
+
+
+class TokenArray:
+    """Array-backed token store with lazily sliced values"""
+
+    # 偏移量列的类型码；'i' 为 32 位
+    OFFSET_TYPECODE = 'i'
+
+    def __init__(self, source, kind_names=()):
+        """
+        Create an empty token store.
+
+        Args:
+            source: Source text the token offsets refer to
+            kind_names: Optional token type names to pre-intern, in id order
+        """
+        limit = 1 << (8 * array(self.OFFSET_TYPECODE).itemsize - 1)
+        if len(source) >= limit:
+            raise Exception(f"Source of {len(source)} characters is too large for "
+                            f"{type(self).__name__} offsets (limit {limit - 1})")
+        self.source = source
+        self.kind_names = []
+        self.kind_ids = {}
+        self.kinds = array('i')
+        self.starts = array(self.OFFSET_TYPECODE)
+        self.ends = array(self.OFFSET_TYPECODE)
+        for name in kind_names:
+            self.kind_id(name)
+
+    def kind_id(self, name):
+        """Return the integer id for a token type, interning it if needed"""
+        kind = self.kind_ids.get(name)
+        if kind is None:
+            kind = len(self.kind_names)
+            self.kind_ids[name] = kind
+            self.kind_names.append(name)
+        return kind
+
+    def append(self, kind, start, end):
+        """Append a token given its kind id and source span"""
+        self.kinds.append(kind)
+        self.starts.append(start)
+        self.ends.append(end)
+
+    def kind(self, index):
+        """Token type name of token `index`"""
+        return self.kind_names[self.kinds[index]]
+
+    def value(self, index):
+        """Token text of token `index`, sliced from the source on demand"""
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def span(self, index):
+        """Source span (start, end) of token `index`"""
+        return self.starts[index], self.ends[index]
+
+    def __len__(self):
+        return len(self.kinds)
+
+    def __getitem__(self, index):
+        """Materialize token `index` as a (token_type, token_value) tuple"""
+        return (self.kind_names[self.kinds[index]],
+                self.source[self.starts[index]:self.ends[index]])
+
+    def __iter__(self):
+        names = self.kind_names
+        source = self.source
+        for kind, start, end in zip(self.kinds, self.starts, self.ends):
+            yield (names[kind], source[start:end])
+
+    def to_list(self):
+        """Materialize all tokens as a list of tuples"""
+        return list(self)
+
+    def serialize(self):
+        """
+        Return a compact, picklable form of the tokens without the source.
+
+        Returns:
+            Tuple (kind_names, data) where data holds the raw bytes of the
+            kinds, starts and ends columns back to back
+        """
+        return (tuple(self.kind_names),
+                self.kinds.tobytes() + self.starts.tobytes() + self.ends.tobytes())
+
+    @classmethod
+    def deserialize(cls, source, kind_names, data):
+        """
+        Rebuild a TokenArray from serialize() output.
+
+        Args:
+            source: Source text the offsets refer to
+            kind_names: Token type names from serialize()
+            data: Column bytes from serialize()
+        """
+        tokens = cls(source, kind_names)
+        kinds, starts = tokens.kinds, tokens.starts
+        split = len(data) // (kinds.itemsize + 2 * starts.itemsize) * kinds.itemsize
+        middle = split + (len(data) - split) // 2
+        kinds.frombytes(data[:split])
+        starts.frombytes(data[split:middle])
+        tokens.ends.frombytes(data[middle:])
+        return tokens
+
+    def __repr__(self):
+        return f"TokenArray({len(self)} tokens, {len(self.kind_names)} kinds)"
+
+
+class BytesTokenArray(TokenArray):
+    """
+    TokenArray over a bytes-like source (bytes, bytearray, mmap).
+
+    Offsets are 64-bit byte offsets into the buffer, so mapped files larger
+    than 2 GiB work; values are sliced and decoded only when they are
+    requested.
+    """
+
+    OFFSET_TYPECODE = 'q'
+
+    def __init__(self, source, kind_names=(), encoding='utf-8'):
+        super().__init__(source, kind_names)
+        self.encoding = encoding
+
+    def close(self):
+        """
+        Release the source buffer if it can be closed (an mmap).
+
+        Kinds and spans stay available; values can no longer be read.
+        """
+        close = getattr(self.source, 'close', None)
+        if close is not None:
+            close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def raw_value(self, index):
+        """Undecoded bytes of token `index`"""
+        return self.source[self.starts[index]:self.ends[index]]
+
+    def value(self, index):
+        return self.raw_value(index).decode(self.encoding)
+
+    def __getitem__(self, index):
+        return (self.kind_names[self.kinds[index]], self.value(index))
+
+    def __iter__(self):
+        names = self.kind_names
+        source = self.source
+        encoding = self.encoding
+        for kind, start, end in zip(self.kinds, self.starts, self.ends):
+            yield (names[kind], source[start:end].decode(encoding))
+
+
+def benchmark(num_tokens=10**6):
+    """
+    Compare tuple lists against TokenArray for both lexers.
+
+    Memory is the size retained by the finished result (measured with
+    tracemalloc, source text excluded); time is wall-clock lexing time.
+
+    Args:
+        num_tokens: Approximate number of tokens in the generated input
+    """
+    import time
+    import tracemalloc
+
+    from chapter3_lexer_manual import lexer, lexer_compact
+    from chapter3_lexer_regex import RegexLexer
+
+    # 11 tokens per repetition, accepted by both lexers
+    unit = "alpha + 123 * (beta_2 - 45) / gamma "
+    source = unit * (num_tokens // 11)
+    regex_lexer = RegexLexer()
+
+    cases = [
+        ("RegexLexer.tokenize", lambda: regex_lexer.tokenize(source)),
+        ("RegexLexer.tokenize_compact",
+         lambda: regex_lexer.tokenize_compact(source)),
+        ("lexer", lambda: lexer(source)),
+        ("lexer_compact", lambda: lexer_compact(source)),
+    ]
+
+    print(f"Input: {len(source)} characters")
+    print(f"{'lexer':<30}{'tokens':>10}{'time (s)':>12}{'memory (MB)':>14}")
+    for name, run in cases:
+        start = time.perf_counter()
+        result = run()
+        elapsed = time.perf_counter() - start
+        count = len(result)
+        del result
+
+        tracemalloc.start()
+        result = run()
+        retained, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del result
+
+        print(f"{name:<30}{count:>10}{elapsed:>12.3f}"
+              f"{retained / 1e6:>14.1f}")
+
+
+# Example usage
+if __name__ == "__main__":
+    from chapter3_lexer_manual import lexer, lexer_compact
+    from chapter3_lexer_regex import RegexLexer
+
+    # Test case 1: Compact tokens from the regex lexer
+    code1 = "(10 + 20) * rate"
+    tokens1 = RegexLexer().tokenize_compact(code1)
+    print("Input:", code1)
+    print("Store:", tokens1)
+    for i in range(len(tokens1)):
+        print(f"  {tokens1.kind(i):<12}{tokens1.value(i)!r:<8}"
+              f"span={tokens1.span(i)}")
+    print("Same as tokenize():", tokens1.to_list() == RegexLexer().tokenize(code1))
+    print()
+
+    # Test case 2: Compact tokens from the manual lexer
+    code2 = "while (x >= 10) { x = x - 1; }"
+    tokens2 = lexer_compact(code2)
+    print("Input:", code2)
+    print("Kind ids:", tokens2.kinds.tolist())
+    print("Starts:  ", tokens2.starts.tolist())
+    print("Same as lexer():", tokens2.to_list() == lexer(code2))
+    print()
+
+    # Test case 3: Benchmark on 10^6 tokens
+    print("=== Benchmark: tuple list vs TokenArray ===")
+    benchmark()
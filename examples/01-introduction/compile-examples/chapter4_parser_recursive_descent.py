@@ -13,8 +13,20 @@ Features:
 - Parses arithmetic expressions with proper precedence
 - Builds AST nodes for binary operations, numbers, and identifiers
 - Handles parenthesized expressions
+- Iterative Pratt (precedence-climbing) parser driven by a binding-power
+  table, for inputs nested too deeply for recursion
+- FastParser front end with integer token kinds, an EOF sentinel and
+  set-based operator tests, plus a tokens-per-second microbenchmark
+- Pluggable node factory: build this chapter's classes, the slotted
+  classes of ast_nodes, or rows of an ast_nodes.ASTArena
+- Error-recovering parser: panic-mode recovery at ';' and ')' collects
+  every syntax error of a ';'-separated program in one pass
+- Statement parser for functions, declarations, assignments, if/while and
+  return, streaming each function out as soon as its body closes
 """
 
+from collections import deque
+
 
 # AST Node classes
 class BinOp:
@@ -49,10 +61,26 @@ class Identifier:
         return f"Identifier('{self.name}')"
 
 
+class NodeFactory:
+    """
+    Default node factory: builds the AST classes of this chapter.
+
+    The parsers create nodes only through factory.binop(left, op, right),
+    factory.number(value) and factory.identifier(name), so any object with
+    these three callables can be passed instead, e.g. ast_nodes.SlotsFactory
+    or an ast_nodes.ASTArena.
+    """
+
+    binop = BinOp
+    number = Number
+    identifier = Identifier
+
+
 class Parser:
-    def __init__(self, tokens):
+    def __init__(self, tokens, factory=NodeFactory):
         self.tokens = tokens
         self.pos = 0
+        self.factory = factory
 
     def current_token(self):
         if self.pos < len(self.tokens):
@@ -78,7 +106,7 @@ class Parser:
                 break
             op = self.consume('OPERATOR')  # '+' or '-'
             right = self.parse_term()
-            left = BinOp(left, op[1], right)
+            left = self.factory.binop(left, op[1], right)
 
         return left
 
@@ -92,7 +120,7 @@ class Parser:
                 break
             op = self.consume('OPERATOR')  # '*' or '/'
             right = self.parse_factor()
-            left = BinOp(left, op[1], right)
+            left = self.factory.binop(left, op[1], right)
 
         return left
 
@@ -104,11 +132,11 @@ class Parser:
 
         if token[0] == 'NUMBER':
             self.consume('NUMBER')
-            return Number(int(token[1]))
+            return self.factory.number(int(token[1]))
 
         elif token[0] == 'IDENTIFIER':
             self.consume('IDENTIFIER')
-            return Identifier(token[1])
+            return self.factory.identifier(token[1])
 
         elif token[0] == 'OPERATOR' and token[1] == '(':
             self.consume('OPERATOR', '(')
@@ -119,6 +147,722 @@ class Parser:
         raise Exception(f"Unexpected token: {token}")
 
 
+# Integer token kind codes used by FastParser; EOF is the sentinel kind
+# appended after the last token, so lookahead never needs a bounds check
+NUMBER, IDENTIFIER, OPERATOR, KEYWORD, EOF = range(5)
+KIND_CODES = {'NUMBER': NUMBER, 'IDENTIFIER': IDENTIFIER,
+              'OPERATOR': OPERATOR, 'KEYWORD': KEYWORD}
+OTHER = EOF + 1  # any token type not listed above
+
+ADDITIVE_OPS = frozenset({'+', '-'})
+MULTIPLICATIVE_OPS = frozenset({'*', '/'})
+
+
+class FastParser(Parser):
+    """
+    Parser with a precomputed token front end.
+
+    Token kinds are interned into small integers once, when the parser is
+    built, and stored next to the token values in two flat lists ending in
+    an EOF sentinel.  The grammar methods then compare integers and test
+    operators against frozensets instead of comparing strings, building
+    lists and bounds-checking on every lookahead.  The trees and error
+    messages are the same as Parser's.
+    """
+
+    def __init__(self, tokens, factory=NodeFactory):
+        super().__init__(tokens, factory)
+        codes = KIND_CODES
+        self.kinds = [codes.get(token[0], OTHER) for token in tokens]
+        self.kinds.append(EOF)
+        self.values = [token[1] for token in tokens]
+        self.values.append(None)
+
+    def parse_expression(self):
+        """E → T (('+' | '-') T)*"""
+        kinds = self.kinds
+        values = self.values
+        binop = self.factory.binop
+        left = self.parse_term()
+
+        while kinds[self.pos] == OPERATOR and values[self.pos] in ADDITIVE_OPS:
+            op = values[self.pos]
+            self.pos += 1
+            left = binop(left, op, self.parse_term())
+
+        return left
+
+    def parse_term(self):
+        """T → F (('*' | '/') F)*"""
+        kinds = self.kinds
+        values = self.values
+        binop = self.factory.binop
+        left = self.parse_factor()
+
+        while kinds[self.pos] == OPERATOR and values[self.pos] in MULTIPLICATIVE_OPS:
+            op = values[self.pos]
+            self.pos += 1
+            left = binop(left, op, self.parse_factor())
+
+        return left
+
+    def parse_factor(self):
+        """F → '(' E ')' | number | identifier"""
+        pos = self.pos
+        kind = self.kinds[pos]
+
+        if kind == NUMBER:
+            self.pos = pos + 1
+            return self.factory.number(int(self.values[pos]))
+
+        if kind == IDENTIFIER:
+            self.pos = pos + 1
+            return self.factory.identifier(self.values[pos])
+
+        if kind == OPERATOR and self.values[pos] == '(':
+            self.pos = pos + 1
+            expr = self.parse_expression()
+            if self.kinds[self.pos] != OPERATOR or self.values[self.pos] != ')':
+                raise Exception(f"Expected OPERATOR(')'), got {self.current_token()}")
+            self.pos += 1
+            return expr
+
+        if kind == EOF:
+            raise Exception("Unexpected end of input while parsing factor")
+        raise Exception(f"Unexpected token: {self.tokens[pos]}")
+
+
+def benchmark_parsers(repeat=3):
+    """
+    Report tokens parsed per second for Parser, FastParser and PrattParser.
+
+    Parser construction (including FastParser's kind interning) is part of
+    the measured time.  Like timeit, the garbage collector is paused while
+    timing, and the tree is freed outside the timed region.
+
+    Args:
+        repeat: Runs per case; the best run is reported
+    """
+    import gc
+    import time
+
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer_fast
+
+    fuzzer = CompilerFuzzer(compiler=None)
+    inputs = {
+        'flat sum of products': lexer_fast(
+            ' + '.join(f'a{i} * {i} / b' for i in range(50000))),
+        'nested groups': lexer_fast(
+            ' + '.join('(' * 20 + 'x' + ' * 2)' * 20 for _ in range(2000))),
+        'random expressions': lexer_fast(
+            ' + '.join(fuzzer.generate_random_expression(max_depth=6)
+                       for _ in range(1000))),
+    }
+
+    print(f"{'input':<24}{'parser':<14}{'tokens/s':>14}{'speedup':>10}")
+    for name, tokens in inputs.items():
+        baseline = None
+        for parser_class in (Parser, FastParser, PrattParser):
+            best = float('inf')
+            for _ in range(repeat):
+                gc.disable()
+                start = time.perf_counter()
+                ast = parser_class(tokens).parse_expression()
+                best = min(best, time.perf_counter() - start)
+                gc.enable()
+                del ast
+            baseline = baseline or best
+            print(f"{name:<24}{parser_class.__name__:<14}"
+                  f"{len(tokens) / best:>14,.0f}{baseline / best:>9.2f}x")
+
+
+# 二元运算符的绑定力 (left, right)：数值越大结合越紧；
+# 左结合运算符的右绑定力比左绑定力大 1，右结合运算符则小 1
+BINDING_POWER = {
+    '+': (10, 11),
+    '-': (10, 11),
+    '*': (20, 21),
+    '/': (20, 21),
+}
+
+
+class PrattParser:
+    """
+    Iterative Pratt / precedence-climbing expression parser.
+
+    Builds the same BinOp/Number/Identifier trees as Parser.parse_expression,
+    but keeps pending operators and operands on explicit stacks instead of
+    the Python call stack, so nesting depth is limited only by memory.
+    Operator precedence and associativity come from a binding-power table:
+    adding an operator means adding an entry, not writing a new method.
+    """
+
+    def __init__(self, tokens, binding_power=None, factory=NodeFactory):
+        self.tokens = tokens
+        self.pos = 0
+        self.factory = factory
+        self.binding_power = BINDING_POWER if binding_power is None else binding_power
+
+    def current_token(self):
+        if self.pos < len(self.tokens):
+            return self.tokens[self.pos]
+        return None
+
+    def parse_expression(self):
+        """Parse one expression using explicit operand and operator stacks"""
+        binding_power = self.binding_power
+        factory = self.factory
+        operands = []
+        operators = []  # 运算符，或 None 表示一个尚未闭合的 '('
+        depth = 0
+
+        def reduce():
+            right = operands.pop()
+            left = operands.pop()
+            operands.append(factory.binop(left, operators.pop(), right))
+
+        while True:
+            # 操作数位置：任意多个 '('，然后是数字或标识符
+            token = self.current_token()
+            while token is not None and token[0] == 'OPERATOR' and token[1] == '(':
+                operators.append(None)
+                depth += 1
+                self.pos += 1
+                token = self.current_token()
+
+            if token is None:
+                raise Exception("Unexpected end of input while parsing factor")
+            if token[0] == 'NUMBER':
+                operands.append(factory.number(int(token[1])))
+            elif token[0] == 'IDENTIFIER':
+                operands.append(factory.identifier(token[1]))
+            else:
+                raise Exception(f"Unexpected token: {token}")
+            self.pos += 1
+
+            # 运算符位置：二元运算符、闭合的 ')'，或者表达式结束
+            while True:
+                token = self.current_token()
+                if token is not None and token[0] == 'OPERATOR':
+                    powers = binding_power.get(token[1])
+                    if powers is not None:
+                        # 先归约栈顶绑定更紧的运算符
+                        while operators and operators[-1] is not None \
+                                and binding_power[operators[-1]][1] > powers[0]:
+                            reduce()
+                        operators.append(token[1])
+                        self.pos += 1
+                        break
+
+                    if token[1] == ')' and depth > 0:
+                        while operators[-1] is not None:
+                            reduce()
+                        operators.pop()
+                        depth -= 1
+                        self.pos += 1
+                        continue
+
+                if depth > 0:
+                    raise Exception(f"Expected OPERATOR(')'), got {token}")
+                while operators:
+                    reduce()
+                return operands[0]
+
+
+class ErrorNode:
+    """Placeholder for an expression that failed to parse"""
+
+    def __repr__(self):
+        return "ErrorNode()"
+
+
+class Diagnostic:
+    """A syntax error with the source offset it was found at"""
+
+    def __init__(self, offset, message):
+        self.offset = offset
+        self.message = message
+
+    def __repr__(self):
+        return f"Diagnostic({self.offset}, {self.message!r})"
+
+    def __str__(self):
+        return f"offset {self.offset}: {self.message}"
+
+
+class RecoveringParser(Parser):
+    """
+    Parser that reports every syntax error instead of stopping at the first.
+
+    On an unexpected token it records a Diagnostic, puts an ErrorNode where
+    the operand should have been, and skips tokens (panic mode) up to a
+    synchronizing token: the ';' that ends the statement, or the ')' that
+    closes the current group.  After an error, further diagnostics are
+    suppressed until the ';' ending the statement has been consumed: a
+    damaged statement gives one diagnostic, even when recovering from the
+    first error (say, a missing '(' taken out with an operand) trips a
+    second one later in the statement.  A second, independent mistake in
+    the same statement is not reported until the first is fixed.
+
+    Error-free input takes exactly the same path as Parser: expressions and
+    terms are inherited, and parse_factor only differs in its error
+    branches.  Error nodes are ErrorNode objects, so use a factory that
+    builds node objects (not an ASTArena).
+    """
+
+    def __init__(self, tokens, factory=NodeFactory):
+        super().__init__(tokens, factory)
+        self.diagnostics = []
+        self.depth = 0         # 当前括号嵌套深度
+        self.recovering = False    # 本语句已报告错误，直到 ';' 之前不再报告
+
+    def offset(self, pos):
+        """
+        Source offset of token `pos`.
+
+        Uses the token start offsets of a TokenArray; for a plain token list
+        the token index is reported instead.
+        """
+        starts = getattr(self.tokens, 'starts', None)
+        if starts is None:
+            return pos
+        if pos < len(starts):
+            return starts[pos]
+        return self.tokens.ends[-1] if len(starts) else 0
+
+    def error(self, message):
+        """Record a diagnostic at the current token and return an ErrorNode"""
+        if not self.recovering:
+            self.recovering = True
+            self.diagnostics.append(Diagnostic(self.offset(self.pos), message))
+        return ErrorNode()
+
+    def synchronize(self):
+        """Skip tokens up to the next ';', or the ')' closing the current group"""
+        nested = 0
+        token = self.current_token()
+        while token is not None:
+            if token[0] == 'OPERATOR':
+                if token[1] == ';':
+                    return
+                if token[1] == '(':
+                    nested += 1
+                elif token[1] == ')':
+                    if nested:
+                        nested -= 1
+                    elif self.depth:
+                        return
+            self.pos += 1
+            token = self.current_token()
+
+    def parse_factor(self):
+        """F → '(' E ')' | number | identifier, recovering from errors"""
+        token = self.current_token()
+        if token is None:
+            return self.error("Unexpected end of input while parsing factor")
+
+        if token[0] == 'NUMBER':
+            self.pos += 1
+            return self.factory.number(int(token[1]))
+
+        elif token[0] == 'IDENTIFIER':
+            self.pos += 1
+            return self.factory.identifier(token[1])
+
+        elif token[0] == 'OPERATOR' and token[1] == '(':
+            self.pos += 1
+            self.depth += 1
+            expr = self.parse_expression()
+            token = self.current_token()
+            if token is None or token[0] != 'OPERATOR' or token[1] != ')':
+                self.error(f"Expected OPERATOR(')'), got {token}")
+                self.synchronize()
+                token = self.current_token()
+            self.depth -= 1
+            if token is not None and token[1] == ')':
+                self.pos += 1
+            return expr
+
+        node = self.error(f"Unexpected token: {token}")
+        self.synchronize()
+        return node
+
+    def parse_program(self):
+        """
+        P → (E ';')*, the last ';' being optional.
+
+        Returns:
+            List of expression ASTs, one per statement; statements with
+            errors contain ErrorNodes.  Errors are in self.diagnostics.
+        """
+        statements = []
+        while self.current_token() is not None:
+            statements.append(self.parse_expression())
+            token = self.current_token()
+            if token is not None and token != ('OPERATOR', ';'):
+                self.error(f"Expected OPERATOR(';'), got {token}")
+                self.synchronize()
+            if self.current_token() is not None:
+                self.pos += 1  # ';'
+            self.recovering = False
+        return statements
+
+
+def benchmark_recovery(statements=20000, errors=200, repeat=3, seed=0):
+    """
+    Compare RecoveringParser with Parser on a ';'-separated program.
+
+    Error-free throughput is compared against a Parser loop that parses
+    each statement and consumes its ';'.  The same program is then parsed
+    with `errors` statements damaged, to show that one pass reports each
+    of them exactly once.  Like timeit, the garbage collector is paused while timing.
+
+    Args:
+        statements: Number of statements in the generated program
+        errors: Number of statements to damage
+        repeat: Runs per case; the best run is reported
+        seed: Random seed
+    """
+    import gc
+    import random
+    import time
+
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer_compact
+
+    random.seed(seed)
+    fuzzer = CompilerFuzzer(compiler=None)
+    lines = [fuzzer.generate_random_expression(max_depth=3) + ';'
+             for _ in range(statements)]
+    tokens = lexer_compact('\n'.join(lines))
+
+    def parse_with_parser():
+        parser = Parser(tokens)
+        result = []
+        while parser.current_token() is not None:
+            result.append(parser.parse_expression())
+            parser.consume('OPERATOR', ';')
+        return result
+
+    def parse_with_recovery():
+        return RecoveringParser(tokens).parse_program()
+
+    print(f"{'error-free input':<24}{'tokens/s':>14}{'relative':>10}")
+    baseline = None
+    for name, run in [("Parser", parse_with_parser),
+                      ("RecoveringParser", parse_with_recovery)]:
+        best = float('inf')
+        for _ in range(repeat):
+            gc.disable()
+            start = time.perf_counter()
+            result = run()
+            best = min(best, time.perf_counter() - start)
+            gc.enable()
+            del result
+        baseline = baseline or best
+        print(f"{name:<24}{len(tokens) / best:>14,.0f}{baseline / best:>9.2f}x")
+
+    # 破坏若干语句：删掉其中一个以空格分隔的片段
+    damaged = random.sample(range(statements), errors)
+    for index in damaged:
+        line = lines[index][:-1].split(' ')
+        del line[random.randrange(len(line))]
+        lines[index] = ' '.join(line) + ';'
+    source = '\n'.join(lines)
+    parser = RecoveringParser(lexer_compact(source))
+    gc.disable()
+    start = time.perf_counter()
+    parser.parse_program()
+    elapsed = time.perf_counter() - start
+    gc.enable()
+    reported = {source.count('\n', 0, d.offset) for d in parser.diagnostics}
+    print(f"Damaged {errors} statements: {len(parser.diagnostics)} diagnostics "
+          f"on {len(reported & set(damaged))} of them, "
+          f"{len(reported - set(damaged))} elsewhere, in one pass ({elapsed:.3f}s)")
+
+
+# Statement and declaration nodes, as used by chapters 5 and 6
+class VariableDeclaration:
+    """Variable declaration with an optional initializer: int x = e;"""
+
+    def __init__(self, var_type, name, value=None):
+        self.var_type = var_type
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return f"VariableDeclaration('{self.var_type}', '{self.name}', {self.value})"
+
+
+class Assignment:
+    """Assignment statement: x = e;"""
+
+    def __init__(self, name, value):
+        self.name = name
+        self.value = value
+
+    def __repr__(self):
+        return f"Assignment('{self.name}', {self.value})"
+
+
+class IfStatement:
+    """If statement; both branches are lists of statements"""
+
+    def __init__(self, condition, then_branch, else_branch=None):
+        self.condition = condition
+        self.then_branch = then_branch
+        self.else_branch = else_branch
+
+    def __repr__(self):
+        return f"IfStatement({self.condition}, {self.then_branch}, {self.else_branch})"
+
+
+class WhileStatement:
+    """While loop; the body is a list of statements"""
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+    def __repr__(self):
+        return f"WhileStatement({self.condition}, {self.body})"
+
+
+class ReturnStatement:
+    """Return statement with an optional expression"""
+
+    def __init__(self, expression=None):
+        self.expression = expression
+
+    def __repr__(self):
+        return f"ReturnStatement({self.expression})"
+
+
+class FunctionCall:
+    """Function call expression: f(a, b)"""
+
+    def __init__(self, name, args):
+        self.name = name
+        self.args = args
+
+    def __repr__(self):
+        return f"FunctionCall('{self.name}', {self.args})"
+
+
+class FunctionDeclaration:
+    """Function definition; params are {'name': ..., 'type': ...} dicts"""
+
+    def __init__(self, name, params, return_type, body):
+        self.name = name
+        self.params = params
+        self.return_type = return_type
+        self.body = body
+
+    def __repr__(self):
+        return (f"FunctionDeclaration('{self.name}', {self.params}, "
+                f"'{self.return_type}', {self.body})")
+
+
+# The manual lexer marks int and void as keywords, float and bool as identifiers
+TYPE_NAMES = frozenset({'int', 'float', 'bool', 'void'})
+COMPARISON_OPS = frozenset({'<', '>', '==', '!=', '<=', '>='})
+
+
+class StatementParser(Parser):
+    """
+    Parser for whole programs: functions, statements and expressions.
+
+    Grammar (on top of E, T and F above):
+        program   → function*
+        function  → type IDENT '(' (type IDENT (',' type IDENT)*)? ')' block
+        block     → '{' statement* '}'
+        statement → type IDENT ('=' C)? ';'
+                  | IDENT '=' C ';'
+                  | 'if' '(' C ')' body ('else' body)?
+                  | 'while' '(' C ')' body
+                  | 'return' C? ';'
+                  | C ';'
+        body      → block | statement
+        C         → E (('<' | '>' | '==' | '!=' | '<=' | '>=') E)?
+        F         → IDENT '(' (C (',' C)*)? ')' | ...
+
+    Tokens are pulled from any iterable of (token_type, token_value) pairs,
+    such as a list, a TokenArray or a generator that lexes a file line by
+    line, through a small lookahead buffer: only the tokens being looked at
+    are held in memory.  parse_functions() yields each function as soon as
+    its closing '}' has been read, so later passes can work on one function
+    while the next is still being read.
+    """
+
+    def __init__(self, tokens, factory=NodeFactory):
+        super().__init__(None, factory)
+        self.stream = iter(tokens)
+        self.lookahead = deque()
+
+    def peek(self, k=0):
+        """Token k positions ahead of the current one, or None at the end"""
+        lookahead = self.lookahead
+        while len(lookahead) <= k:
+            token = next(self.stream, None)
+            if token is None:
+                return None
+            lookahead.append(token)
+        return lookahead[k]
+
+    def current_token(self):
+        return self.peek(0)
+
+    def consume(self, expected_type, expected_value=None):
+        """消费一个 token"""
+        token = self.peek(0)
+        if token and token[0] == expected_type and (expected_value is None or token[1] == expected_value):
+            self.lookahead.popleft()
+            self.pos += 1
+            return token
+        exp = expected_type if expected_value is None else f"{expected_type}('{expected_value}')"
+        raise Exception(f"Expected {exp}, got {token}")
+
+    def at(self, value, k=0):
+        """Whether the token k ahead is the operator or word `value`"""
+        token = self.peek(k)
+        return token is not None and token[1] == value and token[0] != 'NUMBER'
+
+    def at_type(self, k=0):
+        """Whether the token k ahead is a type name"""
+        token = self.peek(k)
+        return token is not None and token[1] in TYPE_NAMES \
+            and token[0] in ('KEYWORD', 'IDENTIFIER')
+
+    def parse_type(self):
+        """Consume a type name and return it"""
+        if not self.at_type():
+            raise Exception(f"Expected type name, got {self.current_token()}")
+        return self.consume(self.current_token()[0])[1]
+
+    def parse_functions(self):
+        """Yield each FunctionDeclaration as soon as its body has been parsed"""
+        while self.current_token() is not None:
+            yield self.parse_function()
+
+    def parse_program(self):
+        """program → function*; returns the list of FunctionDeclarations"""
+        return list(self.parse_functions())
+
+    def parse_function(self):
+        """function → type IDENT '(' params? ')' block"""
+        return_type = self.parse_type()
+        name = self.consume('IDENTIFIER')[1]
+        self.consume('OPERATOR', '(')
+        params = []
+        if not self.at(')'):
+            while True:
+                param_type = self.parse_type()
+                params.append({'name': self.consume('IDENTIFIER')[1], 'type': param_type})
+                if not self.at(','):
+                    break
+                self.consume('OPERATOR', ',')
+        self.consume('OPERATOR', ')')
+        return FunctionDeclaration(name, params, return_type, self.parse_block())
+
+    def parse_block(self):
+        """block → '{' statement* '}'; returns a list of statements"""
+        self.consume('OPERATOR', '{')
+        statements = []
+        while not self.at('}'):
+            if self.current_token() is None:
+                raise Exception("Unexpected end of input while parsing block")
+            statements.append(self.parse_statement())
+        self.consume('OPERATOR', '}')
+        return statements
+
+    def parse_body(self):
+        """body → block | statement; always returns a list of statements"""
+        if self.at('{'):
+            return self.parse_block()
+        return [self.parse_statement()]
+
+    def parse_statement(self):
+        """Parse one statement (see the class docstring for the grammar)"""
+        token = self.current_token()
+        if token is None:
+            raise Exception("Unexpected end of input while parsing statement")
+
+        if self.at_type() and self.peek(1) is not None and self.peek(1)[0] == 'IDENTIFIER':
+            var_type = self.parse_type()
+            name = self.consume('IDENTIFIER')[1]
+            value = None
+            if self.at('='):
+                self.consume('OPERATOR', '=')
+                value = self.parse_condition()
+            self.consume('OPERATOR', ';')
+            return VariableDeclaration(var_type, name, value)
+
+        if token == ('KEYWORD', 'if'):
+            self.consume('KEYWORD', 'if')
+            condition = self.parse_parenthesized()
+            then_branch = self.parse_body()
+            else_branch = None
+            if self.at('else'):
+                self.consume(self.current_token()[0], 'else')
+                else_branch = self.parse_body()
+            return IfStatement(condition, then_branch, else_branch)
+
+        if token == ('KEYWORD', 'while'):
+            self.consume('KEYWORD', 'while')
+            condition = self.parse_parenthesized()
+            return WhileStatement(condition, self.parse_body())
+
+        if token == ('KEYWORD', 'return'):
+            self.consume('KEYWORD', 'return')
+            expression = None if self.at(';') else self.parse_condition()
+            self.consume('OPERATOR', ';')
+            return ReturnStatement(expression)
+
+        if token[0] == 'IDENTIFIER' and self.peek(1) == ('OPERATOR', '='):
+            name = self.consume('IDENTIFIER')[1]
+            self.consume('OPERATOR', '=')
+            value = self.parse_condition()
+            self.consume('OPERATOR', ';')
+            return Assignment(name, value)
+
+        expression = self.parse_condition()
+        self.consume('OPERATOR', ';')
+        return expression
+
+    def parse_parenthesized(self):
+        """'(' C ')'"""
+        self.consume('OPERATOR', '(')
+        condition = self.parse_condition()
+        self.consume('OPERATOR', ')')
+        return condition
+
+    def parse_condition(self):
+        """C → E (('<' | '>' | '==' | '!=' | '<=' | '>=') E)?"""
+        left = self.parse_expression()
+        token = self.current_token()
+        if token is not None and token[0] == 'OPERATOR' and token[1] in COMPARISON_OPS:
+            self.consume('OPERATOR')
+            left = self.factory.binop(left, token[1], self.parse_expression())
+        return left
+
+    def parse_factor(self):
+        """F → IDENT '(' args ')' | '(' E ')' | number | identifier"""
+        token = self.current_token()
+        if token is not None and token[0] == 'IDENTIFIER' and self.at('(', 1):
+            name = self.consume('IDENTIFIER')[1]
+            self.consume('OPERATOR', '(')
+            args = []
+            if not self.at(')'):
+                args.append(self.parse_condition())
+                while self.at(','):
+                    self.consume('OPERATOR', ',')
+                    args.append(self.parse_condition())
+            self.consume('OPERATOR', ')')
+            return FunctionCall(name, args)
+        return super().parse_factor()
+
+
 # Example usage
 if __name__ == "__main__":
     # Test case 1: Simple addition
@@ -160,3 +904,110 @@ if __name__ == "__main__":
     ast4 = parser4.parse_expression()
     print("Tokens:", tokens4)
     print("AST:", ast4)
+    print()
+
+    # Test case 5: Pratt parser builds the same trees
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer
+
+    fuzzer = CompilerFuzzer(compiler=None)
+    same = True
+    for _ in range(200):
+        tokens = lexer(fuzzer.generate_random_expression(max_depth=5))
+        same &= repr(Parser(tokens).parse_expression()) == \
+            repr(PrattParser(tokens).parse_expression())
+    print("PrattParser matches Parser on 200 random expressions:", same)
+
+    # Test case 6: 100k-deep nesting without RecursionError
+    depth = 100000
+    tokens6 = [('OPERATOR', '(')] * depth + [('IDENTIFIER', 'x')] + \
+        [('OPERATOR', '+'), ('NUMBER', '1'), ('OPERATOR', ')')] * depth
+    ast6 = PrattParser(tokens6).parse_expression()
+    nesting = 0
+    node = ast6
+    while isinstance(node, BinOp):
+        nesting += 1
+        node = node.left
+    print(f"Parsed {depth}-deep parentheses, tree depth: {nesting}")
+    print()
+
+    # Test case 7: FastParser front end
+    print("FastParser AST:", FastParser(tokens2).parse_expression())
+    print()
+
+    # Test case 8: Emitting slotted nodes or arena rows instead
+    from ast_nodes import ASTArena, SlotsFactory
+    print("Slotted AST:", Parser(tokens3, SlotsFactory).parse_expression())
+    arena = ASTArena()
+    root = Parser(tokens3, arena).parse_expression()
+    print(f"Arena AST: root row {root} of {len(arena)}:", arena.format(root))
+    print()
+
+    # Test case 9: All syntax errors of a program in one pass
+    from chapter3_lexer_manual import lexer_compact
+    source9 = "a + (b * ;\nc d;\n(x + 1;\n) + 2;\ny * (3 - z)"
+    parser9 = RecoveringParser(lexer_compact(source9))
+    statements9 = parser9.parse_program()
+    print("Source:", source9.replace('\n', ' '))
+    for statement in statements9:
+        print("  Statement:", statement)
+    for diagnostic in parser9.diagnostics:
+        print("  Error at", diagnostic)
+    print()
+
+    # Test case 10: Whole programs, one function at a time
+    import random
+    from chapter3_lexer_manual import lexer
+    from chapter5_semantic_analyzer import SemanticAnalyzer
+    from chapter6_intermediate_code_generator import IntermediateCodeGenerator
+
+    random.seed(0)
+    program = fuzzer.generate_random_program(num_vars=3, num_exprs=2) + """
+int square(int n) {
+    return n * n;
+}
+void count(int limit) {
+    int i = 0;
+    while (i < limit) {
+        i = i + square(2);
+        if (i == 7) i = 0; else { i = i - 1; }
+    }
+    return;
+}
+"""
+    events = []
+
+    def stream_tokens(text):
+        """Lex one line at a time, like reading a large file"""
+        for number, line in enumerate(text.splitlines(), 1):
+            events.append(f"lexed line {number}")
+            yield from lexer(line)
+
+    analyzer = SemanticAnalyzer()
+    code_generator = IntermediateCodeGenerator()
+    for function in StatementParser(stream_tokens(program)).parse_functions():
+        events.append(f"analyzed and generated {function.name}")
+        analyzer.visit(function)
+        code_generator.generate(function)
+    # 把连续的 "lexed line N" 合并成一个区间再打印
+    print("Pipeline order:")
+    lexed = []
+    for event in events + [None]:
+        if event is not None and event.startswith("lexed"):
+            lexed.append(event.split()[-1])
+            continue
+        if lexed:
+            print(f"  lexed lines {lexed[0]}-{lexed[-1]}")
+            lexed = []
+        if event is not None:
+            print(f"  {event}")
+    print("Semantic errors:", analyzer.errors or "none")
+    code_generator.print_code()
+    print()
+
+    print("=== Benchmark: tokens parsed per second ===")
+    benchmark_parsers()
+    print()
+
+    print("=== Benchmark: error recovery ===")
+    benchmark_recovery()
@@ -11,10 +11,137 @@ Features:
 - Hierarchical symbol tables for nested scopes
 - Type inference and checking
 - Error collection and reporting
+- Type checking of expressions stored in an ast_nodes.ASTArena
+- Flat symbol table with O(1) lookup, interchangeable with SymbolTable
+- Visitor methods dispatched through a per-class cache (visitor_dispatch)
+- Exception-free symbol resolution: undefined names are collected as errors
+- Two-phase analysis: global signatures first, then function bodies
+  checked in parallel worker processes
+- Optional type cache keyed by node identity, checked against the bindings
+  each type depends on, and readable by later passes through type_of()
+- Interned type objects (including function types) and a precomputed
+  binary-operator result table, so type checks are identity tests and
+  dict lookups
+- Incremental re-analysis: after a function-level edit only the edited
+  function and, if its signature changed, the functions referencing it
+  are re-checked; the result is a diff of diagnostics
 """
 from __future__ import annotations
 
-from typing import Any, Dict, List, Optional
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Set, Tuple
+
+from ast_nodes import ASTArena, KIND_BINOP, KIND_NUMBER
+from visitor_dispatch import NodeVisitor
+
+
+class Type:
+    """
+    Interned type: Type('int') always returns the same object.
+
+    Types are compared by identity and used directly as dict keys, and
+    str(t) is the type name used in error messages.
+    """
+
+    __slots__ = ('name',)
+    _interned: Dict[str, 'Type'] = {}
+
+    def __new__(cls, name: str) -> 'Type':
+        interned = Type._interned.get(name)
+        if interned is None:
+            interned = object.__new__(cls)
+            interned.name = name
+            Type._interned[name] = interned
+        return interned
+
+    def __reduce__(self) -> Any:
+        # 反序列化时重新驻留，工作进程里的类型仍是单例
+        return (Type, (self.name,))
+
+    def __str__(self) -> str:
+        return self.name
+
+    __repr__ = __str__
+
+
+class FunctionType(Type):
+    """Interned function type: parameter types and return type"""
+
+    __slots__ = ('params', 'return_type')
+    _interned_functions: Dict[Tuple[Tuple[Type, ...], Type], 'FunctionType'] = {}
+
+    def __new__(cls, params: Tuple[Type, ...], return_type: Type) -> 'FunctionType':
+        key = (tuple(params), return_type)
+        interned = FunctionType._interned_functions.get(key)
+        if interned is None:
+            interned = object.__new__(cls)
+            interned.name = 'function'
+            interned.params, interned.return_type = key
+            FunctionType._interned_functions[key] = interned
+        return interned
+
+    def __reduce__(self) -> Any:
+        return (FunctionType, (self.params, self.return_type))
+
+    def __repr__(self) -> str:
+        params = ", ".join(map(str, self.params))
+        return f"function({params}) -> {self.return_type}"
+
+
+INT = Type('int')
+FLOAT = Type('float')
+BOOL = Type('bool')
+VOID = Type('void')
+ERROR = Type('error')
+
+ARITHMETIC_OPS = ('+', '-', '*', '/')
+COMPARISON_OPS = ('<', '>', '==', '!=', '<=', '>=')
+
+# 数值类型格：int < float，合并取上界
+NUMERIC_JOIN: Dict[Tuple[Type, Type], Type] = {
+    (INT, INT): INT, (INT, FLOAT): FLOAT, (FLOAT, INT): FLOAT, (FLOAT, FLOAT): FLOAT,
+}
+
+
+def binop_result(op: str, left: Type, right: Type) -> Tuple[Type, Optional[str]]:
+    """
+    Result type of `left op right` and the error to report, if any.
+
+    An operand that is already ERROR yields ERROR without a new error, so
+    a mistake is reported once.  Unknown operators yield ERROR silently.
+    """
+    if left is ERROR or right is ERROR:
+        return ERROR, None
+    if op in ARITHMETIC_OPS:
+        result = NUMERIC_JOIN.get((left, right))
+        if result is None:
+            return ERROR, f"Type mismatch in {op}: {left} and {right}"
+        return result, None
+    if op in COMPARISON_OPS:
+        if left is right:
+            return BOOL, None
+        return ERROR, f"Type mismatch in comparison: {left} and {right}"
+    return ERROR, None
+
+
+# (op, left type, right type) -> (result type, error message or None),
+# precomputed for the basic types; other combinations are added on first use
+BINOP_TABLE: Dict[Tuple[str, Type, Type], Tuple[Type, Optional[str]]] = {
+    (op, left, right): binop_result(op, left, right)
+    for op in ARITHMETIC_OPS + COMPARISON_OPS
+    for left in (INT, FLOAT, BOOL, VOID, ERROR)
+    for right in (INT, FLOAT, BOOL, VOID, ERROR)
+}
+
+
+def is_assignable(target: Type, value: Type) -> bool:
+    """True if a value of type `value` may be stored in a `target` variable"""
+    # int 可以隐式转换为 float
+    return value is target or value is ERROR or NUMERIC_JOIN.get((value, target)) is target
 
 
 class SymbolTable:
@@ -24,7 +151,7 @@ class SymbolTable:
         self.symbols: Dict[str, Dict[str, Any]] = {}
         self.parent: Optional['SymbolTable'] = parent
 
-    def define(self, name: str, symbol_type: str, value: Any = None) -> None:
+    def define(self, name: str, symbol_type: Any, value: Any = None) -> None:
         """Define a symbol in current scope"""
         if name in self.symbols:
             raise Exception(
@@ -40,6 +167,30 @@ class SymbolTable:
         else:
             raise Exception(f"Undefined symbol: {name}")
 
+    def lookup_optional(self, name: str) -> Optional[Dict[str, Any]]:
+        """Look up a symbol in current and parent scopes; None if undefined"""
+        table: Optional[SymbolTable] = self
+        while table is not None:
+            symbol = table.symbols.get(name)
+            if symbol is not None:
+                return symbol
+            table = table.parent
+        return None
+
+    def define_or_get(self, name: str, symbol_type: Any, value: Any = None):
+        """
+        Return the visible symbol `name`, defining it here if there is none.
+
+        Returns:
+            Tuple (symbol, defined): defined is True if the symbol was
+            created by this call
+        """
+        symbol = self.lookup_optional(name)
+        if symbol is not None:
+            return symbol, False
+        symbol = self.symbols[name] = {'type': symbol_type, 'value': value}
+        return symbol, True
+
     def enter_scope(self) -> 'SymbolTable':
         """Enter a new scope"""
         return SymbolTable(parent=self)
@@ -49,6 +200,193 @@ class SymbolTable:
         return self.parent if self.parent is not None else self
 
 
+class FlatSymbolTable:
+    """
+    Symbol table with one flat map for all scopes.
+
+    Each name maps to a stack of (scope depth, symbol) bindings, innermost
+    last, so lookup is a single dict access whatever the nesting depth.
+    A scope log records the names defined in each open scope; exit_scope
+    pops exactly those bindings, costing O(k) for k names in the scope.
+
+    Scopes are entered and exited in place: enter_scope() and exit_scope()
+    return the table itself, so code written for SymbolTable
+    (`table = table.enter_scope()`) works unchanged.
+    """
+
+    def __init__(self) -> None:
+        self.bindings: Dict[str, List[Any]] = {}
+        self.scopes: List[List[str]] = [[]]  # 每个作用域中定义的名字
+
+    def define(self, name: str, symbol_type: Any, value: Any = None) -> None:
+        """Define a symbol in current scope"""
+        depth = len(self.scopes)
+        stack = self.bindings.get(name)
+        if stack is None:
+            self.bindings[name] = [(depth, {'type': symbol_type, 'value': value})]
+        elif stack[-1][0] == depth:
+            raise Exception(
+                f"Symbol '{name}' already defined in current scope")
+        else:
+            stack.append((depth, {'type': symbol_type, 'value': value}))
+        self.scopes[-1].append(name)
+
+    def lookup(self, name: str) -> Dict[str, Any]:
+        """Look up a symbol in current and enclosing scopes"""
+        stack = self.bindings.get(name)
+        if stack is None:
+            raise Exception(f"Undefined symbol: {name}")
+        return stack[-1][1]
+
+    def lookup_optional(self, name: str) -> Optional[Dict[str, Any]]:
+        """Look up a symbol in current and enclosing scopes; None if undefined"""
+        stack = self.bindings.get(name)
+        return stack[-1][1] if stack is not None else None
+
+    def define_or_get(self, name: str, symbol_type: Any, value: Any = None):
+        """
+        Return the visible symbol `name`, defining it here if there is none.
+
+        Returns:
+            Tuple (symbol, defined): defined is True if the symbol was
+            created by this call
+        """
+        stack = self.bindings.get(name)
+        if stack is not None:
+            return stack[-1][1], False
+        symbol = {'type': symbol_type, 'value': value}
+        self.bindings[name] = [(len(self.scopes), symbol)]
+        self.scopes[-1].append(name)
+        return symbol, True
+
+    def undefine(self, name: str) -> None:
+        """Remove the binding of `name` from the current scope"""
+        stack = self.bindings.get(name)
+        if stack is None or stack[-1][0] != len(self.scopes):
+            raise Exception(f"Symbol '{name}' not defined in current scope")
+        stack.pop()
+        if not stack:
+            del self.bindings[name]
+        self.scopes[-1].remove(name)
+
+    def enter_scope(self) -> 'FlatSymbolTable':
+        """Enter a new scope"""
+        self.scopes.append([])
+        return self
+
+    def exit_scope(self) -> 'FlatSymbolTable':
+        """Exit current scope, dropping its bindings. At the root, do nothing."""
+        if len(self.scopes) > 1:
+            bindings = self.bindings
+            for name in self.scopes.pop():
+                stack = bindings[name]
+                stack.pop()
+                if not stack:
+                    del bindings[name]
+        return self
+
+
+def benchmark_symbol_tables(depths=(1, 10, 100, 400), symbols_per_scope=50,
+                            lookups=20000, repeat=3) -> None:
+    """
+    Compare SymbolTable and FlatSymbolTable on deeply nested scopes.
+
+    For each depth, every scope defines `symbols_per_scope` names; then
+    `lookups` lookups hit names spread over all levels, from the innermost
+    scope out to the global one, and finally all scopes are exited.
+
+    Args:
+        depths: Nesting depths to measure
+        symbols_per_scope: Names defined in each scope
+        lookups: Lookups performed at the innermost scope
+        repeat: Runs per case; the best run is reported
+    """
+    import time
+
+    print(f"{'depth':>6}{'symbols':>9}{'table':>17}{'define (ms)':>13}"
+          f"{'lookup (ms)':>13}{'exit (ms)':>11}{'lookup speedup':>16}")
+    for depth in depths:
+        names = [[f"s{level}_{i}" for i in range(symbols_per_scope)]
+                 for level in range(depth)]
+        # 查找的名字均匀分布在各层作用域中
+        probes = [names[i % depth][i % symbols_per_scope] for i in range(lookups)]
+        baseline = None
+        for table_class in (SymbolTable, FlatSymbolTable):
+            best = [float('inf')] * 3
+            for _ in range(repeat):
+                table: Any = table_class()
+                start = time.perf_counter()
+                for level, scope_names in enumerate(names):
+                    if level:
+                        table = table.enter_scope()
+                    for name in scope_names:
+                        table.define(name, 'int')
+                defined = time.perf_counter()
+                lookup = table.lookup
+                for name in probes:
+                    lookup(name)
+                looked_up = time.perf_counter()
+                for _ in range(depth - 1):
+                    table = table.exit_scope()
+                exited = time.perf_counter()
+                best = [min(b, t) for b, t in zip(
+                    best, (defined - start, looked_up - defined, exited - looked_up))]
+            baseline = baseline or best[1]
+            print(f"{depth:>6}{depth * symbols_per_scope:>9}{table_class.__name__:>17}"
+                  f"{best[0] * 1e3:>13.2f}{best[1] * 1e3:>13.2f}{best[2] * 1e3:>11.2f}"
+                  f"{baseline / best[1]:>15.1f}x")
+
+
+def benchmark_first_assignments(num_assignments=50000, depth=10, repeat=3) -> None:
+    """
+    Time assignments to new variables with and without exception handling.
+
+    The previous visit_Assignment looked the name up with lookup() and
+    defined it in the `except` branch, so every first assignment raised
+    (and, for SymbolTable, unwound the whole parent chain).  Both versions
+    run inside `depth` nested scopes.
+
+    Args:
+        num_assignments: Assignments, each to a new variable
+        depth: Scope nesting depth
+        repeat: Runs per case; the best run is reported
+    """
+    import time
+
+    class RaisingAnalyzer(SemanticAnalyzer):
+        def visit_Assignment(self, node: Assignment) -> Type:
+            value_type = self.visit(node.value)
+            try:
+                symbol = self.symbol_table.lookup(node.name)
+                if symbol['type'] != value_type:
+                    self.errors.append(
+                        f"Type mismatch in assignment: cannot assign {value_type} to {symbol['type']}"
+                    )
+            except Exception:
+                self.symbol_table.define(node.name, value_type)
+            return value_type
+
+    statements = [Assignment(f"v{i}", Number(i)) for i in range(num_assignments)]
+    print(f"{'table':<18}{'analyzer':<20}{'assignments/s':>15}{'speedup':>10}")
+    for table_class in (SymbolTable, FlatSymbolTable):
+        baseline = None
+        for analyzer_class in (RaisingAnalyzer, SemanticAnalyzer):
+            best = float('inf')
+            for _ in range(repeat):
+                table: Any = table_class()
+                for _ in range(depth):
+                    table = table.enter_scope()
+                analyzer = analyzer_class(table)
+                start = time.perf_counter()
+                for statement in statements:
+                    analyzer.visit(statement)
+                best = min(best, time.perf_counter() - start)
+            baseline = baseline or best
+            label = "lookup + except" if analyzer_class is RaisingAnalyzer else "define_or_get"
+            print(f"{table_class.__name__:<18}{label:<20}"
+                  f"{num_assignments / best:>15,.0f}{baseline / best:>9.2f}x")
+
+
 # AST Node classes (simplified)
 class BinOp:
     def __init__(self, left: Any, op: str, right: Any) -> None:
@@ -105,166 +443,787 @@ class ReturnStatement:
         self.expression = expression
 
 
-class SemanticAnalyzer:
-    """Semantic analyzer with type checking"""
+class VariableDeclaration:
+    def __init__(self, var_type: str, name: str, value: Any = None) -> None:
+        self.var_type = var_type
+        self.name = name
+        self.value = value
 
-    def __init__(self) -> None:
-        self.symbol_table: SymbolTable = SymbolTable()
-        self.errors: List[str] = []
-        self.current_function_return_type: Optional[str] = None
 
-    def visit(self, node: Any) -> Any:
-        """Visitor pattern dispatcher"""
-        method_name = f'visit_{type(node).__name__}'
-        visitor = getattr(self, method_name, self.generic_visit)
-        return visitor(node)
+class SemanticAnalyzer(NodeVisitor):
+    """Semantic analyzer with type checking"""
 
-    def visit_Number(self, node: Number) -> str:
+    method_prefix = 'visit_'
+    fallback_method = 'generic_visit'
+
+    def __init__(self, symbol_table: Any = None, cache_types: bool = False,
+                 track_references: bool = False) -> None:
+        """
+        Args:
+            symbol_table: Symbol table to use (SymbolTable or FlatSymbolTable);
+                a new SymbolTable by default
+            cache_types: Record the type of every expression node and reuse
+                it when the same node object is visited again, as happens
+                with hash-consed ASTs
+            track_references: Collect every name read or called, defined
+                or not, in `references`
+        """
+        self.symbol_table: Any = symbol_table if symbol_table is not None else SymbolTable()
+        self.errors: List[str] = []
+        self.current_function_return_type: Optional[Type] = None
+        self.cache_types = cache_types
+        # id(node) -> (node, type, {name: symbol the type depends on})
+        self.type_cache: Dict[int, Tuple[Any, Type, Dict[str, Any]]] = {}
+        self.references: Optional[Set[str]] = set() if track_references else None
+
+    # Visitor pattern dispatcher: visit_<node class>, cached per node class
+    visit = NodeVisitor.dispatch
+
+    def type_of(self, node: Any) -> Optional[Type]:
+        """
+        Type recorded for an expression node by the last analysis.
+
+        Later passes (code generation, optimization) read types here instead
+        of re-running the analyzer.  None if the node was never analyzed
+        with cache_types, or its analysis reported an error.  A node shared
+        between scopes holds the type from the last scope it was seen in.
+        """
+        entry = self.type_cache.get(id(node))
+        if entry is None or entry[0] is not node:
+            return None
+        return entry[1]
+
+    def cached_type(self, node: Any) -> Optional[Type]:
+        """
+        Cached type of `node` if it is still valid in the current scope.
+
+        A type is valid while every name it was computed from still resolves
+        to the same binding: a shadowing definition or a different function
+        scope yields a new symbol object and so invalidates the entry.
+        """
+        entry = self.type_cache.get(id(node))
+        if entry is None or entry[0] is not node:
+            return None
+        lookup = self.symbol_table.lookup_optional
+        for name, symbol in entry[2].items():
+            if lookup(name) is not symbol:
+                return None
+        if self.references is not None:
+            # 命中缓存时子树不会再访问，依赖的名字在这里记录
+            self.references.update(entry[2])
+        return entry[1]
+
+    def cache_type(self, node: Any, node_type: Type, children: Any,
+                   depends: Optional[Dict[str, Any]] = None) -> None:
+        """
+        Record the type of `node`.
+
+        Args:
+            node: Expression node
+            node_type: Its type
+            children: Child expressions; the entry depends on their bindings
+            depends: Further {name: symbol} bindings the type depends on
+        """
+        depends = dict(depends) if depends else {}
+        for child in children:
+            entry = self.type_cache.get(id(child))
+            if entry is None:
+                return  # 子表达式没有记录（有错误），不缓存
+            depends.update(entry[2])
+        # 保存节点本身，防止其 id 被新对象复用
+        self.type_cache[id(node)] = (node, node_type, depends)
+
+    def visit_Number(self, node: Number) -> Type:
         """Number literal"""
         # Access node.value to avoid 'node not accessed' and infer type
         value = node.value
-        if isinstance(value, float):
-            return 'float'
-        return 'int'
+        node_type = FLOAT if isinstance(value, float) else INT
+        if self.cache_types:
+            self.type_cache[id(node)] = (node, node_type, {})
+        return node_type
 
-    def visit_Identifier(self, node: Identifier) -> str:
+    def visit_Identifier(self, node: Identifier) -> Type:
         """Variable reference"""
-        symbol = self.symbol_table.lookup(node.name)
+        if self.references is not None:
+            self.references.add(node.name)
+        if not self.cache_types:
+            return self.resolve_type(node.name)
+        symbol = self.symbol_table.lookup_optional(node.name)
+        if symbol is None:
+            self.errors.append(f"Undefined symbol: {node.name}")
+            return ERROR
+        self.type_cache[id(node)] = (node, symbol['type'], {node.name: symbol})
         return symbol['type']
 
-    def visit_BinOp(self, node: BinOp) -> str:
+    def resolve_type(self, name: str) -> Type:
+        """Type of a variable, recording an error if it is undefined"""
+        symbol = self.symbol_table.lookup_optional(name)
+        if symbol is None:
+            self.errors.append(f"Undefined symbol: {name}")
+            return ERROR
+        return symbol['type']
+
+    def visit_BinOp(self, node: BinOp) -> Type:
         """Binary operation"""
+        if not self.cache_types:
+            left_type = self.visit(node.left)
+            right_type = self.visit(node.right)
+            return self.check_binop(node.op, left_type, right_type)
+
+        cached = self.cached_type(node)
+        if cached is not None:
+            return cached
+        errors = len(self.errors)
         left_type = self.visit(node.left)
         right_type = self.visit(node.right)
-
-        # Type checking for binary operations
-        if node.op in ['+', '-', '*', '/']:
-            if left_type == 'int' and right_type == 'int':
-                return 'int'
-            elif left_type in ['int', 'float'] and right_type in ['int', 'float']:
-                return 'float'
-            else:
-                self.errors.append(
-                    f"Type mismatch in {node.op}: {left_type} and {right_type}"
-                )
-                return 'error'
-
-        elif node.op in ['<', '>', '==', '!=', '<=', '>=']:
-            if left_type == right_type:
-                return 'bool'
-            else:
-                self.errors.append(
-                    f"Type mismatch in comparison: {left_type} and {right_type}"
-                )
-                return 'error'
-
-        return 'error'
-
-    def visit_Assignment(self, node: Assignment) -> str:
+        result = self.check_binop(node.op, left_type, right_type)
+        # 只缓存没有报错的结果，重复访问时错误照常报告
+        if len(self.errors) == errors:
+            self.cache_type(node, result, (node.left, node.right))
+        return result
+
+    def check_binop(self, op: str, left_type: Type, right_type: Type) -> Type:
+        """Result type of a binary operation, recording any type error"""
+        entry = BINOP_TABLE.get((op, left_type, right_type))
+        if entry is None:
+            # 函数类型等组合不在预计算表里，首次遇到时补上
+            entry = BINOP_TABLE[op, left_type, right_type] = binop_result(op, left_type, right_type)
+        result, error = entry
+        if error is not None:
+            self.errors.append(error)
+        return result
+
+    def visit_Assignment(self, node: Assignment) -> Type:
         """Assignment statement"""
         value_type = self.visit(node.value)
 
-        try:
-            symbol = self.symbol_table.lookup(node.name)
-            if symbol['type'] != value_type:
-                self.errors.append(
-                    f"Type mismatch in assignment: cannot assign {value_type} to {symbol['type']}"
-                )
-        except Exception:
-            # Variable not defined, define it
-            self.symbol_table.define(node.name, value_type)
+        # Variable not defined yet: define it with the value's type
+        symbol, defined = self.symbol_table.define_or_get(node.name, value_type)
+        if not defined and symbol['type'] is not value_type and value_type is not ERROR:
+            self.errors.append(
+                f"Type mismatch in assignment: cannot assign {value_type} to {symbol['type']}"
+            )
 
         return value_type
 
-    def visit_FunctionCall(self, node: FunctionCall) -> str:
-        """Function call"""
-        func_symbol = self.symbol_table.lookup(node.name)
+    def visit_VariableDeclaration(self, node: VariableDeclaration) -> Type:
+        """Variable declaration, e.g. int x = 5;"""
+        var_type = Type(node.var_type)
+        if node.value is not None:
+            value_type = self.visit(node.value)
+            if not is_assignable(var_type, value_type):
+                self.errors.append(
+                    f"Type mismatch in declaration: cannot assign {value_type} to {var_type}"
+                )
+        self.symbol_table.define(node.name, var_type)
+        return var_type
 
-        if func_symbol['type'] != 'function':
+    def visit_FunctionCall(self, node: FunctionCall) -> Type:
+        """Function call"""
+        if self.cache_types:
+            cached = self.cached_type(node)
+            if cached is not None:
+                return cached
+            errors = len(self.errors)
+            result = self.check_call(node)
+            if len(self.errors) == errors:
+                self.cache_type(node, result, node.args,
+                                {node.name: self.symbol_table.lookup_optional(node.name)})
+            return result
+        return self.check_call(node)
+
+    def check_call(self, node: FunctionCall) -> Type:
+        """Result type of a function call, recording any errors"""
+        if self.references is not None:
+            self.references.add(node.name)
+        func_symbol = self.symbol_table.lookup_optional(node.name)
+        if func_symbol is None:
+            self.errors.append(f"Undefined symbol: {node.name}")
+            for arg in node.args:
+                self.visit(arg)
+            return ERROR
+
+        func_type = func_symbol['type']
+        if not isinstance(func_type, FunctionType):
             self.errors.append(f"{node.name} is not a function")
-            return 'error'
-
-        # Function metadata is stored under 'value'
-        func_info = func_symbol.get('value', {}) or {}
-        expected_params = func_info.get('params', [])
+            return ERROR
 
         # Check argument count
-        if len(node.args) != len(expected_params):
+        params = func_type.params
+        if len(node.args) != len(params):
             self.errors.append(
-                f"Function {node.name} expects {len(expected_params)} arguments, got {len(node.args)}"
+                f"Function {node.name} expects {len(params)} arguments, got {len(node.args)}"
             )
 
         # Check argument types
         for i, arg in enumerate(node.args):
             arg_type = self.visit(arg)
-            if i < len(expected_params):
-                expected_type = expected_params[i]['type']
-                if arg_type != expected_type:
+            if i < len(params):
+                expected_type = params[i]
+                if arg_type is not expected_type and arg_type is not ERROR:
                     self.errors.append(
                         f"Argument {i+1} type mismatch: expected {expected_type}, got {arg_type}"
                     )
 
-        return func_info.get('return_type', 'void')
+        return func_type.return_type
 
     def visit_FunctionDeclaration(self, node: FunctionDeclaration) -> None:
         """Function declaration"""
         # Define function in symbol table
-        self.symbol_table.define(
-            node.name,
-            'function',
-            {
-                'params': node.params,
-                'return_type': node.return_type
-            }
-        )
+        self.symbol_table.define(node.name, function_signature(node))
+        self.check_function_body(node)
 
+    def check_function_body(self, node: FunctionDeclaration) -> None:
+        """Type-check a function's parameters and body in a new scope"""
         # Enter function scope
         self.symbol_table = self.symbol_table.enter_scope()
-        self.current_function_return_type = node.return_type
-
-        # Define parameters
-        for param in node.params:
-            self.symbol_table.define(param['name'], param['type'])
-
-        # Analyze function body
-        for stmt in node.body:
-            self.visit(stmt)
-
-        # Exit function scope
-        self.symbol_table = self.symbol_table.exit_scope()
-
-    def visit_ReturnStatement(self, node: ReturnStatement) -> str:
+        self.current_function_return_type = Type(node.return_type)
+        try:
+            # Define parameters
+            for param in node.params:
+                self.symbol_table.define(param['name'], Type(param['type']))
+
+            # Analyze function body
+            for stmt in node.body:
+                self.visit(stmt)
+        finally:
+            # Exit function scope
+            self.symbol_table = self.symbol_table.exit_scope()
+
+    def visit_ReturnStatement(self, node: ReturnStatement) -> Type:
         """Return statement"""
         if node.expression is not None:
             return self.visit(node.expression)
-        return 'void'
+        return VOID
 
     def visit_IfStatement(self, node: IfStatement) -> None:
         """If statement"""
         condition_type = self.visit(node.condition)
-        if condition_type != 'bool':
+        if condition_type is not BOOL and condition_type is not ERROR:
             self.errors.append(
                 f"If condition must be bool, got {condition_type}"
             )
 
-        self.visit(node.then_branch)
+        self.visit_body(node.then_branch)
         if node.else_branch:
-            self.visit(node.else_branch)
+            self.visit_body(node.else_branch)
 
     def visit_WhileStatement(self, node: WhileStatement) -> None:
         """While statement"""
         condition_type = self.visit(node.condition)
-        if condition_type != 'bool':
+        if condition_type is not BOOL and condition_type is not ERROR:
             self.errors.append(
                 f"While condition must be bool, got {condition_type}"
             )
 
-        self.visit(node.body)
+        self.visit_body(node.body)
+
+    def visit_body(self, body: Any) -> None:
+        """Branch or loop body: a list of statements (as parsed) or one node"""
+        if isinstance(body, list):
+            for stmt in body:
+                self.visit(stmt)
+        else:
+            self.visit(body)
 
     def generic_visit(self, node: Any) -> None:
         """Default visit method"""
         raise Exception(f"No visit method for {type(node).__name__}")
 
+    def visit_arena(self, arena: ASTArena, root: int) -> Type:
+        """
+        Type-check the expression rooted at row `root` of an ASTArena.
+
+        Rows are visited in post-order with an explicit stack, so the types
+        and error messages match visiting the equivalent node tree.
+        """
+        types: Dict[int, Type] = {}
+        for index in arena.postorder(root):
+            kind = arena.kind[index]
+            if kind == KIND_BINOP:
+                types[index] = self.check_binop(arena.operator(index),
+                                                types[arena.left[index]],
+                                                types[arena.right[index]])
+            elif kind == KIND_NUMBER:
+                types[index] = FLOAT if isinstance(arena.value(index), float) else INT
+            else:
+                types[index] = self.resolve_type(arena.value(index))
+        return types[root]
+
+
+def benchmark_type_checks(num_checks=200000, repeat=3, seed=0) -> None:
+    """
+    Binary-operator checks per second: string rules against the type table.
+
+    The string version is the analyzer's earlier check_binop, comparing type
+    names with == and list membership; the table version is the current
+    check_binop.  Both see the same random (op, left, right) triples.
+
+    Args:
+        num_checks: Operator checks per run
+        repeat: Runs per case; the best run is reported
+        seed: Random seed for the operand types
+    """
+    import random
+    import time
+
+    def check_strings(errors: List[str], op: str, left_type: str, right_type: str) -> str:
+        if left_type == 'error' or right_type == 'error':
+            return 'error'
+        if op in ['+', '-', '*', '/']:
+            if left_type == 'int' and right_type == 'int':
+                return 'int'
+            elif left_type in ['int', 'float'] and right_type in ['int', 'float']:
+                return 'float'
+            errors.append(f"Type mismatch in {op}: {left_type} and {right_type}")
+            return 'error'
+        elif op in ['<', '>', '==', '!=', '<=', '>=']:
+            if left_type == right_type:
+                return 'bool'
+            errors.append(f"Type mismatch in comparison: {left_type} and {right_type}")
+            return 'error'
+        return 'error'
+
+    rng = random.Random(seed)
+    # 以数值运算为主，偶尔出现类型错误
+    names = ['int'] * 6 + ['float'] * 3 + ['bool']
+    ops = ARITHMETIC_OPS * 3 + COMPARISON_OPS
+    triples = [(rng.choice(ops), rng.choice(names), rng.choice(names)) for _ in range(num_checks)]
+    typed = [(op, Type(left), Type(right)) for op, left, right in triples]
+
+    def run_strings() -> List[str]:
+        errors: List[str] = []
+        for op, left, right in triples:
+            check_strings(errors, op, left, right)
+        return errors
+
+    def run_table() -> List[str]:
+        analyzer = SemanticAnalyzer()
+        check = analyzer.check_binop
+        for op, left, right in typed:
+            check(op, left, right)
+        return analyzer.errors
+
+    baseline = None
+    reference = None
+    print(f"{'types':<10}{'checks/s':>14}{'speedup':>10}")
+    for label, run in (("strings", run_strings), ("interned", run_table)):
+        best = float('inf')
+        for _ in range(repeat):
+            start = time.perf_counter()
+            errors = run()
+            best = min(best, time.perf_counter() - start)
+        baseline = baseline or best
+        reference = errors if reference is None else reference
+        print(f"{label:<10}{num_checks / best:>14,.0f}{baseline / best:>9.2f}x"
+              f"  same errors: {errors == reference}")
+
+
+def benchmark_type_cache(num_exprs=2000, chain_depth=18, repeat=3, seed=0) -> None:
+    """
+    Analyze hash-consed programs with and without the type cache.
+
+    Two workloads, both parsed or built with one HashConsFactory so that
+    equal subexpressions are one node object:
+    - a fuzzer program whose assignments repeat `varI op varJ` products
+    - a chain e1 = x + x, e2 = e1 * e1, ... whose tree size doubles per
+      level while the DAG grows by one node
+    Visits count every dispatched node; times are the best of `repeat`.
+
+    Args:
+        num_exprs: Assignments in the fuzzer program
+        chain_depth: Levels of the doubling chain
+        repeat: Timing repetitions
+        seed: Random seed for the fuzzer
+    """
+    import gc
+    import random
+    import time
+
+    from ast_nodes import HashConsFactory
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+
+    class CountingAnalyzer(SemanticAnalyzer):
+        visits = 0
+
+        def visit(self, node: Any) -> Any:
+            self.visits += 1
+            return SemanticAnalyzer.visit(self, node)
+
+    random.seed(seed)
+    fuzzer = CompilerFuzzer(compiler=None)
+    source = fuzzer.generate_random_program(num_vars=5, num_exprs=num_exprs)
+    fuzzed = StatementParser(lexer_fast(source), HashConsFactory()).parse_program()
+
+    factory = HashConsFactory()
+    expr = factory.identifier('x')
+    body: List[Any] = []
+    for level in range(chain_depth):
+        expr = factory.binop(expr, '+*'[level % 2], expr)
+        body.append(Assignment(f"e{level}", expr))
+    chain = [FunctionDeclaration('chain', [{'name': 'x', 'type': 'int'}], 'int', body)]
+
+    print(f"{'workload':<16}{'cache':<7}{'visits':>10}{'time':>10}{'speedup':>9}")
+    for name, functions in (("fuzzer program", fuzzed), ("doubling chain", chain)):
+        baseline = None
+        reference = None
+        for cache_types in (False, True):
+            best = float('inf')
+            for _ in range(repeat):
+                analyzer = CountingAnalyzer(FlatSymbolTable(), cache_types=cache_types)
+                gc.disable()
+                try:
+                    start = time.perf_counter()
+                    for function in functions:
+                        analyzer.visit(function)
+                    best = min(best, time.perf_counter() - start)
+                finally:
+                    gc.enable()
+            baseline = baseline or best
+            reference = analyzer.errors if reference is None else reference
+            print(f"{name:<16}{'on' if cache_types else 'off':<7}{analyzer.visits:>10,}"
+                  f"{best:>9.4f}s{baseline / best:>8.2f}x"
+                  f"  same errors: {analyzer.errors == reference}")
+
+
+def function_signature(node: FunctionDeclaration) -> FunctionType:
+    """Type of a declared function, from its parameter and return types"""
+    params = tuple(Type(param['type']) for param in node.params)
+    return FunctionType(params, Type(node.return_type))
+
+
+def collect_signatures(functions: List[FunctionDeclaration]) -> Tuple[Mapping[str, FunctionType], List[str]]:
+    """
+    Phase one: collect the signatures of all top-level functions.
+
+    Returns:
+        Tuple (signatures, errors): a read-only mapping from function name
+        to signature (the first definition wins), and the errors for
+        functions defined more than once
+    """
+    signatures: Dict[str, FunctionType] = {}
+    errors: List[str] = []
+    for function in functions:
+        if function.name in signatures:
+            errors.append(f"Symbol '{function.name}' already defined in current scope")
+        else:
+            signatures[function.name] = function_signature(function)
+    return MappingProxyType(signatures), errors
+
+
+def _global_scope(signatures: Dict[str, FunctionType]) -> FlatSymbolTable:
+    """Global scope holding every function signature"""
+    scope = FlatSymbolTable()
+    for name, signature in signatures.items():
+        scope.define(name, signature)
+    return scope
+
+
+def _check_body(scope: FlatSymbolTable, function: FunctionDeclaration) -> List[str]:
+    """
+    Phase two: type-check one function body against the global scope.
+
+    An exception raised by the check, such as a duplicate parameter, is
+    returned as the function's last error instead of propagating, so it
+    cannot discard the results of the other functions.
+    """
+    # 函数体在自己的作用域里检查，退出后全局作用域恢复原状，可以复用
+    analyzer = SemanticAnalyzer(scope)
+    try:
+        analyzer.check_function_body(function)
+    except Exception as error:
+        analyzer.errors.append(str(error))
+    return analyzer.errors
+
+
+# Per-process state of pool workers, set once by _init_worker
+_GLOBALS: Optional[FlatSymbolTable] = None
+_FUNCTIONS: List[FunctionDeclaration] = []
+
+
+def _init_worker(signatures: Dict[str, FunctionType], functions: List[FunctionDeclaration]) -> None:
+    """Build the worker's global scope and keep the function ASTs"""
+    global _GLOBALS, _FUNCTIONS
+    _GLOBALS = _global_scope(signatures)
+    _FUNCTIONS = functions
+
+
+def _check_function(index: int) -> List[str]:
+    """Check function `index` in a pool worker"""
+    return _check_body(_GLOBALS, _FUNCTIONS[index])
+
+
+def analyze_functions(functions: List[FunctionDeclaration], workers: Optional[int] = None,
+                      chunk_size: int = 4, min_parallel: int = 8) -> List[str]:
+    """
+    Two-phase semantic analysis of a program's top-level functions.
+
+    Phase one collects every signature into an immutable global table, so
+    a body may call any function, including ones defined after it.  Phase
+    two checks the bodies independently, in a process pool when the
+    program is large enough.  Workers receive the ASTs once, when they
+    start; with the fork start method they inherit them without pickling,
+    and tasks are just function indices.
+
+    Args:
+        functions: FunctionDeclaration nodes, in program order
+        workers: Number of worker processes (default: os.cpu_count())
+        chunk_size: Number of functions handed to a worker at a time
+        min_parallel: Programs with fewer functions are checked in-process
+
+    Returns:
+        List of error messages: signature errors first, then the errors of
+        each function in program order, whatever the worker count.  The
+        function is reentrant: the in-process path keeps no module state.
+    """
+    functions = list(functions)
+    signatures, errors = collect_signatures(functions)
+    if workers is None:
+        workers = os.cpu_count() or 1
+
+    if workers <= 1 or len(functions) < min_parallel:
+        # 进程内检查只用局部状态，可重入，也不会在返回后留住 AST
+        scope = _global_scope(signatures)
+        for function in functions:
+            errors.extend(_check_body(scope, function))
+        return errors
+
+    context = None
+    if 'fork' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=_init_worker,
+                             initargs=(dict(signatures), functions)) as executor:
+        # map() returns results in input order, so the merge is deterministic
+        for function_errors in executor.map(_check_function, range(len(functions)),
+                                            chunksize=chunk_size):
+            errors.extend(function_errors)
+    return errors
+
+
+class IncrementalAnalyzer:
+    """
+    Whole-program analysis that re-checks only what an edit can affect.
+
+    Functions are identified by name; defining a name again replaces the
+    function.  The global scope holds every function's signature.  Each
+    body is checked once with reference tracking, giving the names it
+    uses.  Those names feed a reverse index: name -> functions referencing
+    it.  An edit re-checks the edited function, plus its dependents only
+    if its signature changed (or it was added or removed).  The cost
+    therefore follows the size of the change, not of the program.
+    """
+
+    def __init__(self, functions: Iterable[FunctionDeclaration] = ()) -> None:
+        self.functions: Dict[str, FunctionDeclaration] = {}   # 按程序顺序
+        self.positions: Dict[str, int] = {}    # name -> order of first definition
+        self.globals = FlatSymbolTable()
+        self.diagnostics: Dict[str, List[str]] = {}
+        self.references: Dict[str, Set[str]] = {}    # function -> names it uses
+        self.dependents: Dict[str, Set[str]] = {}    # name -> functions using it
+        self.checked = 0    # function bodies checked so far
+        self.update(functions)
+
+    def errors(self) -> List[str]:
+        """All diagnostics, grouped by function in program order"""
+        return [error for name in self.functions for error in self.diagnostics[name]]
+
+    def update(self, functions: Iterable[FunctionDeclaration]):
+        """
+        Add functions, or replace functions with the same name.
+
+        Returns:
+            Tuple (added, removed) of (function name, message) pairs
+        """
+        dirty: Set[str] = set()
+        for function in functions:
+            name = function.name
+            old = self.functions.get(name)
+            self.functions[name] = function
+            self.positions.setdefault(name, len(self.positions))
+            dirty.add(name)
+            signature = function_signature(function)
+            if old is not None:
+                # 签名是驻留对象，比较身份即可
+                if self.globals.lookup(name)['type'] is signature:
+                    continue
+                self.globals.undefine(name)
+            self.globals.define(name, signature)
+            dirty |= self.dependents.get(name, set())
+        return self.recheck(dirty)
+
+    def remove(self, name: str):
+        """
+        Remove function `name`; the functions referencing it are re-checked.
+
+        Returns:
+            Tuple (added, removed) of (function name, message) pairs
+        """
+        del self.functions[name]
+        del self.positions[name]
+        self.globals.undefine(name)
+        removed = [(name, error) for error in self.diagnostics.pop(name)]
+        self.index(name, set())
+        added, also_removed = self.recheck(set(self.dependents.get(name, ())))
+        return added, removed + also_removed
+
+    def recheck(self, names: Set[str]):
+        """Check the bodies of `names` again and diff their diagnostics"""
+        added: List[Tuple[str, str]] = []
+        removed: List[Tuple[str, str]] = []
+        for name in sorted(names, key=self.positions.__getitem__):
+            analyzer = SemanticAnalyzer(self.globals, track_references=True)
+            try:
+                analyzer.check_function_body(self.functions[name])
+            except Exception as error:
+                # 与 _check_body 一致：异常作为该函数的最后一条错误
+                analyzer.errors.append(str(error))
+            self.checked += 1
+            self.index(name, analyzer.references)
+            old = Counter(self.diagnostics.get(name, ()))
+            new = Counter(analyzer.errors)
+            added += [(name, error) for error in (new - old).elements()]
+            removed += [(name, error) for error in (old - new).elements()]
+            self.diagnostics[name] = analyzer.errors
+        return added, removed
+
+    def index(self, name: str, references: Set[str]) -> None:
+        """Replace the references of function `name` in the reverse index"""
+        old = self.references.get(name, set())
+        for used in old - references:
+            users = self.dependents[used]
+            users.discard(name)
+            if not users:
+                del self.dependents[used]
+        for used in references - old:
+            self.dependents.setdefault(used, set()).add(name)
+        if references:
+            self.references[name] = references
+        else:
+            self.references.pop(name, None)
+
+
+def benchmark_incremental_analysis(sizes=(100, 1000), statements_per_function=20,
+                                   edits=20, seed=0) -> None:
+    """
+    Latency of a one-function edit: full re-analysis against incremental.
+
+    Each function of the generated program calls the previous one, so it
+    has exactly one dependent.  Two kinds of edit are applied to random
+    functions: a body edit that keeps the signature (one body re-checked),
+    and a signature edit (the function and its caller re-checked).  After
+    the edits, two functions whose checks raise (a redeclared local and a
+    duplicate parameter) are added, and the incremental diagnostics are
+    compared with a full run.
+
+    Args:
+        sizes: Program sizes (number of functions) to compare
+        statements_per_function: Statements per function body
+        edits: Edits of each kind; the mean latency is reported
+        seed: Random seed for the fuzzer
+    """
+    import random
+    import time
+
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+
+    def make_function(f: int, param_type: str) -> str:
+        lines = [f"int f{f}({param_type} var0, int var1, int var2, int var3, int var4) {{"]
+        for i in range(statements_per_function):
+            lines.append(f"int r{i} = {fuzzer.generate_random_expression(max_depth=3)};")
+        call = f"f{f - 1}(r0, r1, r2, r3, r4)" if f else "0"
+        lines.append(f"return {call};\n}}")
+        return "\n".join(lines)
+
+    def parse(source: str) -> List[FunctionDeclaration]:
+        return StatementParser(lexer_fast(source)).parse_program()
+
+    random.seed(seed)
+    fuzzer = CompilerFuzzer(compiler=None)
+    print(f"{'functions':>9}  {'edit':<10}{'full (ms)':>11}{'incremental (ms)':>18}"
+          f"{'bodies':>8}{'speedup':>9}")
+    for size in sizes:
+        functions = parse("\n".join(make_function(f, 'int') for f in range(size)))
+        program = {function.name: function for function in functions}
+        incremental = IncrementalAnalyzer(functions)
+        for kind, param_type in (("body", 'int'), ("signature", 'float')):
+            full_time = incremental_time = 0.0
+            checked = incremental.checked
+            for _ in range(edits):
+                f = random.randrange(size)
+                edited = parse(make_function(f, param_type))[0]
+                program[edited.name] = edited
+
+                start = time.perf_counter()
+                analyze_functions(list(program.values()), workers=1)
+                full_time += time.perf_counter() - start
+
+                start = time.perf_counter()
+                incremental.update([edited])
+                incremental_time += time.perf_counter() - start
+            bodies = (incremental.checked - checked) / edits
+            print(f"{size:>9}  {kind:<10}{full_time / edits * 1000:>11.2f}"
+                  f"{incremental_time / edits * 1000:>18.3f}{bodies:>8.1f}"
+                  f"{full_time / incremental_time:>8.0f}x")
+        # Bodies that raise (a redeclared local, a duplicate parameter)
+        # are reported as errors, not propagated
+        for edited in parse("int g() { int x = 1; int x = 2; return x; }\n"
+                            "int h(int a, int a) { return a; }"):
+            program[edited.name] = edited
+            incremental.update([edited])
+        same = incremental.errors() == analyze_functions(list(program.values()), workers=1)
+        print(f"{'':>9}  same diagnostics as a full run: {same}")
+
+
+def benchmark_parallel_analysis(num_functions=200, statements_per_function=100,
+                                worker_counts=(1, 2, 4), seed=0) -> None:
+    """
+    Check a generated program with different worker counts.
+
+    Each function assigns nested random expressions over its parameters
+    and calls the previous function.  Parsing happens before timing; the
+    time includes starting the pool and sending the function ASTs.
+
+    Args:
+        num_functions: Number of functions in the program
+        statements_per_function: Statements per function body
+        worker_counts: Worker counts to compare
+        seed: Random seed for the fuzzer
+    """
+    import random
+    import time
+
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+
+    random.seed(seed)
+    fuzzer = CompilerFuzzer(compiler=None)
+    params = ", ".join(f"int var{i}" for i in range(5))
+    lines = []
+    for f in range(num_functions):
+        lines.append(f"int f{f}({params}) {{")
+        for i in range(statements_per_function):
+            lines.append(f"int r{i} = {fuzzer.generate_random_expression(max_depth=3)};")
+        call = f"f{f - 1}(r0, r1, r2, r3, r4)" if f else "0"
+        lines.append(f"return {call};\n}}")
+    functions = StatementParser(lexer_fast("\n".join(lines))).parse_program()
+
+    print(f"{num_functions} functions x {statements_per_function} statements")
+    baseline = None
+    reference = None
+    for workers in worker_counts:
+        start = time.perf_counter()
+        errors = analyze_functions(functions, workers=workers, min_parallel=1)
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        reference = errors if reference is None else reference
+        print(f"  workers={workers:<3}{len(errors):>6} errors{elapsed:>9.3f}s"
+              f"  speedup {baseline / elapsed:.2f}x  same errors: {errors == reference}")
+
 
 # Example usage
 if __name__ == "__main__":
@@ -285,6 +1244,11 @@ if __name__ == "__main__":
     var_type = analyzer.visit(var_ref)
     print(f"Variable 'x' has type: {var_type}")
 
+    # Test: Expression stored in an arena
+    arena = ASTArena()
+    root = arena.binop(arena.identifier('x'), '*', arena.number(2.5))
+    print(f"Arena expression: x * 2.5, Type: {analyzer.visit_arena(arena, root)}")
+
     # Print any errors
     if analyzer.errors:
         print("\nErrors found:")
@@ -292,3 +1256,99 @@ if __name__ == "__main__":
             print(f"  - {error}")
     else:
         print("\nNo semantic errors found!")
+
+    # Test: Same analysis with the flat symbol table
+    flat = SemanticAnalyzer(FlatSymbolTable())
+    flat.visit(FunctionDeclaration('f', [{'name': 'x', 'type': 'float'}], 'float',
+                                   [Assignment('y', BinOp(Identifier('x'), '*', Number(2)))]))
+    print(f"\nFlat table: 'f' is a {flat.symbol_table.lookup('f')['type']}, "
+          f"'x' visible after the body: {'x' in flat.symbol_table.bindings}")
+    flat.visit(Identifier('y'))
+    print(f"Flat table: {flat.errors}")
+
+    # Test: Every undefined name is reported, in one run
+    program = FunctionDeclaration('main', [], 'int', [
+        Assignment('a', BinOp(Identifier('b'), '+', Number(1))),
+        Assignment('c', BinOp(Identifier('a'), '*', Identifier('d'))),
+        ReturnStatement(FunctionCall('missing', [Identifier('e')])),
+    ])
+    complete = SemanticAnalyzer(FlatSymbolTable())
+    complete.visit(program)
+    print("\nUndefined names in one run:")
+    for error in complete.errors:
+        print(f"  - {error}")
+
+    # Test: Type cache on a hash-consed subexpression shared by two scopes
+    from ast_nodes import HashConsFactory
+    factory = HashConsFactory()
+    shared = factory.binop(factory.identifier('x'), '+', factory.number(1))
+    cached = SemanticAnalyzer(FlatSymbolTable(), cache_types=True)
+    print("\nType cache, x + 1 shared by f(int x) and g(float x):")
+    for name, param_type in (('f', 'int'), ('g', 'float')):
+        cached.visit(FunctionDeclaration(name, [{'name': 'x', 'type': param_type}], param_type,
+                                         [Assignment('y', shared), ReturnStatement(shared)]))
+        print(f"  after {name}: type_of(x + 1) = {cached.type_of(shared)}")
+
+    # Test: Types are interned, also across pickling (as used by worker processes)
+    import pickle
+    signature = function_signature(FunctionDeclaration(
+        'scale', [{'name': 'x', 'type': 'float'}, {'name': 'n', 'type': 'int'}], 'float', []))
+    print(f"\nInterned types: Type('int') is INT: {Type('int') is INT}, "
+          f"signature {signature!r} survives pickling: "
+          f"{pickle.loads(pickle.dumps(signature)) is signature}")
+
+    print("\n=== Benchmark: symbol table lookup with deep nesting ===")
+    benchmark_symbol_tables()
+
+    print("\n=== Benchmark: first assignments without exceptions ===")
+    benchmark_first_assignments()
+
+    # Test: Two-phase analysis, bodies checked in worker processes
+    functions = [
+        FunctionDeclaration('main', [], 'int', [
+            Assignment('r', FunctionCall('helper', [Number(2)])),
+            Assignment('s', BinOp(Identifier('r'), '+', Identifier('unknown'))),
+        ]),
+        FunctionDeclaration('helper', [{'name': 'n', 'type': 'int'}], 'int', [
+            ReturnStatement(BinOp(Identifier('n'), '*', Number(2.5))),
+            Assignment('t', FunctionCall('helper', [Number(1.5)])),
+        ]),
+        FunctionDeclaration('helper', [], 'void', []),
+    ]
+    print("\nTwo-phase analysis (forward call to helper is resolved):")
+    for error in analyze_functions(functions, workers=2, min_parallel=1):
+        print(f"  - {error}")
+
+    # Test: Incremental re-analysis after function-level edits
+    def helper(param_type: str, body: List[Any]) -> FunctionDeclaration:
+        return FunctionDeclaration('helper', [{'name': 'n', 'type': param_type}], 'int', body)
+
+    program = IncrementalAnalyzer([
+        FunctionDeclaration('main', [], 'int', [Assignment('r', FunctionCall('helper', [Number(2)]))]),
+        helper('int', [ReturnStatement(Identifier('n'))]),
+        FunctionDeclaration('other', [], 'int', [ReturnStatement(Number(0))]),
+    ])
+    print("\nIncremental analysis:")
+    for label, edit in (
+            ("helper body edited", lambda: program.update([helper('int', [ReturnStatement(Identifier('m'))])])),
+            ("helper(float n)", lambda: program.update([helper('float', [ReturnStatement(Identifier('n'))])])),
+            ("helper removed", lambda: program.remove('helper'))):
+        checked = program.checked
+        added, removed = edit()
+        print(f"  {label}: {program.checked - checked} bodies re-checked")
+        for name, error in added:
+            print(f"    + {name}: {error}")
+        for name, error in removed:
+            print(f"    - {name}: {error}")
+
+    print("\n=== Benchmark: parallel per-function analysis ===")
+    benchmark_parallel_analysis()
+
+    print("\n=== Benchmark: incremental re-analysis after one edit ===")
+    benchmark_incremental_analysis()
+
+    print("\n=== Benchmark: binary-operator checks, strings vs interned types ===")
+    benchmark_type_checks()
+
+    print("\n=== Benchmark: type cache on hash-consed ASTs ===")
+    benchmark_type_cache()
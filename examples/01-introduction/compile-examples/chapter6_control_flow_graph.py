@@ -0,0 +1,267 @@
+"""
+Chapter 6: Intermediate Code Generation - Basic Blocks and Control Flow Graph
+
+IntermediateCodeGenerator produces one flat list of quadruples in which
+control flow is spelled with `label`, `goto` and `ifFalse` pseudo-ops.  An
+analysis that worked on that list directly would have to rescan it to
+find where each jump goes.
+
+This module splits the code into basic blocks, maximal runs of
+instructions that are entered only at the top and left only at the
+bottom.  A block starts (is a "leader") at:
+
+- the first instruction
+- every `label`
+- the instruction after a `goto`, `ifFalse` or `return`
+
+Blocks are numbered in code order and referred to by index everywhere:
+successor and predecessor lists hold block numbers, and labels map to
+the block they start.  Dataflow passes visit blocks in reverse postorder,
+so that (apart from loop back edges) a block is visited after its
+predecessors.
+
+Features:
+- Leaders, block boundaries and the label-to-block index in one pass
+- Successor / predecessor lists of block indices
+- Reverse postorder from the entry block with an explicit stack
+- Works on a list of Quadruples or a QuadBuffer
+- Benchmark of construction time on large generated functions
+"""
+
+from chapter6_intermediate_code_generator import Quadruple
+
+# Instructions after which a new block starts
+JUMP_OPS = frozenset({'goto', 'ifFalse', 'return'})
+
+
+class ControlFlowGraph:
+    """
+    Basic blocks of a three-address code sequence and the edges between them.
+
+    Block b is code[starts[b]:ends[b]].  Block 0 is the entry.  If a block
+    ends in `ifFalse`, its successors are the fall-through block first,
+    then the jump target.
+    """
+
+    def __init__(self, code):
+        """
+        Split `code` into basic blocks and connect them.
+
+        Args:
+            code: List of Quadruples, or a QuadBuffer (read once)
+        """
+        self.code = code if isinstance(code, list) else list(code)
+        self.starts = []    # first instruction of each block
+        self.ends = []      # one past the last instruction of each block
+        self.labels = {}    # label -> block it starts
+        self.succ = []      # block -> successor blocks
+        self.pred = []      # block -> predecessor blocks
+        self._rpo = None
+        self.build()
+
+    def build(self):
+        """Find the blocks and labels in one pass, then add the edges"""
+        starts, labels = self.starts, self.labels
+        new_block = True
+        for index, quad in enumerate(self.code):
+            op = quad.op
+            if op == 'label':
+                # 标签总是块首；连续的标签各自成块
+                labels[quad.result] = len(starts)
+                starts.append(index)
+            elif new_block:
+                starts.append(index)
+            new_block = op in JUMP_OPS
+
+        code = self.code
+        count = len(starts)
+        # 空代码没有块，starts 与 ends 都为空
+        self.ends = starts[1:] + [len(code)] if starts else []
+        succ = self.succ = [[] for _ in range(count)]
+        pred = self.pred = [[] for _ in range(count)]
+        for block in range(count):
+            last = code[self.ends[block] - 1]
+            op = last.op
+            if op == 'goto':
+                targets = (self.block_of(last.result),)
+            elif op == 'ifFalse':
+                targets = (block + 1, self.block_of(last.result))
+            elif op == 'return':
+                targets = ()
+            else:
+                targets = (block + 1,)
+            for target in targets:
+                # 最后一个块的顺序后继不存在；两条边指向同一块时只记一次
+                if target < count and target not in succ[block]:
+                    succ[block].append(target)
+                    pred[target].append(block)
+
+    def block_of(self, label):
+        """Block started by `label`"""
+        block = self.labels.get(label)
+        if block is None:
+            raise Exception(f"Jump to undefined label: {label}")
+        return block
+
+    def __len__(self):
+        """Number of basic blocks"""
+        return len(self.starts)
+
+    def instructions(self, block):
+        """Quadruples of `block`"""
+        return self.code[self.starts[block]:self.ends[block]]
+
+    def reverse_postorder(self):
+        """
+        Blocks reachable from the entry, in reverse postorder.
+
+        Computed once with an explicit DFS stack and cached; blocks that
+        cannot be reached from block 0 are left out.
+
+        Returns:
+            List of block indices
+        """
+        if self._rpo is None:
+            order = []
+            if self.starts:
+                succ = self.succ
+                visited = [False] * len(self.starts)
+                visited[0] = True
+                stack = [(0, 0)]    # (block, index of the next successor to try)
+                while stack:
+                    block, next_succ = stack[-1]
+                    if next_succ < len(succ[block]):
+                        stack[-1] = (block, next_succ + 1)
+                        target = succ[block][next_succ]
+                        if not visited[target]:
+                            visited[target] = True
+                            stack.append((target, 0))
+                    else:
+                        stack.pop()
+                        order.append(block)
+            order.reverse()
+            self._rpo = order
+        return self._rpo
+
+    def print_blocks(self):
+        """Print every block with its edges and instructions"""
+        for block in range(len(self.starts)):
+            print(f"B{block}: preds {self.pred[block]} succs {self.succ[block]}")
+            for index in range(self.starts[block], self.ends[block]):
+                print(f"  {index:3d}: {self.code[index]}")
+
+
+def benchmark_cfg(sizes=(1000, 10000, 100000), repeat=3, seed=0):
+    """
+    CFG construction time on generated functions of growing size.
+
+    Each function is a random mix of assignments, if/else statements and
+    while loops, nested up to three deep, lowered by
+    IntermediateCodeGenerator.  Construction should grow linearly with the
+    number of instructions.
+
+    Args:
+        sizes: Number of statements per generated function
+        repeat: Runs per size; the best run is reported
+        seed: Random seed
+    """
+    import gc
+    import random
+    import time
+
+    from chapter6_intermediate_code_generator import (
+        Assignment, BinOp, Identifier, IfStatement, IntermediateCodeGenerator,
+        Number, WhileStatement)
+
+    rng = random.Random(seed)
+
+    def expression():
+        return BinOp(Identifier(f"v{rng.randrange(8)}"), rng.choice('+-*'),
+                     Number(rng.randrange(10)))
+
+    def statements(count, depth):
+        body = []
+        while len(body) < count:
+            roll = rng.random()
+            if depth < 3 and roll < 0.15:
+                condition = BinOp(Identifier(f"v{rng.randrange(8)}"), '<',
+                                  Number(rng.randrange(10)))
+                body.append(IfStatement(condition, statements(3, depth + 1),
+                                        statements(2, depth + 1) if roll < 0.08 else None))
+            elif depth < 3 and roll < 0.25:
+                condition = BinOp(Identifier(f"v{rng.randrange(8)}"), '<', Number(100))
+                body.append(WhileStatement(condition, statements(3, depth + 1)))
+            else:
+                body.append(Assignment(f"v{rng.randrange(8)}", expression()))
+        return body
+
+    print(f"{'statements':>10}{'instructions':>14}{'blocks':>9}{'time (ms)':>11}{'ns/instr':>10}")
+    for size in sizes:
+        generator = IntermediateCodeGenerator()
+        for statement in statements(size, 0):
+            generator.generate(statement)
+        code = generator.code
+        best = float('inf')
+        for _ in range(repeat):
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                cfg = ControlFlowGraph(code)
+                cfg.reverse_postorder()
+                best = min(best, time.perf_counter() - start)
+            finally:
+                gc.enable()
+        print(f"{size:>10,}{len(code):>14,}{len(cfg):>9,}{best * 1000:>11.2f}"
+              f"{best / len(code) * 1e9:>10.0f}")
+
+
+# Example usage
+if __name__ == "__main__":
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+    from chapter6_intermediate_code_generator import (
+        CompactCodeGenerator, IntermediateCodeGenerator)
+
+    source = """
+    int main(int n) {
+        int i = 0;
+        int s = 0;
+        while (i < n) {
+            if (i > 5) { s = s + i; } else { s = s - 1; }
+            i = i + 1;
+        }
+        return s;
+    }
+    """
+
+    # Test 1: Blocks, edges and reverse postorder of a loop with a branch
+    print("=== Test 1: CFG of a while loop containing if/else ===")
+    generator = IntermediateCodeGenerator()
+    for function in StatementParser(lexer_fast(source)).parse_program():
+        generator.generate(function)
+    cfg = ControlFlowGraph(generator.code)
+    cfg.print_blocks()
+    print("Labels:", cfg.labels)
+    print("Reverse postorder:", cfg.reverse_postorder())
+    print()
+
+    # Test 2: The same code from a QuadBuffer
+    print("=== Test 2: Same CFG from a QuadBuffer ===")
+    compact = CompactCodeGenerator()
+    for function in StatementParser(lexer_fast(source)).parse_program():
+        compact.generate(function)
+    same = ControlFlowGraph(compact.code)
+    print("Same blocks and edges:",
+          (same.starts, same.succ, same.pred) == (cfg.starts, cfg.succ, cfg.pred))
+    print()
+
+    # Test 3: Unreachable code after a return is its own block, left out of the RPO
+    print("=== Test 3: Unreachable block ===")
+    code = [Quadruple('=', '1', None, 'x'), Quadruple('return', 'x', None, None),
+            Quadruple('=', '2', None, 'x')]
+    dead = ControlFlowGraph(code)
+    print(f"{len(dead)} blocks, reverse postorder {dead.reverse_postorder()}")
+    print()
+
+    print("=== Benchmark: CFG construction ===")
+    benchmark_cfg()
@@ -0,0 +1,371 @@
+"""
+Chapter 7: Code Optimization - Liveness Analysis and Dead Code Elimination
+
+DeadCodeEliminator in chapter7_optimizer.py only collects the names an
+expression reads.  Deciding that an assignment is dead needs more: the
+assigned value must not be read on any path from the assignment, through
+branches and around loops.  That is liveness, a backward dataflow
+problem over the control flow graph:
+
+    live_out(b) = union of live_in(s) over successors s of b
+    live_in(b)  = use(b) | (live_out(b) - def(b))
+
+use(b) holds the variables b reads before writing them, and def(b) the
+ones it writes.  Sets are Python ints used as bit vectors: union is `|`,
+difference is `& ~`, and comparing two sets is one int comparison.  Only
+variables that are read in some block before being written there get a
+bit; every other name (most temporaries) is dead at every block boundary,
+so the vectors stay as wide as the number of variables that actually
+cross blocks.
+
+The equations are solved with a worklist seeded in postorder, so that
+(apart from loop back edges) a block is visited after its successors;
+when live_in(b) changes, only the predecessors of b are queued again.
+
+For dead code elimination, plain liveness is too weak: a use by an
+instruction that is itself dead still keeps its operands live, so
+removing dead code exposes more, and a variable that only feeds itself
+around a loop is never found dead.  Strong liveness fixes both: the
+transfer function of a block walks its instructions backwards and counts
+the uses of an assignment only if its result is live.  The same worklist
+solves it (the walk replaces use/kill), and one backward sweep from
+live_out then removes every dead assignment.
+
+Features:
+- Liveness with int bit vectors, numbered only for cross-block variables
+- Worklist solver over the chapter 6 ControlFlowGraph
+- Strong liveness for dead code elimination in a single pass
+- Live variable names at block entry and exit
+- Global dead code elimination; calls are kept for their side effects
+- Benchmark on large generated functions, checking results are unchanged
+"""
+
+from collections import deque
+
+from chapter6_control_flow_graph import ControlFlowGraph
+from chapter7_ssa import BINARY_SLOTS, NON_DEFINING, USE_SLOTS, is_variable
+
+
+class Liveness:
+    """
+    Live variables at the entry and exit of every block of a CFG.
+
+    numbering maps each cross-block variable to its bit; names lists the
+    variables by bit.  use, kill, live_in and live_out are ints indexed by
+    block.  With strong=True a variable is live only if it is read by an
+    instruction whose own result is live (or that has side effects).
+    """
+
+    def __init__(self, cfg, strong=False):
+        """
+        Args:
+            cfg: ControlFlowGraph to analyze
+            strong: Compute strong liveness, for dead code elimination
+        """
+        self.cfg = cfg
+        self.strong = strong
+        self.numbering = {}     # variable -> bit
+        self.names = []         # bit -> variable
+        self.use = []
+        self.kill = []
+        self.live_in = []
+        self.live_out = []
+        self.visits = 0         # blocks taken off the worklist
+        self.build_sets()
+        self.solve()
+
+    def build_sets(self):
+        """Compute use and kill for every block, numbering variables on the way"""
+        numbering, names = self.numbering, self.names
+        block_defs = []
+        for block in range(len(self.cfg)):
+            use = 0
+            defined = set()
+            for quad in self.cfg.instructions(block):
+                for slot in USE_SLOTS.get(quad.op, BINARY_SLOTS):
+                    operand = getattr(quad, slot)
+                    if operand not in defined and is_variable(operand):
+                        bit = numbering.get(operand)
+                        if bit is None:
+                            bit = numbering[operand] = len(names)
+                            names.append(operand)
+                        use |= 1 << bit
+                if quad.op not in NON_DEFINING:
+                    defined.add(quad.result)
+            self.use.append(use)
+            block_defs.append(defined)
+
+        # 没有编号的变量不会在块边界活跃，不需要 kill 位
+        for defined in block_defs:
+            kill = 0
+            for name in defined:
+                bit = numbering.get(name)
+                if bit is not None:
+                    kill |= 1 << bit
+            self.kill.append(kill)
+
+    def solve(self):
+        """Iterate the liveness equations to a fixpoint with a worklist"""
+        cfg = self.cfg
+        count = len(cfg)
+        succ, pred = cfg.succ, cfg.pred
+        use, kill, strong = self.use, self.kill, self.strong
+        live_in = self.live_in = [0] * count
+        live_out = self.live_out = [0] * count
+
+        # 逆后序的反序即后序；不可达的块放在最后
+        order = cfg.reverse_postorder()[::-1]
+        queued = [False] * count
+        for block in order:
+            queued[block] = True
+        order += [block for block in range(count) if not queued[block]]
+        queued = [True] * count
+        worklist = deque(order)
+
+        visits = 0
+        while worklist:
+            block = worklist.popleft()
+            queued[block] = False
+            visits += 1
+            out = 0
+            for target in succ[block]:
+                out |= live_in[target]
+            live_out[block] = out
+            if strong:
+                new_in = self.transfer(block, out)
+            else:
+                new_in = use[block] | (out & ~kill[block])
+            if new_in != live_in[block]:
+                live_in[block] = new_in
+                for source in pred[block]:
+                    if not queued[source]:
+                        queued[source] = True
+                        worklist.append(source)
+        self.visits = visits
+
+    def names_of(self, bits):
+        """Variable names in a bit vector, in bit order"""
+        names = []
+        while bits:
+            low = bits & -bits
+            names.append(self.names[low.bit_length() - 1])
+            bits ^= low
+        return names
+
+    def transfer(self, block, live, kept=None):
+        """
+        Strongly live variables before `block`, given those live after it.
+
+        Walks the block backwards; an assignment whose result is dead is
+        skipped, so its operands do not become live.  Cross-block
+        variables are bits of `live`; names local to the block are tracked
+        in a set.
+
+        Args:
+            block: Block index
+            live: Bit vector live at the end of the block
+            kept: If a list, the live instructions are appended to it in
+                reverse order
+
+        Returns:
+            Bit vector live at the start of the block
+        """
+        numbering = self.numbering
+        local = set()
+        for quad in reversed(self.cfg.instructions(block)):
+            op = quad.op
+            if op not in NON_DEFINING:
+                name = quad.result
+                bit = numbering.get(name)
+                if bit is None:
+                    alive = name in local
+                    local.discard(name)
+                else:
+                    alive = live >> bit & 1
+                    live &= ~(1 << bit)
+                if not alive and op != 'call':
+                    continue
+            for slot in USE_SLOTS.get(op, BINARY_SLOTS):
+                operand = getattr(quad, slot)
+                if is_variable(operand):
+                    bit = numbering.get(operand)
+                    if bit is None:
+                        local.add(operand)
+                    else:
+                        live |= 1 << bit
+            if kept is not None:
+                kept.append(quad)
+        return live
+
+    def sweep(self):
+        """
+        Drop assignments whose result is dead, walking each block backwards
+        from live_out.
+
+        Returns:
+            List of the remaining Quadruples
+        """
+        kept = []
+        for block in range(len(self.cfg)):
+            reversed_block = []
+            self.transfer(block, self.live_out[block], reversed_block)
+            reversed_block.reverse()
+            kept += reversed_block
+        return kept
+
+    def print_liveness(self):
+        """Print live variables at the entry and exit of every block"""
+        for block in range(len(self.cfg)):
+            print(f"B{block}: in {self.names_of(self.live_in[block])} "
+                  f"out {self.names_of(self.live_out[block])}")
+
+
+class GlobalDeadCodeEliminator:
+    """
+    Dead code elimination over three-address code, by strong liveness.
+
+    After run(), liveness holds the analysis and removed the number of
+    instructions removed.
+    """
+
+    def __init__(self):
+        self.liveness = None
+        self.removed = 0
+
+    def run(self, code):
+        """
+        Remove every assignment whose result is never used by live code.
+
+        Args:
+            code: List of Quadruples (or a QuadBuffer)
+
+        Returns:
+            New list of Quadruples; the input is not modified
+        """
+        cfg = ControlFlowGraph(code)
+        self.liveness = Liveness(cfg, strong=True)
+        kept = self.liveness.sweep()
+        self.removed = len(cfg.code) - len(kept)
+        return kept
+
+
+def benchmark_liveness(sizes=(1000, 10000, 100000), repeat=3, checks=20, seed=0):
+    """
+    Liveness and dead code elimination on generated functions.
+
+    Functions come from chapter7_ssa.generate_function_source(): random
+    assignments, if/else and counted loops, so many assignments are
+    overwritten before use.  Reports worklist visits per block, the number
+    of bits (cross-block variables), and the time per instruction of plain
+    liveness and of the whole elimination (CFG, strong liveness, sweep).
+    Visits per block stay constant, but each bit-vector operation takes
+    time proportional to the number of bits, and here every loop adds a
+    counter variable, so bits grow with the function size: the total cost
+    is O(instructions + visits x bits), and the time per instruction rises
+    slowly with size rather than staying flat.  The results of the code
+    before and after are compared on random inputs.
+
+    Args:
+        sizes: Statements per generated function
+        repeat: Runs per size; the best run is reported
+        checks: Random inputs to compare results on
+        seed: Random seed
+    """
+    import gc
+    import random
+    import time
+
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+    from chapter6_intermediate_code_generator import IntermediateCodeGenerator
+    from chapter7_ssa import generate_function_source, run_code
+
+    rng = random.Random(seed)
+    print(f"{'statements':>10}{'instrs':>9}{'blocks':>8}{'bits':>7}{'visits/blk':>11}"
+          f"{'live ns/i':>10}{'dce ns/i':>9}{'removed':>9}  same results")
+    for size in sizes:
+        source = generate_function_source(size, rng)
+        function = StatementParser(lexer_fast(source)).parse_program()[0]
+        generator = IntermediateCodeGenerator()
+        generator.generate(function)
+        code = generator.code
+        cfg = ControlFlowGraph(code)
+
+        best_liveness = best_dce = float('inf')
+        for _ in range(repeat):
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                liveness = Liveness(cfg)
+                analyzed = time.perf_counter()
+                eliminator = GlobalDeadCodeEliminator()
+                optimized = eliminator.run(code)
+                done = time.perf_counter()
+            finally:
+                gc.enable()
+            best_liveness = min(best_liveness, analyzed - start)
+            best_dce = min(best_dce, done - analyzed)
+
+        # 循环最多嵌套三层、每层三次，步数上限随代码规模放大
+        max_steps = 30 * len(code)
+        same = all(run_code(code, inputs, max_steps) == run_code(optimized, inputs, max_steps)
+                   for inputs in ({'a': rng.randrange(-20, 20), 'b': rng.randrange(-20, 20)}
+                                  for _ in range(checks)))
+        print(f"{size:>10,}{len(code):>9,}{len(cfg):>8,}{len(liveness.names):>7,}"
+              f"{eliminator.liveness.visits / len(cfg):>11.2f}"
+              f"{best_liveness / len(code) * 1e9:>10.0f}{best_dce / len(code) * 1e9:>9.0f}"
+              f"{eliminator.removed:>9,}  {same}")
+
+
+# Example usage
+if __name__ == "__main__":
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+    from chapter6_intermediate_code_generator import IntermediateCodeGenerator
+    from chapter7_ssa import run_code
+
+    source = """
+    int main(int n) {
+        int i = 0;
+        int s = 0;
+        int w = n * 2;
+        int d = 0;
+        while (i < n) {
+            int t = d + i;
+            d = t * 2;
+            if (i > 5) { s = s + i; } else { s = s - 1; }
+            i = i + 1;
+        }
+        int z = w + 1;
+        return s;
+    }
+    """
+    generator = IntermediateCodeGenerator()
+    generator.generate(StatementParser(lexer_fast(source)).parse_program()[0])
+    cfg = ControlFlowGraph(generator.code)
+
+    # Test 1: Plain liveness; d is live around the loop because it feeds itself
+    print("=== Test 1: Liveness ===")
+    liveness = Liveness(cfg)
+    print("Bits:", liveness.numbering)
+    liveness.print_liveness()
+    print(f"{liveness.visits} worklist visits for {len(cfg)} blocks")
+    print()
+
+    # Test 2: Strong liveness; z is dead, so w is; d and t only feed each
+    # other, so they are dead too
+    print("=== Test 2: Dead code elimination ===")
+    eliminator = GlobalDeadCodeEliminator()
+    optimized = eliminator.run(generator.code)
+    print("Strongly live at the loop header:",
+          eliminator.liveness.names_of(eliminator.liveness.live_in[1]))
+    for quad in optimized:
+        print(f"    {quad}")
+    print(f"Removed {eliminator.removed} instructions")
+    print("Results match the original code:",
+          all(run_code(generator.code, {'n': n}) == run_code(optimized, {'n': n})
+              for n in range(10)))
+    print()
+
+    print("=== Benchmark: liveness and dead code elimination ===")
+    benchmark_liveness()
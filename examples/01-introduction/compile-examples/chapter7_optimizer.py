@@ -10,8 +10,13 @@ Features:
 - AST-based optimizations
 - Multiple optimization passes
 - Demonstrates optimization effectiveness
+- Constant folding over expressions stored in an ast_nodes.ASTArena
+- Memoized constant folding over hash-consed (shared) expression DAGs
 """
 
+from ast_nodes import ASTArena, HashConsFactory, KIND_BINOP, KIND_NUMBER
+from ast_nodes import BinOp as _SharedBinOp, Number as _SharedNumber
+
 
 # AST Node classes
 class BinOp:
@@ -69,6 +74,101 @@ def constant_folding(node):
     return node
 
 
+def constant_folding_arena(arena, root):
+    """
+    Constant folding over an ASTArena.
+
+    Folds the subtree rooted at row `root` with the same rules as
+    constant_folding(), visiting rows in post-order with an explicit stack.
+    Rows are never modified: folded constants and rebuilt operations are
+    appended as new rows.
+
+    Returns:
+        Row index of the folded expression
+    """
+    folded = {}
+    for index in arena.postorder(root):
+        if arena.kind[index] != KIND_BINOP:
+            folded[index] = index
+            continue
+
+        left = folded[arena.left[index]]
+        right = folded[arena.right[index]]
+        op = arena.operator(index)
+
+        # If both operands are constants, compute the result
+        if arena.kind[left] == KIND_NUMBER and arena.kind[right] == KIND_NUMBER:
+            a, b = arena.value(left), arena.value(right)
+            if op == '+':
+                folded[index] = arena.number(a + b)
+                continue
+            elif op == '-':
+                folded[index] = arena.number(a - b)
+                continue
+            elif op == '*':
+                folded[index] = arena.number(a * b)
+                continue
+            elif op == '/' and b != 0:
+                folded[index] = arena.number(a / b)
+                continue
+
+        if left == arena.left[index] and right == arena.right[index]:
+            folded[index] = index
+        else:
+            folded[index] = arena.binop(left, op, right)
+
+    return folded[root]
+
+
+def constant_folding_dag(node, factory, memo=None):
+    """
+    Constant folding for immutable nodes built by ast_nodes.HashConsFactory.
+
+    Uses the same rules as constant_folding(), but never modifies a node:
+    folded constants and rebuilt operations come from `factory`, so the
+    result is hash-consed as well.  A subexpression shared by many parents
+    is folded only once.
+
+    Args:
+        node: Root of the expression DAG
+        factory: The HashConsFactory the DAG was built with
+        memo: Dict node -> folded node (nodes hash by identity); pass the
+            same dict for every expression of a program to share work
+            between them
+
+    Returns:
+        Folded expression
+    """
+    if type(node) is not _SharedBinOp:
+        return node
+    if memo is None:
+        memo = {}
+    folded = memo.get(node)
+    if folded is not None:
+        return folded
+
+    left = constant_folding_dag(node.left, factory, memo)
+    right = constant_folding_dag(node.right, factory, memo)
+    folded = node
+
+    # If both operands are constants, compute the result
+    if type(left) is _SharedNumber and type(right) is _SharedNumber:
+        if node.op == '+':
+            folded = factory.number(left.value + right.value)
+        elif node.op == '-':
+            folded = factory.number(left.value - right.value)
+        elif node.op == '*':
+            folded = factory.number(left.value * right.value)
+        elif node.op == '/' and right.value != 0:
+            folded = factory.number(left.value / right.value)
+
+    if folded is node and (left is not node.left or right is not node.right):
+        folded = factory.binop(left, node.op, right)
+
+    memo[node] = folded
+    return folded
+
+
 class ConstantPropagator:
     """
     Constant propagation optimization.
@@ -105,7 +205,9 @@ class DeadCodeEliminator:
     """
     Dead code elimination.
 
-    Removes code that doesn't affect program output.
+    Removes code that doesn't affect program output.  This class only
+    collects the names an expression reads; chapter7_liveness.py removes
+    dead assignments from three-address code using liveness analysis.
     """
 
     def __init__(self):
@@ -152,6 +254,122 @@ class Optimizer:
         return ast
 
 
+class _NodeFactory:
+    """Parser node factory that builds this chapter's mutable classes"""
+
+    binop = BinOp
+    number = Number
+    identifier = Identifier
+
+
+def benchmark_hash_consing(num_programs=200, exprs_per_program=50, repeat=3, seed=0):
+    """
+    Compare plain trees against hash-consed DAGs on fuzzer-generated programs.
+
+    Two workloads are measured: the assignments of
+    CompilerFuzzer.generate_random_program(), whose right-hand sides repeat
+    the same `varI op varJ` products, and nested right-hand sides from
+    generate_random_expression(), which share mostly leaves.  Both
+    pipelines lex, parse, fold constants and generate three-address code
+    for every assignment; the hash-consed one shares one factory, folding
+    memo and code generator per program.  Times are the best of `repeat`.
+
+    The DAG pipeline is not faster end to end.  Lexing and parsing
+    dominate, and every node goes through a factory lookup, while the
+    shared nodes save folding and code generation only.  On fuzzer programs
+    it is about on par (0.9-1.0x).  On nested expressions, where only
+    leaves are shared, it is slower (0.8-0.9x).  The gain is in memory and
+    code size: fewer nodes and fewer instructions.
+
+    Args:
+        num_programs: Number of generated programs per workload
+        exprs_per_program: Assignments per program
+        repeat: Timing repetitions
+        seed: Random seed for the fuzzer
+    """
+    import gc
+    import random
+    import time
+
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import Parser
+    from chapter6_intermediate_code_generator import (
+        Assignment, IntermediateCodeGenerator)
+
+    random.seed(seed)
+    fuzzer = CompilerFuzzer(compiler=None)
+    flat, nested = [], []
+    for _ in range(num_programs):
+        text = fuzzer.generate_random_program(num_vars=5, num_exprs=exprs_per_program)
+        flat.append([line.strip().rstrip(';')[len('int '):].split(' = ')
+                     for line in text.splitlines() if ' = ' in line])
+        nested.append([(f"nested{i}", fuzzer.generate_random_expression(max_depth=4))
+                       for i in range(exprs_per_program)])
+
+    def run_plain(programs):
+        quads = 0
+        results = []
+        for statements in programs:
+            generator = IntermediateCodeGenerator()
+            for name, source in statements:
+                tree = Parser(lexer_fast(source), _NodeFactory).parse_expression()
+                tree = constant_folding(tree)
+                generator.generate(Assignment(name, tree))
+                results.append(tree)
+            quads += len(generator.code)
+        return quads, results
+
+    def run_shared(programs):
+        quads = 0
+        results = []
+        for statements in programs:
+            factory = HashConsFactory()
+            memo = {}
+            generator = IntermediateCodeGenerator(share_subexpressions=True)
+            for name, source in statements:
+                tree = Parser(lexer_fast(source), factory).parse_expression()
+                tree = constant_folding_dag(tree, factory, memo)
+                generator.generate(Assignment(name, tree))
+                results.append(tree)
+            quads += len(generator.code)
+        return quads, results
+
+    def timed(run, programs):
+        best = None
+        for _ in range(repeat):
+            gc.collect()
+            gc.disable()
+            try:
+                start = time.perf_counter()
+                quads, results = run(programs)
+                elapsed = time.perf_counter() - start
+            finally:
+                gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+        return best, quads, [repr(tree) for tree in results]
+
+    print(f"{'workload':<20}{'tree nodes':>12}{'DAG nodes':>11}"
+          f"{'quads':>9}{'shared':>9}{'plain (s)':>11}{'DAG (s)':>9}{'speedup':>9}")
+    for workload, programs in [("fuzzer programs", flat), ("nested expressions", nested)]:
+        # 节点数在计时之外统计：每个程序一个 factory，只解析不折叠
+        tree_nodes = dag_nodes = 0
+        for statements in programs:
+            factory = HashConsFactory()
+            for _, source in statements:
+                Parser(lexer_fast(source), factory).parse_expression()
+            tree_nodes += factory.requested
+            dag_nodes += len(factory)
+
+        plain_time, plain_quads, plain_results = timed(run_plain, programs)
+        shared_time, shared_quads, shared_results = timed(run_shared, programs)
+        if plain_results != shared_results:
+            raise Exception(f"{workload}: folded expressions differ")
+        print(f"{workload:<20}{tree_nodes:>12}{dag_nodes:>11}{plain_quads:>9}"
+              f"{shared_quads:>9}{plain_time:>11.3f}{shared_time:>9.3f}"
+              f"{plain_time / shared_time:>8.2f}x")
+
+
 # Example usage
 if __name__ == "__main__":
     print("=== Optimization Examples ===\n")
@@ -207,3 +425,31 @@ if __name__ == "__main__":
     print("Expression: x * 2 could be optimized to x << 1 (left shift)")
     print("Expression: x / 4 could be optimized to x >> 2 (right shift)")
     print("(These optimizations would be implemented in a real compiler)")
+    print()
+
+    # Example 6: Constant folding on an arena
+    print("Example 6: Arena Constant Folding")
+    print("Expression: x + (10 + 20) * (5 - 3)")
+    arena = ASTArena()
+    root = arena.binop(
+        arena.identifier('x'), '+',
+        arena.binop(arena.binop(arena.number(10), '+', arena.number(20)), '*',
+                    arena.binop(arena.number(5), '-', arena.number(3))))
+    folded = constant_folding_arena(arena, root)
+    print(f"Optimized: {arena.format(folded)}")
+    print()
+
+    # Example 7: Constant folding on a hash-consed DAG
+    print("Example 7: Hash-Consed Constant Folding")
+    print("Expression: (x + 2 * 3) * (x + 2 * 3)")
+    factory = HashConsFactory()
+    term = factory.binop(factory.identifier('x'), '+',
+                         factory.binop(factory.number(2), '*', factory.number(3)))
+    expr7 = factory.binop(term, '*', term)
+    optimized7 = constant_folding_dag(expr7, factory)
+    print(f"Optimized: {optimized7}")
+    print(f"Operands still shared: {optimized7.left is optimized7.right}")
+    print()
+
+    print("=== Benchmark: hash-consing on fuzzer programs ===")
+    benchmark_hash_consing()
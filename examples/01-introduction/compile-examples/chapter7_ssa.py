@@ -0,0 +1,840 @@
+"""
+Chapter 7: Code Optimization - SSA Form and Sparse Optimizations
+
+The optimizers in chapter7_optimizer.py work on the AST, and constant
+propagation there needs a hand-filled table of known values.  This module
+works on the three-address code of chapter 6 instead, converted to static
+single assignment (SSA) form: every variable is assigned exactly once, and
+values merging at join points go through phi functions.  In SSA form
+every use has exactly one definition, so the def-use chains are explicit
+and an optimization only needs to follow them.
+
+Construction:
+1. Dominators by the iterative algorithm of Cooper, Harvey and Kennedy,
+   in reverse postorder of the CFG
+2. Dominance frontiers, walking up from the predecessors of join blocks
+3. Phi placement at the iterated dominance frontier of each variable's
+   definitions, only for variables live across blocks (semi-pruned SSA)
+4. Renaming along the dominator tree: the n-th definition of x becomes
+   x.n; x.0 is the value x has on entry (a parameter, or undefined)
+
+Optimizations:
+- Sparse conditional constant propagation (Wegman-Zadeck): constants are
+  propagated along def-use edges and only along CFG edges that can be
+  taken, so constant branch conditions cut away unreachable code
+- Copy propagation: uses of x.2 = y.1 (and of phis whose arguments are
+  all the same) are rewritten to the source along def-use edges
+
+Both passes touch each def-use edge a bounded number of times, so their
+cost grows with the number of def-use edges, not blocks x variables.
+
+Features:
+- SSAForm built from a chapter 6 ControlFlowGraph
+- Dominator tree, dominance frontiers, semi-pruned phi placement
+- Iterative renaming (no recursion limit on dominator tree depth)
+- SCCP with branch folding and unreachable block removal
+- Copy propagation, including trivial phis
+- Interpreters for the original code and the SSA form, used to check that
+  optimized code computes the same results
+- Benchmark on large generated functions
+"""
+
+from chapter6_control_flow_graph import ControlFlowGraph
+from chapter6_intermediate_code_generator import Quadruple
+
+# Instruction operands that are uses of variables; other ops use arg1 and arg2
+USE_SLOTS = {
+    'label': (),
+    'goto': (),
+    'call': (),          # arg1 是函数名，arg2 是参数个数
+    'ifFalse': ('arg1',),
+    'param': ('arg1',),
+    'return': ('arg1',),
+}
+BINARY_SLOTS = ('arg1', 'arg2')
+
+# Ops that do not define their result field (it is a label or unused)
+NON_DEFINING = frozenset({'label', 'goto', 'ifFalse', 'param', 'return'})
+
+# Constant folding of binary operators; None means "cannot fold"
+FOLD = {
+    '+': lambda a, b: a + b,
+    '-': lambda a, b: a - b,
+    '*': lambda a, b: a * b,
+    '/': lambda a, b: a / b if b != 0 else None,
+    '<': lambda a, b: int(a < b),
+    '>': lambda a, b: int(a > b),
+    '<=': lambda a, b: int(a <= b),
+    '>=': lambda a, b: int(a >= b),
+    '==': lambda a, b: int(a == b),
+    '!=': lambda a, b: int(a != b),
+}
+
+# SCCP lattice: TOP (no value seen yet) > constant > BOTTOM (not constant)
+_TOP = object()
+_BOTTOM = object()
+
+
+def literal_value(operand):
+    """Value of a numeric literal operand such as '5' or '2.5'; None for names"""
+    first = operand[0]
+    if first.isdigit() or first in '-.':
+        try:
+            return int(operand)
+        except ValueError:
+            return float(operand)
+    return None
+
+
+def is_variable(operand):
+    """True if `operand` names a variable or temporary"""
+    return type(operand) is str and literal_value(operand) is None
+
+
+def dominators(cfg):
+    """
+    Immediate dominator of every block (Cooper, Harvey and Kennedy).
+
+    Blocks are processed in reverse postorder until nothing changes; two
+    dominator candidates are intersected by walking up the partially built
+    tree, comparing reverse-postorder positions.
+
+    Returns:
+        List idom: idom[b] is the immediate dominator of block b, the entry
+        dominates itself, and unreachable blocks have None
+    """
+    rpo = cfg.reverse_postorder()
+    idom = [None] * len(cfg)
+    if not rpo:
+        return idom
+    position = [0] * len(cfg)
+    for index, block in enumerate(rpo):
+        position[block] = index
+
+    entry = rpo[0]
+    idom[entry] = entry
+    changed = True
+    while changed:
+        changed = False
+        for block in rpo[1:]:
+            new_idom = None
+            for pred in cfg.pred[block]:
+                if idom[pred] is None:
+                    continue    # 尚未处理或不可达
+                if new_idom is None:
+                    new_idom = pred
+                    continue
+                # intersect(pred, new_idom)
+                a, b = pred, new_idom
+                while a != b:
+                    while position[a] > position[b]:
+                        a = idom[a]
+                    while position[b] > position[a]:
+                        b = idom[b]
+                new_idom = a
+            if idom[block] != new_idom:
+                idom[block] = new_idom
+                changed = True
+    return idom
+
+
+def dominator_tree(idom):
+    """Children of every block in the dominator tree"""
+    children = [[] for _ in idom]
+    for block, parent in enumerate(idom):
+        if parent is not None and parent != block:
+            children[parent].append(block)
+    return children
+
+
+def dominance_frontiers(cfg, idom):
+    """
+    Dominance frontier of every block.
+
+    For each join block b, walk up from each predecessor to idom[b]; every
+    block passed has b in its frontier.
+
+    Returns:
+        List of lists of block indices
+    """
+    frontiers = [[] for _ in idom]
+    for block, preds in enumerate(cfg.pred):
+        if idom[block] is None or len(preds) < 2:
+            continue
+        for pred in preds:
+            runner = pred
+            if idom[runner] is None:
+                continue
+            while runner != idom[block]:
+                frontier = frontiers[runner]
+                if not frontier or frontier[-1] != block:
+                    frontier.append(block)
+                runner = idom[runner]
+    return frontiers
+
+
+class SSAInstruction(Quadruple):
+    """Quadruple in an SSA block, knowing the block it belongs to"""
+
+    def __init__(self, op, arg1, arg2, result, block):
+        super().__init__(op, arg1, arg2, result)
+        self.block = block
+
+
+class Phi:
+    """x.n = phi(...): one argument per incoming CFG edge"""
+
+    op = 'phi'
+
+    def __init__(self, var, block):
+        self.var = var          # 原变量名
+        self.block = block
+        self.result = None      # SSA name, set by renaming
+        self.args = {}          # predecessor block -> operand
+
+    def __str__(self):
+        args = ", ".join(f"{operand} [B{pred}]" for pred, operand in self.args.items())
+        return f"{self.result} = phi({args})"
+
+
+class SSAForm:
+    """
+    SSA form of a function's three-address code.
+
+    Block b holds phis[b] followed by blocks[b].  succ / pred start as the
+    CFG edges and lose edges that SCCP proves are never taken; reachable
+    marks the blocks still in the function.  defs maps each SSA name to
+    its defining instruction, and uses maps it to the instructions that
+    read it (once per operand).
+    """
+
+    def __init__(self, cfg):
+        """
+        Args:
+            cfg: ControlFlowGraph of one function, entry in block 0
+        """
+        self.cfg = cfg
+        self.idom = dominators(cfg)
+        self.children = dominator_tree(self.idom)
+        self.frontiers = dominance_frontiers(cfg, self.idom)
+        self.succ = [list(succ) for succ in cfg.succ]
+        self.pred = [list(pred) for pred in cfg.pred]
+        # 不可达的块不进入 SSA 形式
+        self.blocks = [
+            [SSAInstruction(quad.op, quad.arg1, quad.arg2, quad.result, block)
+             for quad in cfg.instructions(block)] if self.idom[block] is not None else []
+            for block in range(len(cfg))
+        ]
+        self.phis = [[] for _ in range(len(cfg))]
+        self.reachable = [parent is not None for parent in self.idom]
+        self.defs = {}
+        self.uses = {}
+        self.place_phis()
+        self.rename()
+
+    def place_phis(self):
+        """Insert phis at the iterated dominance frontier of each variable's definitions"""
+        live_across = {}    # 在某块中先用后定义的变量（按出现顺序）
+        defsites = {}
+        for block, instructions in enumerate(self.blocks):
+            defined = set()
+            for instruction in instructions:
+                for slot in USE_SLOTS.get(instruction.op, BINARY_SLOTS):
+                    operand = getattr(instruction, slot)
+                    if operand not in defined and is_variable(operand):
+                        live_across[operand] = True
+                if instruction.op not in NON_DEFINING:
+                    var = instruction.result
+                    defined.add(var)
+                    sites = defsites.setdefault(var, [])
+                    if not sites or sites[-1] != block:
+                        sites.append(block)
+
+        for var in live_across:
+            sites = defsites.get(var)
+            if sites is None:
+                continue    # 只在入口有值（参数）
+            has_phi = set()
+            in_worklist = set(sites)
+            worklist = list(sites)
+            while worklist:
+                for block in self.frontiers[worklist.pop()]:
+                    if block not in has_phi:
+                        has_phi.add(block)
+                        self.phis[block].append(Phi(var, block))
+                        if block not in in_worklist:
+                            in_worklist.add(block)
+                            worklist.append(block)
+
+    def rename(self):
+        """Give every definition a new version, walking the dominator tree"""
+        if not self.cfg.reverse_postorder():
+            return
+        stacks = {}     # variable -> stack of SSA names
+        versions = {}   # variable -> versions handed out
+        defs, uses = self.defs, self.uses
+
+        def current(var):
+            stack = stacks.get(var)
+            return stack[-1] if stack else f"{var}.0"
+
+        def fresh(var, instruction):
+            version = versions.get(var, 0) + 1
+            versions[var] = version
+            name = f"{var}.{version}"
+            stacks.setdefault(var, []).append(name)
+            defs[name] = instruction
+            return name
+
+        # 显式栈：(块, None) 表示进入；(块, 定义的变量) 表示离开时弹出版本
+        work = [(0, None)]
+        while work:
+            block, defined = work.pop()
+            if defined is not None:
+                for var in defined:
+                    stacks[var].pop()
+                continue
+
+            defined = []
+            for phi in self.phis[block]:
+                phi.result = fresh(phi.var, phi)
+                defined.append(phi.var)
+            for instruction in self.blocks[block]:
+                for slot in USE_SLOTS.get(instruction.op, BINARY_SLOTS):
+                    operand = getattr(instruction, slot)
+                    if is_variable(operand):
+                        name = current(operand)
+                        setattr(instruction, slot, name)
+                        uses.setdefault(name, []).append(instruction)
+                if instruction.op not in NON_DEFINING:
+                    var = instruction.result
+                    instruction.result = fresh(var, instruction)
+                    defined.append(var)
+            for succ in self.succ[block]:
+                for phi in self.phis[succ]:
+                    name = current(phi.var)
+                    phi.args[block] = name
+                    uses.setdefault(name, []).append(phi)
+
+            work.append((block, defined))
+            for child in reversed(self.children[block]):
+                work.append((child, None))
+
+    def index_uses(self):
+        """Rebuild defs and uses from the current instructions"""
+        defs, uses = self.defs, self.uses
+        defs.clear()
+        uses.clear()
+        for block in range(len(self.blocks)):
+            for phi in self.phis[block]:
+                defs[phi.result] = phi
+                for operand in phi.args.values():
+                    if is_variable(operand):
+                        uses.setdefault(operand, []).append(phi)
+            for instruction in self.blocks[block]:
+                for slot in USE_SLOTS.get(instruction.op, BINARY_SLOTS):
+                    operand = getattr(instruction, slot)
+                    if is_variable(operand):
+                        uses.setdefault(operand, []).append(instruction)
+                if instruction.op not in NON_DEFINING:
+                    defs[instruction.result] = instruction
+
+    def def_use_edges(self):
+        """Number of def-use edges (uses of defined SSA names)"""
+        return sum(len(users) for users in self.uses.values())
+
+    def instruction_count(self):
+        """Number of phis and instructions"""
+        return sum(len(phis) for phis in self.phis) + sum(len(code) for code in self.blocks)
+
+    def propagate_constants(self):
+        """
+        Sparse conditional constant propagation, then rewrite the code.
+
+        Constant SSA names are replaced by literals and their definitions
+        removed; branches on constant conditions become gotos (or fall
+        through); blocks that can never execute are emptied, and the
+        edges into them removed from phis, succ and pred.
+
+        Returns:
+            Dict of the SSA names found constant, name -> value
+        """
+        values, executable, edges = self.solve_constants()
+        constants = {name: value for name, value in values.items()
+                     if value is not _TOP and value is not _BOTTOM}
+
+        for block in range(len(self.blocks)):
+            if not executable[block]:
+                self.reachable[block] = False
+                self.blocks[block] = []
+                self.phis[block] = []
+                continue
+            phis = []
+            for phi in self.phis[block]:
+                if phi.result in constants:
+                    continue
+                phi.args = {pred: str(constants[operand]) if operand in constants else operand
+                            for pred, operand in phi.args.items() if (pred, block) in edges}
+                phis.append(phi)
+            self.phis[block] = phis
+
+            instructions = []
+            for instruction in self.blocks[block]:
+                if instruction.op not in NON_DEFINING and instruction.result in constants:
+                    continue    # 所有使用都被替换为常量
+                for slot in USE_SLOTS.get(instruction.op, BINARY_SLOTS):
+                    operand = getattr(instruction, slot)
+                    if operand in constants:
+                        setattr(instruction, slot, str(constants[operand]))
+                if instruction.op == 'ifFalse' and literal_value(instruction.arg1) is not None:
+                    if literal_value(instruction.arg1):
+                        continue    # 条件恒真：直接落空到下一块
+                    instruction.op, instruction.arg1 = 'goto', None
+                instructions.append(instruction)
+            self.blocks[block] = instructions
+
+        for block in range(len(self.blocks)):
+            self.succ[block] = [succ for succ in self.succ[block] if (block, succ) in edges]
+            self.pred[block] = [pred for pred in self.pred[block] if (pred, block) in edges]
+        self.index_uses()
+        return constants
+
+    def solve_constants(self):
+        """
+        The SCCP solver: lattice values of SSA names and executable edges.
+
+        Two worklists: CFG edges that became executable, and SSA names whose
+        value went down the lattice.  A block is evaluated when its first
+        incoming edge becomes executable; after that only its phis are
+        re-evaluated for new edges, and single instructions for new values.
+
+        Returns:
+            Tuple (values, executable, edges): name -> constant or _BOTTOM
+            (names still TOP are absent), executable flag per block, and the
+            set of executable (pred, succ) edges
+        """
+        blocks, phis, defs, uses = self.blocks, self.phis, self.defs, self.uses
+        count = len(blocks)
+        values = {}
+        executable = [False] * count
+        edges = set()
+        flow = [(-1, 0)] if count else []
+        names = []
+
+        def lookup(operand):
+            if operand in values:
+                return values[operand]
+            literal = literal_value(operand)
+            if literal is not None:
+                return literal
+            # 没有定义的名字（入口值 x.0）不是常量
+            return _TOP if operand in defs else _BOTTOM
+
+        def set_value(name, value):
+            old = values.get(name, _TOP)
+            if (old is _TOP and value is not _TOP) or (old is not _BOTTOM and value is _BOTTOM):
+                values[name] = value
+                names.append(name)
+
+        def visit_phi(phi):
+            result = _TOP
+            for pred, operand in phi.args.items():
+                if (pred, phi.block) not in edges:
+                    continue
+                value = lookup(operand)
+                if value is _TOP:
+                    continue
+                if value is _BOTTOM or (result is not _TOP and
+                                        (value != result or type(value) is not type(result))):
+                    result = _BOTTOM
+                    break
+                result = value
+            set_value(phi.result, result)
+
+        def visit(instruction):
+            op = instruction.op
+            if op == 'ifFalse':
+                condition = lookup(instruction.arg1)
+                if condition is _TOP:
+                    return
+                block = instruction.block
+                target = self.cfg.block_of(instruction.result)
+                if condition is _BOTTOM or condition:
+                    if block + 1 < count:
+                        flow.append((block, block + 1))
+                if condition is _BOTTOM or not condition:
+                    flow.append((block, target))
+            elif op in NON_DEFINING:
+                return
+            elif op == 'call':
+                set_value(instruction.result, _BOTTOM)
+            elif op == '=':
+                set_value(instruction.result, lookup(instruction.arg1))
+            else:
+                fold = FOLD.get(op)
+                if fold is None or instruction.arg2 is None:
+                    set_value(instruction.result, _BOTTOM)
+                    return
+                left, right = lookup(instruction.arg1), lookup(instruction.arg2)
+                if left is _BOTTOM or right is _BOTTOM:
+                    set_value(instruction.result, _BOTTOM)
+                elif left is not _TOP and right is not _TOP:
+                    value = fold(left, right)
+                    set_value(instruction.result, _BOTTOM if value is None else value)
+
+        while flow or names:
+            while flow:
+                edge = flow.pop()
+                if edge in edges:
+                    continue
+                edges.add(edge)
+                block = edge[1]
+                if executable[block]:
+                    for phi in phis[block]:
+                        visit_phi(phi)
+                    continue
+                executable[block] = True
+                for phi in phis[block]:
+                    visit_phi(phi)
+                for instruction in blocks[block]:
+                    visit(instruction)
+                last = blocks[block][-1].op if blocks[block] else None
+                if last == 'goto':
+                    flow.append((block, self.cfg.block_of(blocks[block][-1].result)))
+                elif last not in ('ifFalse', 'return') and block + 1 < count:
+                    flow.append((block, block + 1))
+            while names:
+                for user in uses.get(names.pop(), ()):
+                    if executable[user.block]:
+                        if user.op == 'phi':
+                            visit_phi(user)
+                        else:
+                            visit(user)
+        return values, executable, edges
+
+    def propagate_copies(self):
+        """
+        Copy propagation along def-use edges.
+
+        Every x.n = y (y a name or literal) and every phi whose arguments,
+        apart from the phi itself, are all the same operand y is removed,
+        and each use of x.n is rewritten to y.  A rewritten phi may become
+        trivial in turn and joins the worklist.
+
+        Returns:
+            Number of copies and phis removed
+        """
+        uses, defs = self.uses, self.defs
+        removed = set()
+
+        def source(instruction):
+            """Operand an instruction copies, or None"""
+            if instruction.op == '=':
+                return instruction.arg1
+            if instruction.op == 'phi':
+                operands = {operand for operand in instruction.args.values()
+                            if operand != instruction.result}
+                if len(operands) == 1:
+                    return operands.pop()
+            return None
+
+        worklist = [phi for phis in self.phis for phi in phis]
+        worklist += [instruction for code in self.blocks for instruction in code
+                     if instruction.op == '=']
+        worklist.reverse()  # 按代码顺序处理
+        while worklist:
+            copy = worklist.pop()
+            if id(copy) in removed:
+                continue
+            value = source(copy)
+            if value is None:
+                continue
+            name = copy.result
+            removed.add(id(copy))
+            del defs[name]
+            for user in uses.pop(name, ()):
+                if id(user) in removed:
+                    continue
+                if user.op == 'phi':
+                    for pred, operand in user.args.items():
+                        if operand == name:
+                            user.args[pred] = value
+                    worklist.append(user)
+                else:
+                    for slot in USE_SLOTS.get(user.op, BINARY_SLOTS):
+                        if getattr(user, slot) == name:
+                            setattr(user, slot, value)
+                if is_variable(value):
+                    uses.setdefault(value, []).append(user)
+
+        if removed:
+            for block in range(len(self.blocks)):
+                self.phis[block] = [phi for phi in self.phis[block] if id(phi) not in removed]
+                self.blocks[block] = [instruction for instruction in self.blocks[block]
+                                      if id(instruction) not in removed]
+        return len(removed)
+
+    def run(self, inputs, max_steps=10**6):
+        """
+        Execute the SSA form.
+
+        Args:
+            inputs: Dict of entry values by variable name (x for x.0)
+            max_steps: Instruction limit
+
+        Returns:
+            The returned value, or None if the code ends without return
+        """
+        env = {f"{name}.0": value for name, value in inputs.items()}
+
+        def value(operand):
+            literal = literal_value(operand)
+            return literal if literal is not None else env[operand]
+
+        block, previous, steps = 0, None, 0
+        while block < len(self.blocks):
+            # phi 按并行赋值的语义一次读完；未初始化的入口值读作 None
+            incoming = []
+            for phi in self.phis[block]:
+                operand = phi.args[previous]
+                literal = literal_value(operand)
+                incoming.append((phi.result, literal if literal is not None else env.get(operand)))
+            env.update(incoming)
+            next_block = block + 1
+            for instruction in self.blocks[block]:
+                steps += 1
+                if steps > max_steps:
+                    raise Exception("Step limit exceeded")
+                op = instruction.op
+                if op == 'goto':
+                    next_block = self.cfg.block_of(instruction.result)
+                elif op == 'ifFalse':
+                    if not value(instruction.arg1):
+                        next_block = self.cfg.block_of(instruction.result)
+                elif op == 'return':
+                    return value(instruction.arg1) if instruction.arg1 is not None else None
+                elif op == '=':
+                    env[instruction.result] = value(instruction.arg1)
+                elif op != 'label':
+                    env[instruction.result] = FOLD[op](value(instruction.arg1),
+                                                       value(instruction.arg2))
+            block, previous = next_block, block
+        return None
+
+    def print_ssa(self):
+        """Print every reachable block: phis, then instructions"""
+        for block in range(len(self.blocks)):
+            if not self.reachable[block]:
+                continue
+            print(f"B{block}: preds {self.pred[block]} succs {self.succ[block]} "
+                  f"idom {self.idom[block]}")
+            if not self.blocks[block] and not self.phis[block]:
+                print("    (empty)")
+            for phi in self.phis[block]:
+                print(f"    {phi}")
+            for instruction in self.blocks[block]:
+                print(f"    {instruction}")
+
+
+def run_code(code, inputs, max_steps=10**6):
+    """
+    Execute three-address code (no calls) directly.
+
+    Args:
+        code: List of Quadruples
+        inputs: Dict of initial variable values
+        max_steps: Instruction limit
+
+    Returns:
+        The returned value, or None if the code ends without return
+    """
+    labels = {quad.result: index for index, quad in enumerate(code) if quad.op == 'label'}
+    env = dict(inputs)
+
+    def value(operand):
+        literal = literal_value(operand)
+        return literal if literal is not None else env[operand]
+
+    index, steps = 0, 0
+    while index < len(code):
+        steps += 1
+        if steps > max_steps:
+            raise Exception("Step limit exceeded")
+        quad = code[index]
+        index += 1
+        op = quad.op
+        if op == 'goto':
+            index = labels[quad.result]
+        elif op == 'ifFalse':
+            if not value(quad.arg1):
+                index = labels[quad.result]
+        elif op == 'return':
+            return value(quad.arg1) if quad.arg1 is not None else None
+        elif op == '=':
+            env[quad.result] = value(quad.arg1)
+        elif op != 'label':
+            env[quad.result] = FOLD[op](value(quad.arg1), value(quad.arg2))
+    return None
+
+
+def generate_function_source(num_statements, rng, num_vars=8):
+    """
+    Source of a random terminating function for chapter 4's StatementParser.
+
+    Statements assign expressions or constants to v0..v{num_vars-1}, and
+    nest if/else and counted while loops (each with its own counter).  The
+    function returns the sum of all variables.
+
+    Args:
+        num_statements: Approximate number of statements
+        rng: random.Random instance
+        num_vars: Number of variables
+
+    Returns:
+        Source text of `int f(int a, int b)`
+    """
+    loops = [0]
+
+    def operand():
+        roll = rng.random()
+        if roll < 0.5:
+            return f"v{rng.randrange(num_vars)}"
+        if roll < 0.7:
+            return rng.choice(('a', 'b'))
+        return str(rng.randrange(10))
+
+    def statements(count, depth):
+        lines = []
+        while len(lines) < count:
+            roll = rng.random()
+            if depth < 3 and roll < 0.1:
+                condition = f"{operand()} {rng.choice(('<', '>', '=='))} {operand()}"
+                lines.append(f"if ({condition}) {{ {statements(2, depth + 1)} }} "
+                             f"else {{ {statements(2, depth + 1)} }}")
+            elif depth < 3 and roll < 0.15:
+                counter = f"c{loops[0]}"
+                loops[0] += 1
+                lines.append(f"int {counter} = 0; while ({counter} < 3) {{ "
+                             f"{statements(2, depth + 1)} {counter} = {counter} + 1; }}")
+            elif roll < 0.3:
+                lines.append(f"v{rng.randrange(num_vars)} = {rng.randrange(10)};")
+            elif roll < 0.4:
+                lines.append(f"v{rng.randrange(num_vars)} = {operand()};")
+            else:
+                lines.append(f"v{rng.randrange(num_vars)} = {operand()} "
+                             f"{rng.choice('+-')} {operand()};")
+        return " ".join(lines)
+
+    declarations = " ".join(f"int v{i} = {i};" for i in range(num_vars))
+    total = " + ".join(f"v{i}" for i in range(num_vars))
+    return (f"int f(int a, int b) {{ {declarations} {statements(num_statements, 0)} "
+            f"return {total}; }}")
+
+
+def benchmark_ssa(sizes=(1000, 10000, 50000), checks=20, seed=0):
+    """
+    SSA construction, SCCP and copy propagation on generated functions.
+
+    Reports the instruction and def-use edge counts and the time of each
+    phase per def-use edge, which should stay roughly flat as functions
+    grow.  For every size the optimized SSA form is executed on `checks`
+    random inputs and compared with the original code.
+
+    Args:
+        sizes: Statements per generated function
+        checks: Random inputs to compare results on
+        seed: Random seed
+    """
+    import gc
+    import random
+    import time
+
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+    from chapter6_intermediate_code_generator import IntermediateCodeGenerator
+
+    rng = random.Random(seed)
+    print(f"{'statements':>10}{'instrs':>9}{'def-use':>9}{'phis':>7}"
+          f"{'ssa ns/e':>10}{'sccp ns/e':>11}{'copy ns/e':>11}{'left':>8}  same results")
+    for size in sizes:
+        source = generate_function_source(size, rng)
+        function = StatementParser(lexer_fast(source)).parse_program()[0]
+        generator = IntermediateCodeGenerator()
+        generator.generate(function)
+        code = generator.code
+
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            ssa = SSAForm(ControlFlowGraph(code))
+            built = time.perf_counter()
+            edges = ssa.def_use_edges()
+            phis = sum(len(block) for block in ssa.phis)
+            ssa.propagate_constants()
+            propagated = time.perf_counter()
+            ssa.propagate_copies()
+            copied = time.perf_counter()
+        finally:
+            gc.enable()
+
+        same = all(run_code(code, inputs) == ssa.run(inputs)
+                   for inputs in ({'a': rng.randrange(-20, 20), 'b': rng.randrange(-20, 20)}
+                                  for _ in range(checks)))
+        print(f"{size:>10,}{len(code):>9,}{edges:>9,}{phis:>7,}"
+              f"{(built - start) / edges * 1e9:>10.0f}{(propagated - built) / edges * 1e9:>11.0f}"
+              f"{(copied - propagated) / edges * 1e9:>11.0f}{ssa.instruction_count():>8,}  {same}")
+
+
+# Example usage
+if __name__ == "__main__":
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+    from chapter6_intermediate_code_generator import IntermediateCodeGenerator
+
+    source = """
+    int main(int n) {
+        int i = 0;
+        int s = 0;
+        int k = 4;
+        while (i < n) {
+            if (k > 2) { s = s + i; } else { s = s - 1; }
+            int j = i;
+            i = j + 1;
+        }
+        return s * k;
+    }
+    """
+    generator = IntermediateCodeGenerator()
+    generator.generate(StatementParser(lexer_fast(source)).parse_program()[0])
+    cfg = ControlFlowGraph(generator.code)
+
+    # Test 1: Dominators and dominance frontiers
+    print("=== Test 1: Dominator tree and dominance frontiers ===")
+    ssa = SSAForm(cfg)
+    print("idom:     ", ssa.idom)
+    print("frontiers:", ssa.frontiers)
+    print()
+
+    # Test 2: SSA form with phis at the loop header
+    print("=== Test 2: SSA form ===")
+    ssa.print_ssa()
+    print(f"{ssa.def_use_edges()} def-use edges")
+    print()
+
+    # Test 3: SCCP finds k constant and removes the else branch
+    print("=== Test 3: Sparse conditional constant propagation ===")
+    constants = ssa.propagate_constants()
+    print("Constants:", constants)
+    ssa.print_ssa()
+    print()
+
+    # Test 4: Copy propagation removes j and the trivial phis
+    print("=== Test 4: Copy propagation ===")
+    print(f"Removed {ssa.propagate_copies()} copies and phis")
+    ssa.print_ssa()
+    print("Results match the original code:",
+          all(run_code(generator.code, {'n': n}) == ssa.run({'n': n}) for n in range(8)))
+    print()
+
+    print("=== Benchmark: SSA construction and sparse optimizations ===")
+    benchmark_ssa()
@@ -0,0 +1,231 @@
+"""
+Cached Visitor Dispatch for the Compiler Passes
+
+SemanticAnalyzer (chapter 5) and IntermediateCodeGenerator (chapter 6)
+pick the method for a node by name: visit_BinOp, gen_Assignment, ...
+Doing that with an f-string and getattr() on every node costs a string
+build and an attribute search per visit, in the innermost loop of both
+passes.
+
+NodeVisitor resolves the method once per (visitor class, node class) and
+keeps it in a dispatch table on the visitor class; every later visit of a
+node of that class is one dict lookup.  Resolution walks the node class's
+MRO, so a subclass of BinOp is handled by visit_BinOp unless it has a
+method of its own, and node classes from different chapters that share a
+name (ch4.BinOp, ast_nodes.BinOp, ...) all find the same method.
+
+Features:
+- Per-visitor-class dispatch table, filled lazily
+- Name-based methods (prefix + node class name) found along the node MRO
+- Explicit registration with the @handles decorator or register()
+- Visitor subclasses get their own table, so overriding a method works
+- Benchmark of nodes visited per second against getattr dispatch
+"""
+
+
+def handles(*node_classes):
+    """
+    Decorator: register a visitor method for the given node classes.
+
+    Example:
+        class Printer(NodeVisitor):
+            @handles(BinOp, Compare)
+            def visit_operation(self, node): ...
+    """
+    def decorate(method):
+        method.handled_node_classes = node_classes
+        return method
+    return decorate
+
+
+class NodeVisitor:
+    """
+    Base class for passes that dispatch on the class of a node.
+
+    Subclasses set `method_prefix` ('visit_', 'gen_', ...) and
+    `fallback_method`, the name of the method used for nodes nothing
+    handles, and call self.dispatch(node).  Usually the pass's public
+    method is simply an alias: `visit = NodeVisitor.dispatch`.
+    """
+
+    method_prefix = 'visit_'
+    fallback_method = 'generic_visit'
+
+    _handlers = {}   # node class -> function, registered on this class only
+    _dispatch = {}   # node class -> resolved function (cache)
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._handlers = {}
+        for function in vars(cls).values():
+            for node_class in getattr(function, 'handled_node_classes', ()):
+                cls._handlers[node_class] = function
+        cls._dispatch = {}
+
+    @classmethod
+    def register(cls, node_class, function):
+        """Register `function(visitor, node)` for `node_class` at run time"""
+        cls._handlers[node_class] = function
+        cls._clear_dispatch()
+
+    @classmethod
+    def _clear_dispatch(cls):
+        # 子类的分派表里可能缓存了旧的解析结果
+        cls._dispatch.clear()
+        for subclass in cls.__subclasses__():
+            subclass._clear_dispatch()
+
+    @classmethod
+    def resolve(cls, node_class):
+        """Find (and cache) the function that handles `node_class`"""
+        for klass in node_class.__mro__:
+            # Registered handlers, innermost visitor class first
+            for visitor_class in cls.__mro__:
+                function = vars(visitor_class).get('_handlers', {}).get(klass)
+                if function is not None:
+                    break
+            else:
+                function = getattr(cls, cls.method_prefix + klass.__name__, None)
+            if function is not None:
+                break
+        else:
+            function = getattr(cls, cls.fallback_method)
+        cls._dispatch[node_class] = function
+        return function
+
+    def dispatch(self, node):
+        """Call the method that handles type(node)"""
+        function = self._dispatch.get(type(node))
+        if function is None:
+            function = self.resolve(type(node))
+        return function(self, node)
+
+
+def benchmark_dispatch(num_exprs=20000, repeat=3, seed=0):
+    """
+    Nodes visited per second by both passes, with getattr and cached dispatch.
+
+    The AST is one generated function with `num_exprs` assignments of
+    nested random expressions, parsed by chapter 4's StatementParser.  The
+    getattr variants override visit/generate with the original
+    f-string + getattr dispatcher.  Like timeit, the garbage collector is
+    paused while timing.
+
+    Args:
+        num_exprs: Assignments in the generated function
+        repeat: Runs per case; the best run is reported
+        seed: Random seed for the fuzzer
+    """
+    import gc
+    import random
+    import time
+
+    from chapter12_compiler_fuzzer import CompilerFuzzer
+    from chapter3_lexer_manual import lexer_fast
+    from chapter4_parser_recursive_descent import StatementParser
+    from chapter5_semantic_analyzer import FlatSymbolTable, SemanticAnalyzer
+    from chapter6_intermediate_code_generator import IntermediateCodeGenerator
+
+    class GetattrAnalyzer(SemanticAnalyzer):
+        def visit(self, node):
+            method_name = f'visit_{type(node).__name__}'
+            visitor = getattr(self, method_name, self.generic_visit)
+            return visitor(node)
+
+    class GetattrGenerator(IntermediateCodeGenerator):
+        def generate(self, node):
+            method_name = f'gen_{type(node).__name__}'
+            generator = getattr(self, method_name, self.generic_generate)
+            return generator(node)
+
+    class CountingAnalyzer(SemanticAnalyzer):
+        visits = 0
+
+        def visit(self, node):
+            CountingAnalyzer.visits += 1
+            return SemanticAnalyzer.visit(self, node)
+
+    random.seed(seed)
+    fuzzer = CompilerFuzzer(compiler=None)
+    lines = [f"int var{i} = {i};" for i in range(5)]
+    lines += [f"int r{i} = {fuzzer.generate_random_expression(max_depth=4)};"
+              for i in range(num_exprs)]
+    source = "int main() {\n" + "\n".join(lines) + "\nreturn 0;\n}\n"
+    program = StatementParser(lexer_fast(source)).parse_program()[0]
+    CountingAnalyzer(FlatSymbolTable()).visit(program)
+    nodes = CountingAnalyzer.visits
+
+    cases = [
+        ("SemanticAnalyzer", GetattrAnalyzer, SemanticAnalyzer,
+         lambda cls: cls(FlatSymbolTable()).visit(program)),
+        ("IntermediateCodeGenerator", GetattrGenerator, IntermediateCodeGenerator,
+         lambda cls: cls().generate(program)),
+    ]
+    print(f"{nodes} nodes per pass")
+    print(f"{'pass':<28}{'dispatch':<10}{'nodes/s':>14}{'speedup':>10}")
+    for name, before, after, run in cases:
+        baseline = None
+        for label, cls in (("getattr", before), ("cached", after)):
+            best = float('inf')
+            for _ in range(repeat):
+                gc.disable()
+                start = time.perf_counter()
+                run(cls)
+                best = min(best, time.perf_counter() - start)
+                gc.enable()
+            baseline = baseline or best
+            print(f"{name:<28}{label:<10}{nodes / best:>14,.0f}{baseline / best:>9.2f}x")
+
+
+# Example usage
+if __name__ == "__main__":
+    class BinOp:
+        def __init__(self, left, op, right):
+            self.left = left
+            self.op = op
+            self.right = right
+
+    class Number:
+        def __init__(self, value):
+            self.value = value
+
+    class Power(BinOp):
+        """A BinOp subclass without a method of its own"""
+
+    class Evaluator(NodeVisitor):
+        method_prefix = 'eval_'
+        fallback_method = 'unsupported'
+
+        evaluate = NodeVisitor.dispatch
+
+        def eval_BinOp(self, node):
+            left, right = self.evaluate(node.left), self.evaluate(node.right)
+            return {'+': left + right, '*': left * right, '**': left ** right}[node.op]
+
+        @handles(Number)
+        def literal(self, node):
+            return node.value
+
+        def unsupported(self, node):
+            raise Exception(f"No eval method for {type(node).__name__}")
+
+    # Test case 1: Name-based, registered and inherited handlers
+    expr = BinOp(Number(2), '*', Power(Number(3), '**', Number(2)))
+    print("2 * 3 ** 2 =", Evaluator().evaluate(expr))
+    print("Dispatch table:", {k.__name__: f.__name__ for k, f in Evaluator._dispatch.items()})
+
+    # Test case 2: Registering a handler at run time
+    class Negate:
+        def __init__(self, operand):
+            self.operand = operand
+
+    try:
+        Evaluator().evaluate(Negate(Number(4)))
+    except Exception as e:
+        print("Before register():", e)
+    Evaluator.register(Negate, lambda visitor, node: -visitor.evaluate(node.operand))
+    print("After register(): -4 =", Evaluator().evaluate(Negate(Number(4))))
+    print()
+
+    print("=== Benchmark: nodes visited per second ===")
+    benchmark_dispatch()